@@ -0,0 +1,423 @@
+from src.crypto_metrics import CryptoMetrics
+from src.get_treasury_rate import TreasuryRateProvider
+from src.portfolio import panel_matrices, simulate_portfolio
+from src.simulations import (
+    simulate_dca,
+    simulate_model_buyer,
+    simulate_model_trader,
+)
+from contextlib import contextmanager
+from datetime import datetime
+import src.get_treasury_rate as treasury_module
+import src.setup_binance as binance_module
+import pandas as pd
+import numpy as np
+import argparse
+import platform
+import tracemalloc
+import json
+import time
+import sys
+
+# Bars per benchmark case
+SIZES = {
+    '1k': 1_000,
+    '100k': 100_000,
+    '10M': 10_000_000,
+}
+SYMBOLS = (1, 500)
+
+# Cases with more bars x symbols than this are skipped (10M bars of 500
+# symbols would need 40GB for the close prices alone)
+MAX_CELLS = 50_000_000
+
+FUNCTIONS = (
+    'calculate_rsi',
+    'calculate_bollinger_bands',
+    'calculate_macd',
+    'calculate_corr_treasury',
+    'calculate_volatility',
+    'set_buy',
+    'set_buy_panel',
+    'simulate_model_trader',
+    'simulate_model_buyer',
+    'simulate_dca',
+    'simulate_portfolio',
+)
+
+INITIAL_CAPITAL = 10000
+TRADE_VALUE = 100
+
+
+class SyntheticTreasurySource:
+    """
+    Treasury rate source generating a seeded random walk of business day
+    rates, so benchmarks never reach yfinance.
+    """
+
+    name = 'synthetic'
+
+    def __init__(self, seed: int = 0) -> None:
+        self.seed = seed
+
+    def fetch(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        dates = pd.bdate_range(start_date, end_date, normalize=True)
+        rng = np.random.default_rng(self.seed)
+        rates = 2 + np.cumsum(rng.normal(0, 0.02, len(dates)))
+        return pd.DataFrame({'date': dates, 'treasury_rate': rates})
+
+
+def synthetic_prices(
+        n_bars: int,
+        n_symbols: int = 1,
+        freq: str = '1min',
+        seed: int = 0
+    ) -> pd.DataFrame:
+    """
+    Generates geometric Brownian motion close prices ending today, in the
+    layout of get_historical_data_many.
+
+    ---------
+    Parameters
+    ----------
+    - n_bars (int): Number of bars.
+    - n_symbols (int): Number of symbols.
+    - freq (str): pandas frequency of the bars. Minutes keep 10M bars
+    within the datetime64 range and cover about 19 years.
+    - seed (int): Seed of the generator.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: 'date' column and one close price column per symbol,
+    named S0USDT, S1USDT, ...
+    """
+    rng = np.random.default_rng(seed)
+    end = pd.Timestamp.now().normalize()
+    dates = pd.date_range(end=end, periods=n_bars, freq=freq)
+    columns = {'date': dates}
+    for symbol in range(n_symbols):
+        log_returns = rng.normal(0, 0.002, n_bars)
+        columns[f'S{symbol}USDT'] = 100 * np.exp(np.cumsum(log_returns))
+    return pd.DataFrame(columns)
+
+
+def _no_network(*args, **kwargs):
+    raise RuntimeError("Network access is disabled while benchmarking")
+
+
+@contextmanager
+def offline():
+    """
+    Replaces the Binance client and the yfinance download with functions
+    that raise, so a benchmark can never hit the network.
+    """
+    get_client = vars(binance_module.BinanceClient)['get_client']
+    download = treasury_module.yf.download
+    binance_module.BinanceClient.get_client = staticmethod(_no_network)
+    treasury_module.yf.download = _no_network
+    try:
+        yield
+    finally:
+        binance_module.BinanceClient.get_client = get_client
+        treasury_module.yf.download = download
+
+
+def measure(
+        function,
+        repeat: int = 5,
+        min_time: float = 0.2
+    ) -> dict:
+    """
+    Measures the wall time and peak memory of a function call.
+
+    ---------
+    Parameters
+    ----------
+    - function (callable): Function called without arguments.
+    - repeat (int): Largest number of timed calls.
+    - min_time (float): Timing stops after the first call once this many
+    seconds were spent, so large cases run once.
+    ----------
+    Returns
+    ----------
+    - dict: 'seconds', the fastest of the timed calls, 'repeat', the
+    number of timed calls, and 'peak_mb', the peak memory allocated during
+    an extra call traced by tracemalloc.
+    """
+    times = []
+    while len(times) < repeat and sum(times) < min_time:
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        'seconds': min(times),
+        'repeat': len(times),
+        'peak_mb': (peak - baseline) / 2**20,
+    }
+
+
+def _case_functions(
+        df: pd.DataFrame,
+        metrics: CryptoMetrics,
+        functions: list
+    ) -> dict:
+    """
+    Benchmarked calls of one case. The per-coin functions run once for
+    each symbol of df.
+    """
+    coins = [column for column in df.columns if column != 'date']
+    frames = [df[['date', coin]] for coin in coins]
+    calls = {}
+
+    def per_coin(method):
+        def call():
+            for frame, coin in zip(frames, coins):
+                method(frame, coin)
+        return call
+
+    for name in ('calculate_rsi', 'calculate_bollinger_bands',
+                 'calculate_macd', 'calculate_corr_treasury', 'set_buy'):
+        calls[name] = per_coin(getattr(metrics, name))
+    calls['set_buy_panel'] = lambda: metrics.set_buy_panel(df)
+    calls['calculate_volatility'] = lambda: metrics.calculate_volatility(df)
+
+    simulators = {'simulate_model_trader', 'simulate_model_buyer'}
+    if simulators & set(functions):
+        # Simulator inputs are built once, outside of the timed calls
+        signals = [
+            metrics.set_buy(frame, coin) for frame, coin in zip(frames, coins)
+        ]
+        for name, simulator in (
+                ('simulate_model_trader', simulate_model_trader),
+                ('simulate_model_buyer', simulate_model_buyer)):
+            def call(simulator=simulator):
+                for df_buy, coin in zip(signals, coins):
+                    simulator(
+                        df_buy, INITIAL_CAPITAL, TRADE_VALUE, coin,
+                        verbose=False
+                    )
+            calls[name] = call
+
+    def dca():
+        for frame, coin in zip(frames, coins):
+            simulate_dca(
+                frame, coin, INITIAL_CAPITAL, TRADE_VALUE, 'W', verbose=False
+            )
+    calls['simulate_dca'] = dca
+
+    if 'simulate_portfolio' in functions:
+        _, _, prices, buy, sell = panel_matrices(metrics.set_buy_panel(df))
+        calls['simulate_portfolio'] = lambda: simulate_portfolio(
+            prices, buy, sell, INITIAL_CAPITAL * len(coins), TRADE_VALUE,
+            max_weight=0.1, rebalance_every=24 * 7
+        )
+
+    return {name: calls[name] for name in functions}
+
+
+def run_benchmarks(
+        sizes: dict = SIZES,
+        symbols: tuple = SYMBOLS,
+        functions: tuple = FUNCTIONS,
+        max_cells: int = MAX_CELLS,
+        repeat: int = 5,
+        seed: int = 0,
+        verbose: bool = True
+    ) -> pd.DataFrame:
+    """
+    Benchmarks the indicators, set_buy and the simulators on synthetic
+    prices, fully offline.
+
+    ---------
+    Parameters
+    ----------
+    - sizes (dict): Bars per case, keyed by case label.
+    - symbols (tuple): Numbers of symbols to benchmark each size with.
+    - functions (tuple): Names of the benchmarked functions, see FUNCTIONS.
+    - max_cells (int): Cases with more bars x symbols are skipped.
+    - repeat (int): Largest number of timed calls per function.
+    - seed (int): Seed of the synthetic data.
+    - verbose (bool): Whether to print each result as it is measured.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One row per case and function with the case label,
+    n_bars, n_symbols, function, seconds, repeat and peak_mb.
+    """
+    unknown = set(functions) - set(FUNCTIONS)
+    if unknown:
+        raise ValueError(f"Unknown benchmark functions: {sorted(unknown)}")
+
+    rows = []
+    with offline():
+        for label, n_bars in sizes.items():
+            for n_symbols in symbols:
+                if n_bars * n_symbols > max_cells:
+                    if verbose:
+                        print(f"Skipping {label} x {n_symbols} symbols")
+                    continue
+                df = synthetic_prices(n_bars, n_symbols, seed=seed)
+                days = (df['date'].iloc[-1] - df['date'].iloc[0]).days + 1
+                metrics = CryptoMetrics(
+                    days,
+                    treasury_provider=TreasuryRateProvider(
+                        SyntheticTreasurySource(seed), cache_dir=None
+                    )
+                )
+                calls = _case_functions(df, metrics, functions)
+                for name, call in calls.items():
+                    result = measure(call, repeat=repeat)
+                    rows.append({
+                        'case': f'{label}x{n_symbols}',
+                        'n_bars': n_bars,
+                        'n_symbols': n_symbols,
+                        'function': name,
+                        **result,
+                    })
+                    if verbose:
+                        print(
+                            f"{label:>5} x {n_symbols:<4} {name:<26}"
+                            f"{result['seconds']:>10.4f}s"
+                            f"{result['peak_mb']:>10.1f}MB"
+                        )
+                del df, calls
+    return pd.DataFrame(rows)
+
+
+def save_baseline(results: pd.DataFrame, path: str) -> None:
+    """
+    Saves benchmark results as a JSON baseline, with the machine they were
+    measured on.
+    """
+    baseline = {
+        'created': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'processor': platform.processor(),
+            'numpy': np.__version__,
+            'pandas': pd.__version__,
+        },
+        'results': results.to_dict(orient='records'),
+    }
+    with open(path, 'w') as file:
+        json.dump(baseline, file, indent=2)
+
+
+def load_baseline(path: str) -> pd.DataFrame:
+    """
+    Reads the results of a JSON baseline written by save_baseline.
+    """
+    with open(path) as file:
+        return pd.DataFrame(json.load(file)['results'])
+
+
+def compare_to_baseline(
+        results: pd.DataFrame,
+        baseline: pd.DataFrame,
+        time_tolerance: float = 0.25,
+        memory_tolerance: float = 0.25,
+        min_seconds: float = 0.001
+    ) -> pd.DataFrame:
+    """
+    Compares benchmark results with a baseline and flags regressions.
+
+    ---------
+    Parameters
+    ----------
+    - results (pd.DataFrame): Output of run_benchmarks.
+    - baseline (pd.DataFrame): Baseline results, see load_baseline.
+    - time_tolerance (float): Allowed relative slowdown.
+    - memory_tolerance (float): Allowed relative growth of the peak memory.
+    - min_seconds (float): Slowdowns smaller than this are timer noise and
+    never flagged.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: The results measured in both, with their baseline
+    values, the time and memory ratios and a 'regression' flag.
+    """
+    keys = ['case', 'function']
+    merged = results.merge(
+        baseline[keys + ['seconds', 'peak_mb']],
+        on=keys,
+        suffixes=('', '_baseline')
+    )
+    merged['time_ratio'] = merged['seconds'] / merged['seconds_baseline']
+    merged['memory_ratio'] = merged['peak_mb'] / merged['peak_mb_baseline']
+    slower = (
+        (merged['time_ratio'] > 1 + time_tolerance) &
+        (merged['seconds'] - merged['seconds_baseline'] > min_seconds)
+    )
+    heavier = (
+        (merged['memory_ratio'] > 1 + memory_tolerance) &
+        (merged['peak_mb'] - merged['peak_mb_baseline'] > 1)
+    )
+    merged['regression'] = slower | heavier
+    return merged
+
+
+def main(argv: list = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Benchmarks the indicators, set_buy and the simulators "
+        "on synthetic prices."
+    )
+    parser.add_argument(
+        '--sizes', nargs='+', default=list(SIZES), choices=list(SIZES)
+    )
+    parser.add_argument('--symbols', nargs='+', type=int, default=SYMBOLS)
+    parser.add_argument(
+        '--functions', nargs='+', default=FUNCTIONS, choices=FUNCTIONS
+    )
+    parser.add_argument('--max-cells', type=int, default=MAX_CELLS)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--baseline', help="JSON baseline to compare the results with"
+    )
+    parser.add_argument(
+        '--save', help="Path to save the results as a JSON baseline"
+    )
+    parser.add_argument('--tolerance', type=float, default=0.25)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        sizes={label: SIZES[label] for label in args.sizes},
+        symbols=tuple(args.symbols),
+        functions=tuple(args.functions),
+        max_cells=args.max_cells,
+        repeat=args.repeat,
+    )
+    if args.save:
+        save_baseline(results, args.save)
+
+    if args.baseline:
+        comparison = compare_to_baseline(
+            results,
+            load_baseline(args.baseline),
+            time_tolerance=args.tolerance,
+            memory_tolerance=args.tolerance
+        )
+        regressions = comparison[comparison['regression']]
+        if len(regressions):
+            print("Regressions:")
+            print(regressions[[
+                'case', 'function', 'seconds', 'seconds_baseline',
+                'time_ratio', 'peak_mb', 'peak_mb_baseline', 'memory_ratio'
+            ]].to_string(index=False))
+            return 1
+        print("No regressions.")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
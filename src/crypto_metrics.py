@@ -1,13 +1,47 @@
-from src.get_historical_data import get_historical_data
+from src.get_historical_data import get_historical_data, VOLUME_COLUMNS
 from src.get_treasury_rate import get_treasury_rate
+from src.metrics_cache import MetricsCache, cached_metric
+from src.profiling import profiled
+from src.resample import broadcast_extremes
+from src.signals import align_treasury_rate
+from src.strategy import Strategy
+from src.volatility import returns_matrix, rolling_volatility
 import pandas as pd
 import numpy as np
 
+def _uses_treasury(params: dict) -> bool:
+    """
+    Whether a set_buy(_panel) call needs the treasury rate.
+    """
+    strategy = params['strategy']
+    if strategy is None:
+        strategy = Strategy(
+            weights=params['weights'], THRESHOLD=params['THRESHOLD']
+        )
+    return strategy.uses_rate()
+
+
 class CryptoMetrics:
 
-    def __init__(self, lookback) -> None:
+    def __init__(
+            self, 
+            lookback, 
+            treasury_provider=None, 
+            cache: MetricsCache = None
+        ) -> None:
         self.lookback = lookback
+        self.treasury_provider = treasury_provider
+        # Opt-in memoization of the calculate_* and set_buy results
+        self.cache = cache
+
+    def _treasury_data(self) -> pd.DataFrame:
+        return get_treasury_rate(
+            lookback=self.lookback,
+            provider=self.treasury_provider
+        )
 
+    @profiled
+    @cached_metric
     def calculate_rsi(
             self, 
             df: pd.DataFrame, 
@@ -64,6 +98,8 @@ class CryptoMetrics:
         return df_rsi
 
 
+    @profiled
+    @cached_metric(uses_treasury=True)
     def calculate_corr_treasury(
             self, 
             df: pd.DataFrame,
@@ -90,7 +126,7 @@ class CryptoMetrics:
         """
         df_corr_treasury = df.copy()
 
-        treasury_data = get_treasury_rate(lookback=self.lookback)
+        treasury_data = self._treasury_data()
         df_corr_treasury = df_corr_treasury.merge(
             treasury_data, 
             on='date', 
@@ -120,6 +156,8 @@ class CryptoMetrics:
         return df_corr_treasury
 
 
+    @profiled
+    @cached_metric
     def calculate_bollinger_bands(
             self, 
             df: pd.DataFrame,
@@ -183,6 +221,8 @@ class CryptoMetrics:
         return df_bb
     
 
+    @profiled
+    @cached_metric
     def calculate_macd(
             self,
             df: pd.DataFrame,
@@ -256,6 +296,8 @@ class CryptoMetrics:
         return df_macd 
 
 
+    @profiled
+    @cached_metric
     def calculate_trendline(
             self, 
             df: pd.DataFrame, 
@@ -267,43 +309,62 @@ class CryptoMetrics:
         ---------
         Parameters
         ----------
-        - df (pd.DataFrame): DataFrame containing the price data.
+        - df (pd.DataFrame): DataFrame containing the price data, with a
+        'date' (or legacy 'data') column.
         - period (str): Period string aliases from Pandas. 
         The list of possible aliases can be found 
         here: https://pandas.pydata.org/docs/user_guide/timeseries.html#timeseries-period-aliases
         ----------
         Returns
         ----------
-        - pd.DataFrame: DataFrame with the necessary columns to plot trendline graphs.
+        - pd.DataFrame: DataFrame with the necessary columns to plot trendline graphs:
+        the max and min of each column over the period of every row.
         """
-        # Add columns for weekly min max values. 
-        df_trendline = df.copy()
-        df_trendline['periodo'] = df_trendline['data'].dt.to_period(
-            period
-        ).dt.start_time
-        
-        # Calculate weekly min max values.
-        max_periodo = df_trendline.groupby('periodo').max().add_suffix('_max')
-        min_periodo = df_trendline.groupby('periodo').min().add_suffix('_min')
-
-        df_trendline = df_trendline.merge(max_periodo, on='periodo', how='left')
-        df_trendline = df_trendline.merge(min_periodo, on='periodo', how='left')
-
-        df_trendline.drop(
-            columns = [
-                'periodo',
-                'data_min', 
-                'data_max'
-            ], 
-            inplace=True
+        # get_historical_data names the column 'date', older frames 'data'
+        date_column = 'date' if 'date' in df else 'data'
+        periods = df[date_column].dt.to_period(period).dt.start_time.to_numpy()
+        valid = ~np.isnat(periods)
+        all_valid = valid.all()
+
+        # Period min max values broadcast back onto the rows in one pass.
+        df_trendline = df.reset_index(drop=True)
+        columns = [c for c in df_trendline.columns if c != date_column]
+        extremes = {}
+        for column in columns:
+            values = df_trendline[column]
+            raw = values.to_numpy()
+            if raw.dtype.kind in 'biufmM':
+                if all_valid:
+                    highs, lows = broadcast_extremes(raw, periods)
+                else:
+                    highs, lows = np.empty_like(raw), np.empty_like(raw)
+                    highs[valid], lows[valid] = broadcast_extremes(
+                        raw[valid], periods[valid]
+                    )
+                highs, lows = pd.Series(highs), pd.Series(lows)
+                if not all_valid:
+                    highs, lows = highs.where(valid), lows.where(valid)
+            else:
+                grouped = values.groupby(periods)
+                highs, lows = grouped.transform('max'), grouped.transform('min')
+            extremes[f'{column}_max'] = highs
+            extremes[f'{column}_min'] = lows
+
+        order = [f'{c}_max' for c in columns] + [f'{c}_min' for c in columns]
+        df_trendline = pd.concat(
+            [df_trendline, pd.DataFrame(extremes)[order]], axis=1
         )
-        df_trendline.reset_index(drop=True,inplace=True)
         return df_trendline
     
+    @profiled
+    @cached_metric
     def calculate_volatility(self, df: pd.DataFrame, window=15) -> pd.DataFrame:
         """
-        Calculates the volatility of each metal commodity for the given window
+        Calculates the volatility of each asset for the given window
         period.
+
+        The returns and volatilities of all the assets are computed at once
+        on the (bars x assets) price matrix, see src.volatility.
         
         ---------
         Parameters
@@ -313,87 +374,141 @@ class CryptoMetrics:
         ----------
         Returns
         ---------
-        - pd.DataFrame: DataFrame with volatility for each metal.
+        - pd.DataFrame: DataFrame with the daily return (retorno_diario_*)
+        and the volatility in percent (volatilidade_*) of each asset.
         """
-
-        df_volatility = df.copy()
-        metals = df.select_dtypes(
-            include=['float64', 'int64']
-        ).columns.tolist()
-
-        metals.remove('dolar')
-        
-        for metal in metals:
-            df_volatility[f'retorno_diario_{metal}'] = df_volatility[
-                metal
-            ].pct_change(fill_method = None)
-            df_volatility[f'volatilidade_{metal}'] = df_volatility[
-                f'retorno_diario_{metal}'
-            ].rolling(window=window).std() * 100
-        
-        df_volatility.reset_index(drop=True,inplace=True)
+        # Every numeric column is an asset price, except the dollar index of
+        # the metals frames and the kline volumes
+        assets = [
+            column for column in df.select_dtypes(
+                include=['float64', 'int64']
+            ).columns
+            if column != 'dolar' and column not in VOLUME_COLUMNS
+        ]
+        returns = returns_matrix(df[assets].to_numpy(dtype=np.float64))
+        volatility = rolling_volatility(returns, window) * 100
+
+        columns = {}
+        for position, asset in enumerate(assets):
+            columns[f'retorno_diario_{asset}'] = returns[:, position]
+            columns[f'volatilidade_{asset}'] = volatility[:, position]
+
+        df_volatility = df.reset_index(drop=True)
+        df_volatility = pd.concat(
+            [df_volatility, pd.DataFrame(columns, index=df_volatility.index)],
+            axis=1
+        )
         return df_volatility
     
     
-    def set_buy(self, df: pd.DataFrame, coin: str, THRESHOLD=0.5) -> pd.DataFrame:
+    @profiled
+    @cached_metric(columns='coin', uses_treasury=_uses_treasury)
+    def set_buy(
+            self, 
+            df: pd.DataFrame, 
+            coin: str, 
+            THRESHOLD=0.5, 
+            weights: dict = None,
+            strategy: Strategy = None
+        ) -> pd.DataFrame:
         """
         Performs the calculation to set a buy indication, based on
         weights criteria.
+
+        The indicators are evaluated through a strategy graph (see 
+        src.strategy): only the signal arrays the weighted votes need are 
+        computed, sharing their intermediates, without building the metric 
+        frames. The treasury rate is only fetched if an indicator uses it.
         ---------
         Parameters
         ----------
-        - dataframes (list): List of DataFrames containing the calculated 
-        metrics.
+        - df (pd.DataFrame): DataFrame containing historical price data.
+        - coin (str): Coin that is being evaluated for calculations.
         - THRESHOLD (float): threshold to set a buy indication.
+        - weights (dict, optional): Weight of each indicator, defaults to 
+        DEFAULT_WEIGHTS.
+        - strategy (Strategy, optional): Indicators, weights and threshold 
+        to use instead of the default indicators with weights and THRESHOLD.
         ----------
         Returns
         ---------
-        - pd.DataFrame: DataFrame with buy indication and dates.
+        - pd.DataFrame: DataFrame with buy indication and dates, plus the 
+        volume columns of df if it has any.
         """
-
-        weights = {
-            'rsi' : 0.4,
-            'treasury_corr' : 0.1,
-            'bb' : 0.3,
-            'MACD' : 0.1,
-        }
-
-        rsi = self.calculate_rsi(df, coin)
-        treasury_corr = self.calculate_corr_treasury(df, coin)
-        bb = self.calculate_bollinger_bands(df, coin)
-        MACD = self.calculate_macd(df, coin)
-
-        dataframes = [rsi, treasury_corr, bb, MACD]
-
-        df_compiled = pd.concat(dataframes, axis=1)
-        df_compiled = df_compiled.loc[:, ~df_compiled.columns.duplicated()]
-
-        df_compiled[f'metric_buy_{coin}'] = (
-            df_compiled[f'rsi_buy_{coin}']*weights['rsi'] + 
-            df_compiled[f'treasury_corr_buy_{coin}']*weights['treasury_corr'] + 
-            df_compiled[f'bb_buy_{coin}']*weights['bb'] +
-            df_compiled[f'MACD_buy_{coin}']*weights['MACD']
-        )
-        df_compiled[f'buy_{coin}'] = np.where(
-            df_compiled[f'metric_buy_{coin}'] > THRESHOLD,
-            1,
-            0
+        prices = df[coin].to_numpy(dtype=np.float64)
+        if strategy is None:
+            strategy = Strategy(weights=weights, THRESHOLD=THRESHOLD)
+        signals = strategy.evaluate(
+            prices, 
+            rates=lambda: align_treasury_rate(
+                df['date'], 
+                self._treasury_data()
+            )
         )
+        buy, sell = signals['buy'], signals['sell']
+
+        df_compiled = pd.DataFrame({
+            'date': df['date'].to_numpy(),
+            coin: df[coin].to_numpy(),
+            f'buy_{coin}': buy.astype(np.int64),
+            f'sell_{coin}': sell.astype(np.int64),
+        })
+        # Volumes are kept for the simulators' execution models
+        for column in VOLUME_COLUMNS:
+            if column in df:
+                df_compiled[column] = df[column].to_numpy()
+        
+        return df_compiled
 
-        df_compiled[f'metric_sell_{coin}'] = (
-            df_compiled[f'rsi_sell_{coin}']*weights['rsi'] + 
-            df_compiled[f'treasury_corr_sell_{coin}']*weights['treasury_corr'] + 
-            df_compiled[f'bb_sell_{coin}']*weights['bb'] +
-            df_compiled[f'MACD_sell_{coin}']*weights['MACD']
-        )
 
-        df_compiled[f'sell_{coin}'] = np.where(
-            df_compiled[f'metric_sell_{coin}'] > THRESHOLD,
-            1,
-            0
-        )
+    @profiled
+    @cached_metric(uses_treasury=_uses_treasury)
+    def set_buy_panel(
+            self, 
+            df: pd.DataFrame, 
+            THRESHOLD=0.5, 
+            weights: dict = None,
+            strategy: Strategy = None
+        ) -> pd.DataFrame:
+        """
+        Performs the set_buy calculation for many coins at once, on a wide 
+        price matrix. Every indicator runs as a 2-D (dates x coins) array 
+        operation instead of one set_buy call per coin.
 
-        df_compiled = df_compiled[['date', coin, f'buy_{coin}', f'sell_{coin}']]
-        df_compiled.reset_index(drop=True,inplace=True)
-        
-        return df_compiled
\ No newline at end of file
+        ---------
+        Parameters
+        ----------
+        - df (pd.DataFrame): DataFrame with a 'date' column and one price 
+        column per coin, e.g. the output of get_historical_data_many.
+        - THRESHOLD (float): threshold to set a buy indication.
+        - weights (dict, optional): Weight of each indicator, defaults to 
+        DEFAULT_WEIGHTS.
+        - strategy (Strategy, optional): Indicators, weights and threshold 
+        to use instead of the default indicators with weights and THRESHOLD.
+        ----------
+        Returns
+        ---------
+        - pd.DataFrame: Long DataFrame with date, coin, price, buy and sell 
+        columns, one row per date and coin with a price.
+        """
+        coins = [column for column in df.columns if column != 'date']
+        prices = df[coins].to_numpy(dtype=np.float64)
+        if strategy is None:
+            strategy = Strategy(weights=weights, THRESHOLD=THRESHOLD)
+        signals = strategy.evaluate(
+            prices, 
+            rates=lambda: align_treasury_rate(
+                df['date'], 
+                self._treasury_data()
+            )
+        )
+        buy, sell = signals['buy'], signals['sell']
+
+        rows, columns = np.nonzero(~np.isnan(prices))
+        return pd.DataFrame({
+            'date': df['date'].to_numpy()[rows],
+            'coin': pd.Categorical.from_codes(columns, categories=coins),
+            'price': prices[rows, columns],
+            'buy': buy[rows, columns],
+            'sell': sell[rows, columns],
+        })
@@ -0,0 +1,129 @@
+import numpy as np
+
+# Binance spot fees for the base VIP level
+BINANCE_TAKER_FEE = 0.001
+BINANCE_MAKER_FEE = 0.001
+
+
+class ExecutionModel:
+    """
+    Fill model of the signal simulators: trading fees, slippage and partial
+    fills.
+
+    Orders fill at the bar price moved against the trade by
+    slippage + impact * (order value / bar quote volume), capped at
+    max_slippage so a sale always gets a positive price. The fee is taken
+    from what the order receives, like Binance does: a buy of value V gets
+    (V - fee) worth of coins and a sale gets its proceeds minus the fee.
+    With max_participation, an order can only take that fraction of the
+    bar quote volume and the rest of it is dropped. When the model uses the
+    volume, bars with a zero or missing quote volume have no liquidity and
+    nothing fills on them.
+
+    ---------
+    Parameters
+    ----------
+    - taker_fee (float): Fee rate of taker orders.
+    - maker_fee (float): Fee rate of maker orders.
+    - maker (bool): Whether orders pay the maker fee instead of the taker
+    fee.
+    - slippage (float): Fixed slippage, as a fraction of the price.
+    - impact (float): Slippage per unit of order value over bar quote
+    volume.
+    - max_participation (float, optional): Largest fraction of the bar quote
+    volume an order can fill.
+    - max_slippage (float): Largest total slippage, as a fraction of the
+    price. Must be below 1.
+    """
+
+    def __init__(
+            self,
+            taker_fee: float = BINANCE_TAKER_FEE,
+            maker_fee: float = BINANCE_MAKER_FEE,
+            maker: bool = False,
+            slippage: float = 0.0,
+            impact: float = 0.0,
+            max_participation: float = None,
+            max_slippage: float = 0.5
+        ) -> None:
+        for name, rate in (('taker_fee', taker_fee), ('maker_fee', maker_fee)):
+            if not 0 <= rate < 1:
+                raise ValueError(f"{name} must be in [0, 1), got {rate}")
+        if not 0 <= max_slippage < 1:
+            raise ValueError(
+                f"max_slippage must be in [0, 1), got {max_slippage}"
+            )
+        if not 0 <= slippage <= max_slippage:
+            raise ValueError(
+                f"slippage must be in [0, max_slippage], got {slippage}"
+            )
+        if not impact >= 0:
+            raise ValueError(f"impact must be non negative, got {impact}")
+        if max_participation is not None and not max_participation > 0:
+            raise ValueError(
+                f"max_participation must be positive, got {max_participation}"
+            )
+        self.taker_fee = taker_fee
+        self.maker_fee = maker_fee
+        self.maker = maker
+        self.slippage = slippage
+        self.impact = impact
+        self.max_participation = max_participation
+        self.max_slippage = max_slippage
+
+    @property
+    def fee_rate(self) -> float:
+        return self.maker_fee if self.maker else self.taker_fee
+
+    @property
+    def needs_volume(self) -> bool:
+        return self.impact != 0 or self.max_participation is not None
+
+    def capacity(self, quote_volume: np.ndarray, n_bars: int) -> np.ndarray:
+        """
+        Largest order value fillable on each bar: 0 on the bars without
+        liquidity when the model uses the volume.
+        """
+        if not self.needs_volume:
+            return np.full(n_bars, np.inf)
+        quote_volume = np.asarray(quote_volume, dtype=np.float64)
+        liquid = quote_volume > 0
+        if self.max_participation is None:
+            return np.where(liquid, np.inf, 0.0)
+        return np.where(liquid, self.max_participation * quote_volume, 0.0)
+
+    def fill_price(self, side, price, value, quote_volume=None):
+        """
+        Price paid (side=1) or received (side=-1) for an order of the given
+        value. Works on scalars and arrays alike. Without liquidity (zero or
+        NaN quote volume) the impact term is 0, as capacity lets no value
+        fill there.
+        """
+        slippage = self.slippage
+        if self.impact:
+            value = np.asarray(value, dtype=np.float64)
+            quote_volume = np.asarray(quote_volume, dtype=np.float64)
+            participation = np.divide(
+                value, quote_volume,
+                out=np.zeros(np.broadcast(value, quote_volume).shape),
+                where=quote_volume > 0
+            )
+            slippage = np.minimum(
+                slippage + self.impact * participation, self.max_slippage
+            )
+            if slippage.ndim == 0:
+                slippage = float(slippage)
+        return price * (1 + side * slippage)
+
+
+def quote_volumes(df, coin: str) -> np.ndarray:
+    """
+    Quote volume (in dollars) of each bar of a frame: the
+    'quote_asset_volume' column, or 'volume' times the coin price. None if
+    the frame has neither.
+    """
+    if 'quote_asset_volume' in df:
+        return df['quote_asset_volume'].to_numpy(dtype=np.float64)
+    if 'volume' in df:
+        return (df['volume'] * df[coin]).to_numpy(dtype=np.float64)
+    return None
@@ -1,7 +1,44 @@
 from src.setup_binance import BinanceClient
+from src.kline_cache import (
+    KLINE_COLUMNS,
+    KlineCache,
+    find_gaps,
+    to_milliseconds,
+)
+from src.kline_block import INTEGER_COLUMNS, KlineBlock, decode_klines
+from src.profiling import profiled, span
+from src.rate_limit import KLINES_WEIGHT, binance_weight_limiter
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 import pandas as pd
+import numpy as np
 import time
 
+DAY_MS = 24 * 60 * 60 * 1000
+
+# Kline volume columns used by the simulators' execution models
+VOLUME_COLUMNS = ['volume', 'quote_asset_volume']
+
+# Length of each Binance kline interval. Monthly candles are left out as 
+# they do not have a fixed length.
+INTERVAL_UNITS_MS = {
+    's': 1000,
+    'm': 60 * 1000,
+    'h': 60 * 60 * 1000,
+    'd': DAY_MS,
+    'w': 7 * DAY_MS,
+}
+
+def interval_to_ms(interval: str) -> int:
+    """
+    Converts a Binance kline interval (1m, 5m, 1h, 4h, 1d, 1w...) to 
+    milliseconds.
+    """
+    unit = interval[-1:]
+    if unit not in INTERVAL_UNITS_MS or not interval[:-1].isdigit():
+        raise ValueError(f"Unsupported kline interval: {interval}")
+    return int(interval[:-1]) * INTERVAL_UNITS_MS[unit]
+
 def map_to_chunks(lookback: int, chunk_size: int = 1000):
     # Create an empty list to store the result
     map_chunks = []
@@ -14,75 +51,370 @@ def map_to_chunks(lookback: int, chunk_size: int = 1000):
         start = end  # Update start for the next chunk
     return map_chunks
 
+def lookback_windows(lookback: int, interval: str, today: int):
+    """
+    Splits the last lookback days in (start_time, end_time) windows of at 
+    most 1000 candles of the given interval, oldest window first.
+    """
+    interval_ms = interval_to_ms(interval)
+    n_candles = -(-lookback * DAY_MS // interval_ms)
+    return [
+        (
+            today - (chunk['endLookback'] * interval_ms),
+            today - (chunk['startLookback'] * interval_ms),
+        )
+        for chunk in reversed(map_to_chunks(n_candles))
+    ]
+
 def parse_data_to_df(data: list):
+    """
+    Parses a Binance klines payload into a DataFrame with every kline
+    column, see decode_klines.
+    """
+    return decode_klines(data).to_df()
+
+def time_chunks(
+        start_time: int, 
+        end_time: int, 
+        interval: str, 
+        chunk_size: int = 1000
+    ):
+    """
+    Splits [start_time, end_time] in windows holding at most chunk_size 
+    candles, so each window is fetched with a single klines request.
+    """
+    window = chunk_size * interval_to_ms(interval)
+    return [
+        (chunk_start, min(chunk_start + window - 1, end_time))
+        for chunk_start in range(start_time, end_time + 1, window)
+    ]
+
+
+def request_klines(
+        client, 
+        coin: str, 
+        interval: str, 
+        start_time: int, 
+        end_time: int,
+        rate_limiter = binance_weight_limiter
+    ) -> list:
+    if rate_limiter is not None:
+        rate_limiter.acquire(KLINES_WEIGHT)
+    with span('binance.klines', coin=coin) as record:
+        data = client.klines(
+            symbol=coin, 
+            limit=1000, 
+            interval=interval,
+            startTime=start_time,
+            endTime=end_time
+        )
+        record.rows = len(data)
+    return data
+
+
+class KlineBuffer:
+    """
+    Preallocated column arrays that klines chunks are parsed into, so the 
+    final frame is built once instead of concatenating a frame per chunk.
+    Only the requested columns are kept.
+    """
+
+    def __init__(
+            self, 
+            n_chunks: int, 
+            columns: list = KLINE_COLUMNS, 
+            chunk_size: int = 1000,
+            price_dtype = np.float64
+        ) -> None:
+        size = n_chunks * chunk_size
+        self.chunk_size = chunk_size
+        self.price_dtype = price_dtype
+        self.columns = {}
+        for column in columns:
+            if column in INTEGER_COLUMNS:
+                self.columns[column] = np.empty(size, dtype=np.int64)
+            else:
+                self.columns[column] = np.empty(size, dtype=price_dtype)
+        self.filled = np.zeros(size, dtype=bool)
 
-    df = pd.DataFrame(
-        data, 
-        columns= [
-            'open_time', 
-            'open', 
-            'high', 
-            'low', 
-            'close', 
-            'volume', 
-            'close_time', 
-            'quote_asset_volume', 
-            'number_of_trades', 
-            'taker_buy_base_asset_volume', 
-            'taker_buy_quote_asset_volume', 
-            'ignore'
+    def write(self, chunk: int, data: list) -> None:
+        offset = chunk * self.chunk_size
+        block = decode_klines(data, list(self.columns), self.price_dtype)
+        for column, values in self.columns.items():
+            values[offset:offset + len(data)] = block[column]
+        self.filled[offset:offset + len(data)] = True
+
+    def to_block(self) -> KlineBlock:
+        return KlineBlock({
+            column: values[self.filled] 
+            for column, values in self.columns.items()
+        })
+
+    def to_df(self) -> pd.DataFrame:
+        return self.to_block().to_df()
+
+
+def fetch_klines_many(
+        client,
+        requests: dict,
+        interval: str = '1d',
+        max_workers: int = 8,
+        rate_limiter = binance_weight_limiter,
+        columns: list = KLINE_COLUMNS,
+        price_dtype = np.float64,
+        as_blocks: bool = False
+    ) -> dict:
+    """
+    Fetches klines windows for one or many coins concurrently.
+
+    ---------
+    Parameters
+    ----------
+    - client: Binance client, or any object exposing the same klines method.
+    - requests (dict): List of (start_time, end_time) windows in 
+    milliseconds keyed by coin, each holding at most 1000 candles 
+    (see time_chunks).
+    - interval (str): Binance kline interval, e.g. 1m, 1h or 1d.
+    - max_workers (int): Number of requests in flight at the same time.
+    - rate_limiter (TokenBucket, optional): Bucket consumed before each 
+    request to respect the Binance request-weight limit.
+    - columns (list): Kline columns to keep.
+    - price_dtype: Float dtype of the price and volume columns.
+    - as_blocks (bool): Whether to return KlineBlocks instead of frames.
+    ----------
+    Returns
+    ----------
+    - dict: Candles with the requested parse_data_to_df columns keyed by 
+    coin.
+    """
+    buffers = {
+        coin: KlineBuffer(len(windows), columns, price_dtype=price_dtype) 
+        for coin, windows in requests.items()
+    }
+
+    def fetch(coin, chunk, start_time, end_time):
+        status = request_klines(
+            client, coin, interval, start_time, end_time, rate_limiter
+        )
+        buffers[coin].write(chunk, status)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = [
+            pool.submit(fetch, coin, chunk, start_time, end_time)
+            for coin, windows in requests.items()
+            for chunk, (start_time, end_time) in enumerate(windows)
         ]
-    )
+        for future in futures:
+            future.result()
 
-    df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
-    df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
-    df = df.drop('ignore', axis=1)
-    df = df.astype(
-        {
-            'open': 'float64',
-            'high': 'float64',
-            'low': 'float64',
-            'close': 'float64',
-            'volume': 'float64',
-            'quote_asset_volume': 'float64',
-            'number_of_trades': 'int64',
-            'taker_buy_base_asset_volume': 'float64',
-            'taker_buy_quote_asset_volume': 'float64'
-        }
-    )
+    if as_blocks:
+        return {coin: buffer.to_block() for coin, buffer in buffers.items()}
+    return {coin: buffer.to_df() for coin, buffer in buffers.items()}
 
-    return df
 
-def get_historical_data(
-        coin: str, 
-        lookback: int, 
+def iter_klines(
+        coin: str,
+        lookback: int,
+        interval: str = '1d',
+        client = None,
+        max_workers: int = 8,
+        rate_limiter = binance_weight_limiter,
+        columns: list = KLINE_COLUMNS,
+        price_dtype = np.float64,
+        as_blocks: bool = False
     ):
+    """
+    Streams the candles of the last lookback days chunk by chunk, oldest 
+    first. At most max_workers chunks are requested or held at a time, so 
+    memory stays bounded however long the history is; consumers can write 
+    each chunk to disk as it arrives.
+
+    ---------
+    Parameters
+    ----------
+    - coin (str): Binance symbol, e.g. BTCUSDT.
+    - lookback (int): Number of days to look back.
+    - interval (str): Binance kline interval, e.g. 1m, 1h or 1d.
+    - client (optional): Object exposing the Binance klines method. 
+    Defaults to BinanceClient.get_client().
+    - max_workers (int): Number of chunk requests in flight at the same time.
+    - rate_limiter (TokenBucket, optional): Bucket consumed before each 
+    request.
+    - columns (list): Kline columns to keep.
+    - price_dtype: Float dtype of the price and volume columns.
+    - as_blocks (bool): Whether to yield KlineBlocks instead of frames.
+    ----------
+    Yields
+    ----------
+    - pd.DataFrame: Candles of one chunk with the parse_data_to_df schema 
+    (KlineBlock if as_blocks).
+    """
+    if client is None:
+        client = BinanceClient.get_client()
+
+    today = int(time.time() * 1000)
+    windows = iter(lookback_windows(lookback, interval, today))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        in_flight = deque()
+        for start_time, end_time in windows:
+            in_flight.append(pool.submit(
+                request_klines, 
+                client, coin, interval, start_time, end_time, rate_limiter
+            ))
+            if len(in_flight) == max_workers:
+                break
 
-    df = pd.DataFrame()
+        while in_flight:
+            status = in_flight.popleft().result()
+            window = next(windows, None)
+            if window is not None:
+                in_flight.append(pool.submit(
+                    request_klines, 
+                    client, coin, interval, *window, rate_limiter
+                ))
+            block = decode_klines(status, columns, price_dtype)
+            yield block if as_blocks else block.to_df()
 
-    client = BinanceClient.get_client()
 
-    map_chunks = map_to_chunks(lookback)
+def plan_cache_refresh(
+        cache: KlineCache,
+        coin: str,
+        interval: str,
+        start_time: int,
+        end_time: int
+    ) -> tuple:
+    """
+    Reads the cached candles of a coin and lists the windows still missing: 
+    candles newer than the last cached close_time, history older than what 
+    was requested before and gaps inside the cached range.
+
+    ---------
+    Returns
+    ----------
+    - tuple: (cached, meta, windows), as consumed by finish_cache_refresh.
+    """
+    cached, meta = cache.load(coin, interval)
+
+    if cached is None or cached.empty:
+        ranges = [(start_time, end_time)]
+        meta['requested_from'] = start_time
+    else:
+        open_times = to_milliseconds(cached['open_time'])
+        last_close = int(to_milliseconds(cached['close_time'])[-1])
+        ranges = []
+        if start_time < meta['requested_from']:
+            ranges.append((start_time, meta['requested_from'] - 1))
+            meta['requested_from'] = start_time
+        ranges += [
+            gap for gap in find_gaps(open_times, interval_to_ms(interval))
+            if gap[0] not in meta['known_gaps']
+        ]
+        ranges.append((last_close + 1, end_time))
+
+    windows = [
+        window 
+        for range_start, range_end in ranges 
+        for window in time_chunks(range_start, range_end, interval)
+    ]
+    return cached, meta, windows
+
+
+def finish_cache_refresh(
+        cache: KlineCache,
+        coin: str,
+        interval: str,
+        cached: pd.DataFrame,
+        meta: dict,
+        fetched: pd.DataFrame,
+        start_time: int,
+        end_time: int
+    ) -> pd.DataFrame:
+    """
+    Merges freshly fetched candles into the cached ones, writes the closed 
+    candles back to the cache and returns the candles opened from 
+    start_time on, including the candle still open at end_time.
+    """
+    df = pd.concat(
+        [frame for frame in (cached, fetched) if frame is not None], 
+        ignore_index=True
+    )
+    df = df.drop_duplicates(subset='open_time', keep='last')
+    df = df.sort_values(by='open_time', ascending=True, ignore_index=True)
+
+    # Only closed candles are cached, the last one is still being updated
+    closed = df[to_milliseconds(df['close_time']) < end_time]
+    # Gaps left after refetching have no candles on the exchange
+    meta['known_gaps'] = {
+        gap_start for gap_start, _ in find_gaps(
+            to_milliseconds(closed['open_time']), interval_to_ms(interval)
+        )
+    }
+    cache.save(coin, interval, closed, meta)
+
+    return df[to_milliseconds(df['open_time']) >= start_time]
+
+
+def fetch_historical_klines(
+        coins: list,
+        lookback: int,
+        interval: str = '1d',
+        client = None,
+        cache: KlineCache = None,
+        max_workers: int = 8,
+        columns: list = KLINE_COLUMNS
+    ) -> dict:
+    """
+    Fetches the candles of the last lookback days for every coin, with all 
+    chunk requests in flight concurrently.
+
+    ---------
+    Returns
+    ----------
+    - dict: Candles with the requested parse_data_to_df columns keyed by 
+    coin. The cache path always returns every column.
+    """
+    if client is None:
+        client = BinanceClient.get_client()
+
     today = int(time.time() * 1000)
+    start_time = today - (lookback * DAY_MS)
 
-    for chunk in map_chunks:
-        # Define the end time as the current time (the latest time)
-        end_time = today - (chunk['startLookback'] * 24 * 60 * 60 * 1000)
-        # Calculate the start time
-        start_time = today - (chunk['endLookback'] * 24 * 60 * 60 * 1000)
+    if cache is None:
+        windows = lookback_windows(lookback, interval, today)
+        return fetch_klines_many(
+            client, 
+            {coin: windows for coin in coins}, 
+            interval, 
+            max_workers, 
+            columns=columns
+        )
 
-        status = client.klines(
-            symbol=coin, 
-            limit=1000, 
-            interval='1d',
-            startTime=start_time,
-            endTime=end_time
+    plans = {
+        coin: plan_cache_refresh(cache, coin, interval, start_time, today) 
+        for coin in coins
+    }
+    fetched = fetch_klines_many(
+        client, 
+        {coin: windows for coin, (_, _, windows) in plans.items()}, 
+        interval,
+        max_workers
+    )
+    return {
+        coin: finish_cache_refresh(
+            cache, coin, interval, cached, meta, fetched[coin], 
+            start_time, today
         )
-        df_chunk = parse_data_to_df(status)
-        df = pd.concat([df, df_chunk], axis=0)
+        for coin, (cached, meta, _) in plans.items()
+    }
 
-    
-    df = df[['open_time', 'close']]
+
+def _close_prices(
+        df: pd.DataFrame, 
+        coin: str, 
+        extra_columns: list = ()
+    ) -> pd.DataFrame:
+    df = df[['open_time', 'close', *extra_columns]]
     df = df.sort_values(by='open_time', ascending=True)
     df = df.rename(
         columns = {
@@ -90,4 +422,91 @@ def get_historical_data(
             'close': coin
         }
     )
-    return df.reset_index(drop=True)
\ No newline at end of file
+    return df.reset_index(drop=True)
+
+
+@profiled
+def get_historical_data(
+        coin: str, 
+        lookback: int, 
+        interval: str = '1d',
+        client = None,
+        cache: KlineCache = None,
+        max_workers: int = 8,
+        volumes: bool = False
+    ):
+    """
+    Retrieves the close price of a coin over the last lookback days.
+
+    ---------
+    Parameters
+    ----------
+    - coin (str): Binance symbol, e.g. BTCUSDT.
+    - lookback (int): Number of days to look back.
+    - interval (str): Binance kline interval, e.g. 1m, 5m, 1h or 1d. 
+    Defaults to 1d.
+    - client (optional): Object exposing the Binance klines method. 
+    Defaults to BinanceClient.get_client().
+    - cache (KlineCache, optional): Local kline cache. When given, cached 
+    candles are read from disk and only missing candles are fetched.
+    - max_workers (int): Number of chunk requests in flight at the same time.
+    - volumes (bool): Whether to also keep the 'volume' and 
+    'quote_asset_volume' columns, used by the simulators' execution models.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: DataFrame with the date and the coin close price.
+    """
+    extra_columns = VOLUME_COLUMNS if volumes else []
+    klines = fetch_historical_klines(
+        [coin], lookback, interval, client, cache, max_workers,
+        columns=['open_time', 'close', *extra_columns]
+    )
+    return _close_prices(klines[coin], coin, extra_columns)
+
+
+@profiled
+def get_historical_data_many(
+        coins: list, 
+        lookback: int, 
+        interval: str = '1d',
+        client = None,
+        cache: KlineCache = None,
+        max_workers: int = 8
+    ) -> pd.DataFrame:
+    """
+    Retrieves the close price of several coins over the last lookback days, 
+    fetching every coin and chunk concurrently.
+
+    ---------
+    Parameters
+    ----------
+    - coins (list): Binance symbols, e.g. ['BTCUSDT', 'ETHUSDT'].
+    - lookback (int): Number of days to look back.
+    - interval (str): Binance kline interval, e.g. 1m, 5m, 1h or 1d.
+    - client (optional): Object exposing the Binance klines method. 
+    Defaults to BinanceClient.get_client().
+    - cache (KlineCache, optional): Local kline cache.
+    - max_workers (int): Number of chunk requests in flight at the same time.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: DataFrame with the date and one close price column per 
+    coin, aligned on date.
+    """
+    klines = fetch_historical_klines(
+        coins, lookback, interval, client, cache, max_workers,
+        columns=['open_time', 'close']
+    )
+    prices = pd.concat(
+        [
+            pd.Series(
+                df['close'].to_numpy(), 
+                index=pd.DatetimeIndex(df['open_time'], name='date'), 
+                name=coin
+            )
+            for coin, df in klines.items()
+        ], 
+        axis=1
+    )
+    return prices.sort_index().reset_index()
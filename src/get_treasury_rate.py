@@ -1,28 +1,30 @@
+from src.kline_cache import atomic_savez, to_milliseconds
+from src.profiling import profiled
 import yfinance as yf
 import pandas as pd
-from datetime import datetime, timedelta
+import numpy as np
+import threading
+import os
+from datetime import date, datetime, timedelta
 
-def get_treasury_rate(lookback: int) -> pd.DataFrame:
 
+class YFinanceTreasurySource:
     """
-    Retrieves the value of treasury bill in the last 13 weeks
-    Parameters
-    ----------
-    months: quantity of months to look back
+    Treasury rate source reading the 13 week treasury bill (^IRX) from
+    yfinance.
     """
 
+    name = 'yfinance_IRX'
     TICKER = '^IRX'
 
-    end_date = datetime.now()
-    start_date = end_date - timedelta(days=lookback)
-    
-    try:
+    @profiled(name='yfinance.download')
+    def fetch(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
         data = yf.download(
-            tickers = TICKER,
+            tickers = self.TICKER,
             start=start_date,
             end=end_date
         )
-        data = data[('Close', '^IRX')]
+        data = data[('Close', self.TICKER)]
         data = data.rename('treasury_rate')
         data = data.reset_index()
         data = data.rename(
@@ -30,8 +32,169 @@ def get_treasury_rate(lookback: int) -> pd.DataFrame:
                 'Date' : 'date'
             }
         )
-    except Exception as e:
-        print(f"An error occured: {e}")
-        return pd.DataFrame()
-    
-    return data
\ No newline at end of file
+        return data
+
+
+class CSVTreasurySource:
+    """
+    Treasury rate source reading a local CSV file with 'date' and
+    'treasury_rate' columns, for offline runs and tests.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self.name = f'csv_{os.path.splitext(os.path.basename(path))[0]}'
+
+    def fetch(self, start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        data = pd.read_csv(self.path, parse_dates=['date'])
+        data = data[(data['date'] >= start_date) & (data['date'] < end_date)]
+        return data[['date', 'treasury_rate']].reset_index(drop=True)
+
+
+class TreasuryRateProvider:
+    """
+    Memoized treasury rate series shared by every caller of the process.
+
+    The series is fetched from the source at most once per day, for the
+    longest lookback requested so far, and shorter lookbacks are sliced
+    from it. It is also kept on disk so new processes started on the same
+    day do not hit the source again. When the source fails, the last
+    cached series (or an empty one) is used and the source is not retried
+    before the next day, so an offline process does not call it again for
+    every coin and configuration.
+
+    ---------
+    Parameters
+    ----------
+    - source: Object with a name and a fetch(start_date, end_date) method
+    returning 'date' and 'treasury_rate' columns. Defaults to yfinance.
+    - cache_dir (str, optional): Directory of the on-disk cache, or None to
+    only memoize in process.
+    """
+
+    def __init__(
+            self,
+            source = None,
+            cache_dir: str = '.treasury_cache'
+        ) -> None:
+        self.source = YFinanceTreasurySource() if source is None else source
+        self.cache_dir = cache_dir
+        self._data = None
+        self._requested_from = None
+        self._fetched_on = None
+        self._failed_on = None
+        self._lock = threading.Lock()
+
+    def _path(self) -> str:
+        return os.path.join(self.cache_dir, f'{self.source.name}.npz')
+
+    def _load_disk(self) -> None:
+        if self.cache_dir is None or not os.path.exists(self._path()):
+            return
+        with np.load(self._path()) as stored:
+            self._data = pd.DataFrame({
+                'date': pd.to_datetime(stored['date'], unit='ms'),
+                'treasury_rate': stored['treasury_rate'],
+            })
+            self._requested_from = pd.Timestamp(
+                int(stored['requested_from']), unit='ms'
+            ).to_pydatetime()
+            self._fetched_on = date.fromordinal(int(stored['fetched_on']))
+
+    def _save_disk(self) -> None:
+        if self.cache_dir is None:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        atomic_savez(
+            self._path(),
+            date=to_milliseconds(self._data['date']),
+            treasury_rate=self._data['treasury_rate'].to_numpy(
+                dtype=np.float64
+            ),
+            requested_from=np.int64(
+                pd.Timestamp(self._requested_from).value // 10**6
+            ),
+            fetched_on=np.int64(self._fetched_on.toordinal()),
+        )
+
+    def _is_fresh(self, start_date: datetime) -> bool:
+        if self._failed_on == date.today():
+            return True
+        return (
+            self._data is not None
+            and self._fetched_on == date.today()
+            and self._requested_from <= start_date
+        )
+
+    def get(self, lookback: int) -> pd.DataFrame:
+        """
+        Retrieves the treasury rate over the last lookback days.
+
+        ---------
+        Parameters
+        ----------
+        - lookback (int): Number of days to look back.
+        ----------
+        Returns
+        ----------
+        - pd.DataFrame: DataFrame with 'date' and 'treasury_rate' columns.
+        Empty (with those columns) if no data could be retrieved.
+        """
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=lookback)
+
+        with self._lock:
+            if self._data is None:
+                self._load_disk()
+
+            if not self._is_fresh(start_date):
+                try:
+                    data = self.source.fetch(start_date, end_date)
+                    if data.empty:
+                        raise ValueError("no treasury rate data returned")
+                    self._data = data[['date', 'treasury_rate']]
+                    self._requested_from = start_date
+                    self._fetched_on = date.today()
+                    self._save_disk()
+                except Exception as e:
+                    print(f"An error occured: {e}")
+                    # Retried at most once per day
+                    self._failed_on = date.today()
+                    if self._data is not None:
+                        print("Using the last cached treasury rate.")
+
+            if self._data is None:
+                return pd.DataFrame(
+                    {
+                        'date': pd.Series(dtype='datetime64[ns]'),
+                        'treasury_rate': pd.Series(dtype='float64'),
+                    }
+                )
+            data = self._data
+
+        data = data[data['date'] >= start_date]
+        return data.reset_index(drop=True)
+
+
+# Shared by every CryptoMetrics instance and coin of the process. Replace its
+# source (e.g. with CSVTreasurySource) to run offline.
+treasury_provider = TreasuryRateProvider()
+
+
+@profiled
+def get_treasury_rate(
+        lookback: int,
+        provider: TreasuryRateProvider = None
+    ) -> pd.DataFrame:
+
+    """
+    Retrieves the value of treasury bill in the last 13 weeks
+    Parameters
+    ----------
+    lookback: quantity of days to look back
+    provider: TreasuryRateProvider to read from, defaults to the shared
+    treasury_provider
+    """
+    if provider is None:
+        provider = treasury_provider
+    return provider.get(lookback)
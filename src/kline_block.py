@@ -0,0 +1,109 @@
+from src.kline_cache import KLINE_COLUMNS, TIME_COLUMNS
+import pandas as pd
+import numpy as np
+
+# Kline fields stored as int64, the others are prices and volumes
+INTEGER_COLUMNS = ['open_time', 'close_time', 'number_of_trades']
+
+
+class KlineBlock:
+    """
+    Klines stored as one typed NumPy array per column: int64 millisecond
+    open/close times and trade counts, and prices/volumes in a configurable
+    float dtype. Only the columns asked for are kept, which makes it a
+    fraction of the size of a parse_data_to_df frame.
+
+    ---------
+    Parameters
+    ----------
+    - arrays (dict): Column arrays of the same length keyed by kline field.
+    """
+
+    __slots__ = ('arrays',)
+
+    def __init__(self, arrays: dict) -> None:
+        if len({len(values) for values in arrays.values()}) > 1:
+            raise ValueError("KlineBlock columns must have the same length")
+        self.arrays = arrays
+
+    def __len__(self) -> int:
+        for values in self.arrays.values():
+            return len(values)
+        return 0
+
+    def __getitem__(self, column: str) -> np.ndarray:
+        return self.arrays[column]
+
+    def __contains__(self, column: str) -> bool:
+        return column in self.arrays
+
+    @property
+    def columns(self) -> list:
+        return list(self.arrays)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(values.nbytes for values in self.arrays.values())
+
+    def slice(self, start: int, end: int) -> 'KlineBlock':
+        """
+        Candles [start, end) of the block, as views on its arrays.
+        """
+        return KlineBlock({
+            column: values[start:end]
+            for column, values in self.arrays.items()
+        })
+
+    @classmethod
+    def concat(cls, blocks: list) -> 'KlineBlock':
+        """
+        Joins blocks with the same columns, in the given order.
+        """
+        columns = blocks[0].columns
+        return cls({
+            column: np.concatenate([block[column] for block in blocks])
+            for column in columns
+        })
+
+    def to_df(self) -> pd.DataFrame:
+        """
+        Builds a DataFrame with the parse_data_to_df schema for the columns
+        of the block.
+        """
+        df = pd.DataFrame(self.arrays, copy=False)
+        for column in TIME_COLUMNS:
+            if column in df:
+                df[column] = pd.to_datetime(df[column], unit='ms')
+        return df
+
+
+def decode_klines(
+        data: list,
+        columns: list = KLINE_COLUMNS,
+        price_dtype = np.float64
+    ) -> KlineBlock:
+    """
+    Parses a Binance klines payload straight into typed arrays, one column
+    at a time and without building intermediate object columns.
+
+    ---------
+    Parameters
+    ----------
+    - data (list): Klines as returned by the Binance klines endpoint.
+    - columns (list): Kline fields to keep.
+    - price_dtype: Float dtype of the price and volume columns, e.g.
+    np.float32 to halve their size.
+    ----------
+    Returns
+    ----------
+    - KlineBlock: The requested columns of the klines.
+    """
+    n_candles = len(data)
+    arrays = {}
+    for column in columns:
+        position = KLINE_COLUMNS.index(column)
+        dtype = np.int64 if column in INTEGER_COLUMNS else price_dtype
+        arrays[column] = np.fromiter(
+            (row[position] for row in data), dtype=dtype, count=n_candles
+        )
+    return KlineBlock(arrays)
@@ -0,0 +1,158 @@
+import os
+import tempfile
+import pandas as pd
+import numpy as np
+
+# Kline fields kept by parse_data_to_df, in Binance payload order.
+KLINE_COLUMNS = [
+    'open_time',
+    'open',
+    'high',
+    'low',
+    'close',
+    'volume',
+    'close_time',
+    'quote_asset_volume',
+    'number_of_trades',
+    'taker_buy_base_asset_volume',
+    'taker_buy_quote_asset_volume',
+]
+TIME_COLUMNS = ['open_time', 'close_time']
+
+
+def find_gaps(open_times: np.ndarray, interval_ms: int) -> list:
+    """
+    Finds missing candles in a sorted array of open times.
+
+    ---------
+    Parameters
+    ----------
+    - open_times (np.ndarray): Sorted candle open times in milliseconds.
+    - interval_ms (int): Candle interval in milliseconds.
+    ----------
+    Returns
+    ----------
+    - list: (start_time, end_time) millisecond ranges with missing candles.
+    """
+    open_times = np.asarray(open_times, dtype=np.int64)
+    missing = np.flatnonzero(np.diff(open_times) > interval_ms)
+    return [
+        (int(open_times[i]) + interval_ms, int(open_times[i + 1]) - 1)
+        for i in missing
+    ]
+
+
+class KlineCache:
+    """
+    Persistent columnar kline store, one file per symbol and interval.
+
+    Each file holds the columns of parse_data_to_df as NumPy arrays, with
+    timestamps as int64 milliseconds, plus metadata about what was already
+    requested: the earliest start time fetched and the gaps that were
+    refetched and confirmed empty on the exchange. Writes go to a temporary
+    file that atomically replaces the previous one, so an interrupted job
+    never leaves a truncated cache behind.
+    """
+
+    def __init__(self, root: str = '.kline_cache') -> None:
+        self.root = root
+
+    def path(self, symbol: str, interval: str) -> str:
+        return os.path.join(self.root, f'{symbol}_{interval}.npz')
+
+    def load(self, symbol: str, interval: str) -> tuple:
+        """
+        Reads the cached candles of a symbol and interval.
+
+        ---------
+        Parameters
+        ----------
+        - symbol (str): Binance symbol, e.g. BTCUSDT.
+        - interval (str): Binance kline interval, e.g. 1d.
+        ----------
+        Returns
+        ----------
+        - tuple: (df, meta). df has the parse_data_to_df schema, or is None
+        when nothing is cached. meta holds 'requested_from', the earliest
+        start time (ms) already fetched, and 'known_gaps', the gap start
+        times (ms) known to have no candles.
+        """
+        path = self.path(symbol, interval)
+        if not os.path.exists(path):
+            return None, {'requested_from': None, 'known_gaps': set()}
+
+        with np.load(path) as stored:
+            df = pd.DataFrame(
+                {column: stored[column] for column in KLINE_COLUMNS}
+            )
+            meta = {
+                'requested_from': int(stored['requested_from']),
+                'known_gaps': set(stored['known_gaps'].tolist()),
+            }
+
+        for column in TIME_COLUMNS:
+            df[column] = pd.to_datetime(df[column], unit='ms')
+        return df, meta
+
+    def save(
+            self,
+            symbol: str,
+            interval: str,
+            df: pd.DataFrame,
+            meta: dict
+        ) -> None:
+        """
+        Atomically replaces the cached candles of a symbol and interval.
+
+        ---------
+        Parameters
+        ----------
+        - symbol (str): Binance symbol, e.g. BTCUSDT.
+        - interval (str): Binance kline interval, e.g. 1d.
+        - df (pd.DataFrame): Candles with the parse_data_to_df schema.
+        - meta (dict): 'requested_from' and 'known_gaps', as returned by
+        load.
+        """
+        os.makedirs(self.root, exist_ok=True)
+
+        arrays = {
+            column: df[column].to_numpy() for column in KLINE_COLUMNS
+        }
+        for column in TIME_COLUMNS:
+            arrays[column] = to_milliseconds(df[column])
+        arrays['requested_from'] = np.int64(meta['requested_from'])
+        arrays['known_gaps'] = np.array(
+            sorted(meta['known_gaps']), dtype=np.int64
+        )
+
+        atomic_savez(self.path(symbol, interval), **arrays)
+
+
+def atomic_savez(path: str, **arrays) -> None:
+    """
+    Writes arrays to an .npz file through a temporary file in the same
+    directory that atomically replaces path, so readers never see a
+    partially written file.
+    """
+    directory, name = os.path.split(path)
+    handle, tmp_path = tempfile.mkstemp(
+        dir=directory or '.', prefix=f'.{name}.', suffix='.tmp'
+    )
+    try:
+        with os.fdopen(handle, 'wb') as tmp_file:
+            np.savez(tmp_file, **arrays)
+            tmp_file.flush()
+            os.fsync(tmp_file.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+
+def to_milliseconds(dates: pd.Series) -> np.ndarray:
+    """
+    Converts a datetime column to int64 epoch milliseconds.
+    """
+    return pd.to_datetime(dates).to_numpy(dtype='datetime64[ms]').astype(
+        np.int64
+    )
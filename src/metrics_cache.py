@@ -0,0 +1,286 @@
+from collections import OrderedDict
+import pandas as pd
+import numpy as np
+import functools
+import threading
+import tempfile
+import hashlib
+import inspect
+import pickle
+import os
+
+
+def frame_digest(df: pd.DataFrame, columns: list = None) -> str:
+    """
+    Fast content hash of DataFrame columns: their names, dtypes and raw
+    bytes, hashed with BLAKE2b.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): Frame to hash.
+    - columns (list, optional): Columns to hash, defaults to all of them.
+    ----------
+    Returns
+    ----------
+    - str: Hex digest.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for column in df.columns if columns is None else columns:
+        values = df[column].to_numpy()
+        digest.update(f'{column}:{values.dtype}:{len(values)}'.encode())
+        if values.dtype == object:
+            values = pd.util.hash_array(values)
+        digest.update(np.ascontiguousarray(values).view(np.uint8))
+    return digest.hexdigest()
+
+
+def param_digest(value) -> str:
+    """
+    Content hash of a call parameter. Arrays and frames are hashed by
+    their bytes (repr truncates large ones), containers and objects item
+    by item, and scalars by their repr.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    if value is None or isinstance(value, (bool, int, float, str, np.generic)):
+        digest.update(f'{type(value).__name__}:{value!r}'.encode())
+    elif isinstance(value, np.ndarray):
+        digest.update(f'ndarray:{value.dtype}:{value.shape}'.encode())
+        if value.dtype == object:
+            digest.update(param_digest(value.tolist()).encode())
+        else:
+            digest.update(np.ascontiguousarray(value).view(np.uint8))
+    elif isinstance(value, pd.Series):
+        digest.update(b'Series')
+        digest.update(frame_digest(value.to_frame(name='value')).encode())
+        digest.update(frame_digest(value.index.to_frame(name='index')).encode())
+    elif isinstance(value, pd.DataFrame):
+        digest.update(b'DataFrame')
+        digest.update(frame_digest(value).encode())
+        digest.update(frame_digest(value.index.to_frame(name='index')).encode())
+    elif isinstance(value, dict):
+        digest.update(b'dict')
+        for key in sorted(value, key=repr):
+            digest.update(param_digest(key).encode())
+            digest.update(param_digest(value[key]).encode())
+    elif isinstance(value, (list, tuple)):
+        digest.update(type(value).__name__.encode())
+        for item in value:
+            digest.update(param_digest(item).encode())
+    elif hasattr(value, '__dict__'):
+        # e.g. a Strategy: hashed by its attributes
+        digest.update(type(value).__qualname__.encode())
+        digest.update(param_digest(vars(value)).encode())
+    else:
+        digest.update(f'{type(value).__name__}:{value!r}'.encode())
+    return digest.hexdigest()
+
+
+def _nbytes(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def _copy(value):
+    return value.copy() if hasattr(value, 'copy') else value
+
+
+class MetricsCache:
+    """
+    Content-addressed cache of CryptoMetrics results, keyed by a hash of
+    the input prices and the call parameters (see frame_digest).
+
+    Results are kept in memory in least recently used order until they
+    exceed max_bytes. With a directory, they are also pickled to disk when
+    stored, so evicted results and new processes can read them back without
+    recomputing. Callers get copies, so mutating a result never alters the
+    cache.
+
+    ---------
+    Parameters
+    ----------
+    - max_bytes (int): Memory budget of the in-memory tier.
+    - directory (str, optional): Directory of the on-disk tier, or None to
+    only cache in memory.
+    """
+
+    def __init__(
+            self,
+            max_bytes: int = 256 * 2**20,
+            directory: str = None
+        ) -> None:
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.entries = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f'{key}.pkl')
+
+    def _keep(self, key: str, value, size: int) -> None:
+        if size > self.max_bytes:
+            return
+        self.entries[key] = (value, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self.entries.popitem(last=False)
+            self.bytes -= evicted_size
+            self.evictions += 1
+
+    def get(self, key: str):
+        """
+        Cached result of key, or None (counted as a miss).
+        """
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return _copy(entry[0])
+
+        if self.directory is not None and os.path.exists(self._path(key)):
+            try:
+                with open(self._path(key), 'rb') as file:
+                    value = pickle.load(file)
+            except Exception as e:
+                print(f"An error occured: {e}")
+            else:
+                with self._lock:
+                    self.disk_hits += 1
+                    if key not in self.entries:
+                        self._keep(key, value, _nbytes(value))
+                return _copy(value)
+
+        with self._lock:
+            self.misses += 1
+        return None
+
+    def put(self, key: str, value) -> None:
+        """
+        Stores the result of key in memory and, with a directory, on disk.
+        """
+        value = _copy(value)
+        with self._lock:
+            if key in self.entries:
+                self.bytes -= self.entries.pop(key)[1]
+            self._keep(key, value, _nbytes(value))
+
+        if self.directory is not None:
+            os.makedirs(self.directory, exist_ok=True)
+            handle, tmp_path = tempfile.mkstemp(
+                dir=self.directory, prefix=f'.{key}.', suffix='.tmp'
+            )
+            try:
+                with os.fdopen(handle, 'wb') as tmp_file:
+                    pickle.dump(value, tmp_file, protocol=pickle.HIGHEST_PROTOCOL)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.remove(tmp_path)
+                raise
+
+    def clear(self, disk: bool = False) -> None:
+        """
+        Empties the in-memory tier, and the on-disk one with disk=True.
+        """
+        with self._lock:
+            self.entries.clear()
+            self.bytes = 0
+        if disk and self.directory is not None and os.path.isdir(self.directory):
+            for name in os.listdir(self.directory):
+                if name.endswith('.pkl'):
+                    os.remove(os.path.join(self.directory, name))
+
+    def stats(self) -> dict:
+        """
+        Hit, disk hit, miss and eviction counters, hit rate and memory use.
+        """
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            'hits': self.hits,
+            'disk_hits': self.disk_hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'hit_rate': (self.hits + self.disk_hits) / lookups
+                if lookups else np.nan,
+            'entries': len(self.entries),
+            'bytes': self.bytes,
+        }
+
+
+def cached_metric(
+        method=None,
+        *,
+        columns: str = 'all',
+        uses_treasury: bool = False
+    ):
+    """
+    Decorator caching a CryptoMetrics method in its MetricsCache, if it has
+    one. The key hashes the method name, its parameters and the df columns
+    the result depends on.
+
+    ---------
+    Parameters
+    ----------
+    - method (callable): Decorated method, when used as @cached_metric.
+    - columns (str): Columns of df the result depends on: 'all' (the
+    calculate_* methods return a copy of the whole frame), or 'coin' for
+    the date, coin and volume columns only.
+    - uses_treasury (bool or callable): Whether the result depends on the
+    treasury rate, which is then hashed into the key. A callable gets the
+    call parameters (without df) and decides per call, so calls that do
+    not need the rate never fetch it.
+    """
+    if method is None:
+        return functools.partial(
+            cached_metric, columns=columns, uses_treasury=uses_treasury
+        )
+
+    signature = inspect.signature(method)
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        if self.cache is None:
+            return method(self, *args, **kwargs)
+
+        bound = signature.bind(self, *args, **kwargs)
+        bound.apply_defaults()
+        params = dict(bound.arguments)
+        del params['self']
+        df = params.pop('df')
+
+        if columns == 'coin':
+            hashed = ['date', params['coin']] + [
+                column for column in ('volume', 'quote_asset_volume')
+                if column in df
+            ]
+        else:
+            hashed = None
+        parts = [
+            method.__qualname__,
+            param_digest(params),
+            frame_digest(df, hashed),
+        ]
+        needs_treasury = (
+            uses_treasury(params) if callable(uses_treasury) else uses_treasury
+        )
+        if needs_treasury:
+            parts.append(frame_digest(self._treasury_data()))
+        key = hashlib.blake2b(
+            '|'.join(parts).encode(), digest_size=16
+        ).hexdigest()
+
+        result = self.cache.get(key)
+        if result is None:
+            result = method(self, *args, **kwargs)
+            self.cache.put(key, result)
+        return result
+
+    return wrapper
@@ -0,0 +1,299 @@
+from concurrent.futures import ProcessPoolExecutor
+from src.get_treasury_rate import get_treasury_rate
+from src.simulations import simulate_signals_batch, roi
+from src.signals import (
+    align_treasury_rate,
+    bollinger_signals,
+    combine_votes,
+    macd_signals,
+    rsi_signals,
+    treasury_corr_signals,
+)
+import pandas as pd
+import numpy as np
+
+METHODS = ('bootstrap', 'gbm')
+
+
+def _block_indexes(
+        rngs: list,
+        n_paths: int,
+        length: int,
+        n_samples: int,
+        block_size: int
+    ) -> np.ndarray:
+    """
+    Indexes of a moving block bootstrap: (n_paths, length) positions in a
+    sample of n_samples, drawn as runs of block_size consecutive positions.
+    The block starts are drawn from a single generator, or from one
+    generator per path.
+    """
+    block_size = min(block_size, n_samples)
+    n_blocks = -(-length // block_size)
+    starts = _draw(
+        rngs, n_paths, lambda rng, rows: rng.integers(
+            0, n_samples - block_size + 1, size=(rows, n_blocks)
+        )
+    )
+    indexes = starts[:, :, None] + np.arange(block_size)
+    return indexes.reshape(n_paths, -1)[:, :length]
+
+
+def _draw(rngs: list, n_paths: int, draw) -> np.ndarray:
+    """
+    Calls draw(rng, rows) once for all the paths with a single generator,
+    or once per path with one generator per path, and stacks the rows.
+    """
+    if len(rngs) == 1:
+        return draw(rngs[0], n_paths)
+    return np.concatenate([draw(rng, 1) for rng in rngs])
+
+
+def generate_paths(
+        log_returns: np.ndarray,
+        rate_changes: np.ndarray,
+        start_price: float,
+        start_rate: float,
+        n_paths: int,
+        n_bars: int,
+        method: str = 'bootstrap',
+        block_size: int = 20,
+        seed=None
+    ) -> tuple:
+    """
+    Generates synthetic price and treasury rate paths.
+
+    With 'bootstrap', the paths are built from blocks of consecutive
+    historical log returns, which keeps their volatility clustering and fat
+    tails. With 'gbm', the log returns are drawn from a normal distribution
+    with the historical mean and standard deviation (geometric Brownian
+    motion). In both cases the rate changes are block bootstrapped, with
+    the same blocks as the returns for 'bootstrap'.
+
+    ---------
+    Parameters
+    ----------
+    - log_returns (np.ndarray): Historical log returns of the coin.
+    - rate_changes (np.ndarray): Historical treasury rate changes aligned to
+    the returns.
+    - start_price (float): Price of the first bar of every path.
+    - start_rate (float): Treasury rate of the first bar of every path.
+    - n_paths (int): Number of paths.
+    - n_bars (int): Number of bars of each path.
+    - method (str): 'bootstrap' or 'gbm'.
+    - block_size (int): Number of consecutive returns per bootstrap block.
+    - seed: Seed or np.random.SeedSequence of the generator, or a list of
+    n_paths of them to draw each path from its own generator.
+    ----------
+    Returns
+    ----------
+    - tuple: (prices, rates) arrays with shape (n_bars, n_paths).
+    """
+    if method not in METHODS:
+        raise ValueError(f"method must be one of {METHODS}, got {method!r}")
+
+    if isinstance(seed, (list, tuple)):
+        if len(seed) != n_paths:
+            raise ValueError(
+                f"Got {len(seed)} seeds for {n_paths} paths"
+            )
+        rngs = [np.random.default_rng(path_seed) for path_seed in seed]
+    else:
+        rngs = [np.random.default_rng(seed)]
+
+    length = n_bars - 1
+    indexes = _block_indexes(
+        rngs, n_paths, length, len(log_returns), block_size
+    )
+    if method == 'bootstrap':
+        steps = log_returns[indexes]
+        rate_steps = rate_changes[indexes]
+    else:
+        mean, std = log_returns.mean(), log_returns.std()
+        steps = _draw(
+            rngs, n_paths,
+            lambda rng, rows: rng.normal(mean, std, size=(rows, length))
+        )
+        rate_steps = rate_changes[indexes]
+
+    prices = np.empty((n_bars, n_paths))
+    prices[0] = np.log(start_price)
+    np.cumsum(steps.T, axis=0, out=prices[1:])
+    prices[1:] += prices[0]
+    np.exp(prices, out=prices)
+
+    rates = np.empty((n_bars, n_paths))
+    rates[0] = start_rate
+    np.cumsum(rate_steps.T, axis=0, out=rates[1:])
+    rates[1:] += start_rate
+    return prices, rates
+
+
+def _simulate_chunk(
+        log_returns: np.ndarray,
+        rate_changes: np.ndarray,
+        start_price: float,
+        start_rate: float,
+        n_paths: int,
+        n_bars: int,
+        method: str,
+        block_size: int,
+        seed,
+        initial_capital: float,
+        trade_value: float,
+        THRESHOLD: float,
+        weights: dict
+    ) -> dict:
+    """
+    Generates a chunk of paths, computes their set_buy signals as one
+    (bars x paths) array and simulates them in one batch.
+    """
+    prices, rates = generate_paths(
+        log_returns, rate_changes, start_price, start_rate,
+        n_paths, n_bars, method, block_size, seed
+    )
+
+    rsi = rsi_signals(prices)
+    treasury_corr = treasury_corr_signals(prices, rates)
+    bb = bollinger_signals(prices)
+    MACD = macd_signals(prices)
+    buy, sell = (
+        combine_votes(
+            rsi[side], treasury_corr[side], bb[side], MACD[side],
+            weights, THRESHOLD
+        )
+        for side in (0, 1)
+    )
+
+    return simulate_signals_batch(
+        prices=prices.T,
+        buy=buy.T,
+        sell=sell.T,
+        initial_capital=initial_capital,
+        trade_value=trade_value
+    )
+
+
+def monte_carlo(
+        df: pd.DataFrame,
+        coin: str,
+        initial_capital: float,
+        trade_value: float,
+        n_paths: int = 10000,
+        n_bars: int = None,
+        method: str = 'bootstrap',
+        block_size: int = 20,
+        THRESHOLD=0.5,
+        weights: dict = None,
+        lookback: int = None,
+        treasury_data: pd.DataFrame = None,
+        seed: int = None,
+        n_jobs: int = 1,
+        chunk_size: int = 1000
+    ) -> pd.DataFrame:
+    """
+    Runs set_buy + simulate_model_trader over synthetic price paths
+    resampled from the historical klines.
+
+    Paths are generated, signalled and simulated in chunks of chunk_size
+    paths, so memory stays bounded by the chunk whatever n_paths is. Each
+    path has its own seed spawned from seed, which makes the results
+    reproducible and independent of n_jobs and chunk_size.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): Output of get_historical_data for the coin.
+    - coin (str): Coin that is being evaluated.
+    - initial_capital (float): Capital available for investment.
+    - trade_value (float): Value traded on each signal.
+    - n_paths (int): Number of synthetic paths.
+    - n_bars (int, optional): Bars per path, defaults to the history length.
+    - method (str): 'bootstrap' (moving block bootstrap) or 'gbm'.
+    - block_size (int): Number of consecutive bars per bootstrap block.
+    - THRESHOLD (float): set_buy threshold.
+    - weights (dict, optional): set_buy weights, defaults to
+    DEFAULT_WEIGHTS.
+    - lookback (int, optional): Lookback used to fetch the treasury rate.
+    - treasury_data (pd.DataFrame, optional): Treasury rate already fetched,
+    skips the call to get_treasury_rate.
+    - seed (int, optional): Seed of the path generator.
+    - n_jobs (int): Number of worker processes.
+    - chunk_size (int): Number of paths processed together.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One row per path with the simulation results and roi.
+    """
+    if treasury_data is None:
+        treasury_data = get_treasury_rate(lookback=lookback)
+
+    prices = df[coin].to_numpy(dtype=np.float64)
+    rates = align_treasury_rate(df['date'], treasury_data)
+    if n_bars is None:
+        n_bars = len(prices)
+
+    log_returns = np.diff(np.log(prices))
+    rate_changes = np.nan_to_num(np.diff(rates))
+    keep = ~np.isnan(log_returns)
+    log_returns = log_returns[keep]
+    rate_changes = rate_changes[keep]
+    if len(log_returns) == 0:
+        raise ValueError("At least two prices are needed to resample paths")
+
+    valid_rates = rates[~np.isnan(rates)]
+    start_rate = valid_rates[-1] if len(valid_rates) else np.nan
+
+    seeds = np.random.SeedSequence(seed).spawn(n_paths)
+    chunks = [
+        (
+            log_returns, rate_changes, prices[-1], start_rate,
+            len(chunk_seeds), n_bars, method, block_size, chunk_seeds,
+            initial_capital, trade_value, THRESHOLD, weights
+        )
+        for chunk_seeds in (
+            seeds[start:start + chunk_size]
+            for start in range(0, n_paths, chunk_size)
+        )
+    ]
+
+    if n_jobs > 1:
+        with ProcessPoolExecutor(max_workers=n_jobs) as pool:
+            outputs = list(pool.map(_simulate_chunk, *zip(*chunks)))
+    else:
+        outputs = [_simulate_chunk(*chunk) for chunk in chunks]
+
+    results = pd.DataFrame({
+        key: np.concatenate([output[key] for output in outputs])
+        for key in outputs[0]
+    })
+    results['roi'] = roi(
+        invested_amount=results['initial_capital'],
+        final_balance=results['final_balance']
+    )
+    return results
+
+
+def summarize_paths(
+        results: pd.DataFrame,
+        percentiles: list = (0.05, 0.25, 0.5, 0.75, 0.95)
+    ) -> pd.DataFrame:
+    """
+    Summarizes the final balance and ROI distributions of monte_carlo.
+
+    ---------
+    Parameters
+    ----------
+    - results (pd.DataFrame): Output of monte_carlo.
+    - percentiles (list): Percentiles to report.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: Mean, standard deviation, percentiles and probability
+    of loss of the final balance and ROI.
+    """
+    summary = results[['final_balance', 'roi']].describe(
+        percentiles=list(percentiles)
+    )
+    summary.loc['prob_loss'] = (results['roi'] < 0).mean()
+    return summary
@@ -0,0 +1,211 @@
+from itertools import product
+from src.get_treasury_rate import get_treasury_rate
+from src.simulations import roi
+from src.sweep_workers import evaluate_configs, map_shared
+from src.signals import (
+    DEFAULT_WEIGHTS,
+    align_treasury_rate,
+    bollinger_signals,
+    macd_signals,
+    rsi_signals,
+    treasury_corr_signals,
+)
+import pandas as pd
+import numpy as np
+
+# Default value of every parameter that can be swept, matching the defaults
+# of CryptoMetrics.set_buy and the calculate_* methods.
+DEFAULT_GRID = {
+    'THRESHOLD': [0.5],
+    'weights': [DEFAULT_WEIGHTS],
+    'trade_value': [10],
+    'rsi_period': [14],
+    'corr_period': [90],
+    'bb_period': [15],
+    'bb_std_factor': [1.5],
+    'macd_short_window': [12],
+    'macd_long_window': [26],
+    'macd_signal_window': [9],
+}
+
+# Parameters each indicator depends on. Configurations sharing the same
+# values reuse the same indicator computation.
+INDICATOR_PARAMS = {
+    'rsi': ('rsi_period',),
+    'treasury_corr': ('corr_period',),
+    'bb': ('bb_period', 'bb_std_factor'),
+    'MACD': ('macd_short_window', 'macd_long_window', 'macd_signal_window'),
+}
+
+
+def expand_grid(grid: dict) -> pd.DataFrame:
+    """
+    Expands a parameter grid into one row per configuration.
+
+    ---------
+    Parameters
+    ----------
+    - grid (dict): Lists of values keyed by parameter name (see
+    DEFAULT_GRID). Missing parameters take their default value. Each
+    weights dict must have a weight for every DEFAULT_WEIGHTS indicator,
+    otherwise a ValueError is raised.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One configuration per row.
+    """
+    unknown = set(grid) - set(DEFAULT_GRID)
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {sorted(unknown)}")
+
+    full_grid = {**DEFAULT_GRID, **grid}
+    for weights in full_grid['weights']:
+        missing = [name for name in DEFAULT_WEIGHTS if name not in weights]
+        if missing:
+            raise ValueError(
+                f"Weights {weights} have no weight for indicators {missing}"
+            )
+
+    names = list(full_grid)
+    configs = pd.DataFrame(
+        list(product(*(full_grid[name] for name in names))),
+        columns=names
+    )
+    for indicator in DEFAULT_WEIGHTS:
+        configs[f'weight_{indicator}'] = [
+            weights[indicator] for weights in configs['weights']
+        ]
+    return configs.drop(columns='weights')
+
+
+def compute_signal_tables(
+        prices: np.ndarray,
+        rates: np.ndarray,
+        configs: pd.DataFrame
+    ) -> tuple:
+    """
+    Computes each distinct indicator parametrisation once.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Coin price for each bar.
+    - rates (np.ndarray): Treasury rate aligned to the bars.
+    - configs (pd.DataFrame): Output of expand_grid.
+    ----------
+    Returns
+    ----------
+    - tuple: (tables, indexes). tables maps '{indicator}_buy' and
+    '{indicator}_sell' to int8 arrays of shape (distinct params, bars);
+    indexes maps each indicator to the table row used by every
+    configuration.
+    """
+    calculators = {
+        'rsi': lambda p: rsi_signals(prices, PERIOD=p[0]),
+        'treasury_corr': lambda p: treasury_corr_signals(
+            prices, rates, PERIOD=p[0]
+        ),
+        'bb': lambda p: bollinger_signals(
+            prices, PERIOD=p[0], STD_FACTOR=p[1]
+        ),
+        'MACD': lambda p: macd_signals(prices, p[0], p[1], p[2]),
+    }
+
+    tables = {}
+    indexes = {}
+    for indicator, params in INDICATOR_PARAMS.items():
+        keys = list(configs[list(params)].itertuples(index=False, name=None))
+        distinct = list(dict.fromkeys(keys))
+        position = {key: i for i, key in enumerate(distinct)}
+
+        signals = [calculators[indicator](key) for key in distinct]
+        tables[f'{indicator}_buy'] = np.stack([buy for buy, _ in signals])
+        tables[f'{indicator}_sell'] = np.stack([sell for _, sell in signals])
+        indexes[indicator] = np.array([position[key] for key in keys])
+    return tables, indexes
+
+
+def sweep_parameters(
+        df: pd.DataFrame,
+        coin: str,
+        grid: dict,
+        initial_capital: float,
+        lookback: int = None,
+        treasury_data: pd.DataFrame = None,
+        n_jobs: int = 1,
+        chunk_size: int = 512
+    ) -> pd.DataFrame:
+    """
+    Runs set_buy + simulate_model_trader for every configuration of a
+    parameter grid and ranks the results.
+
+    Indicators are computed once per distinct parametrisation and every
+    configuration is evaluated as a row of a (configs x bars) array, in
+    blocks of chunk_size configurations. With n_jobs > 1 the blocks are
+    spread across a process pool that reads the prices and indicator
+    tables from shared memory.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): Output of get_historical_data for the coin.
+    - coin (str): Coin that is being evaluated.
+    - grid (dict): Lists of values keyed by parameter name (see
+    DEFAULT_GRID). 'weights' takes a list of weight dicts.
+    - initial_capital (float): Capital available for investment.
+    - lookback (int, optional): Lookback used to fetch the treasury rate.
+    - treasury_data (pd.DataFrame, optional): Treasury rate already fetched,
+    skips the call to get_treasury_rate.
+    - n_jobs (int): Number of worker processes.
+    - chunk_size (int): Number of configurations simulated per block.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One row per configuration with its parameters and
+    simulation results, sorted by final balance.
+    """
+    if treasury_data is None:
+        treasury_data = get_treasury_rate(lookback=lookback)
+
+    df = df.reset_index(drop=True)
+    prices = np.ascontiguousarray(df[coin].to_numpy(dtype=np.float64))
+    rates = align_treasury_rate(df['date'], treasury_data)
+
+    configs = expand_grid(grid)
+    tables, indexes = compute_signal_tables(prices, rates, configs)
+    arrays = {'prices': prices, **tables}
+
+    weights = configs[
+        [f'weight_{indicator}' for indicator in DEFAULT_WEIGHTS]
+    ].to_numpy(dtype=np.float64)
+    thresholds = configs['THRESHOLD'].to_numpy(dtype=np.float64)
+    trade_values = configs['trade_value'].to_numpy(dtype=np.float64)
+
+    blocks = [
+        (
+            {name: index[start:start + chunk_size]
+                for name, index in indexes.items()},
+            weights[start:start + chunk_size],
+            thresholds[start:start + chunk_size],
+            trade_values[start:start + chunk_size],
+            initial_capital,
+        )
+        for start in range(0, len(configs), chunk_size)
+    ]
+
+    if n_jobs > 1:
+        outputs = map_shared(evaluate_configs, arrays, n_jobs, *zip(*blocks))
+    else:
+        outputs = [evaluate_configs(arrays, *block) for block in blocks]
+
+    for key in outputs[0]:
+        configs[key] = np.concatenate([output[key] for output in outputs])
+    configs['roi'] = roi(
+        invested_amount=configs['initial_capital'],
+        final_balance=configs['final_balance']
+    )
+
+    configs = configs.sort_values(
+        by='final_balance', ascending=False, kind='stable'
+    )
+    return configs.reset_index(drop=True)
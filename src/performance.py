@@ -0,0 +1,93 @@
+import numpy as np
+
+
+def performance_metrics(
+        equity: np.ndarray,
+        position: np.ndarray = None,
+        trades: np.ndarray = None,
+        periods_per_year: float = 365,
+        risk_free_rate: float = 0.0
+    ) -> dict:
+    """
+    Computes the standard risk and return metrics of one or many equity
+    curves, in one vectorized pass over the bars.
+
+    ---------
+    Parameters
+    ----------
+    - equity (np.ndarray): Equity per bar, e.g. the "equity_curve" returned
+    by the simulators with return_equity=True. Shape (bars,) or
+    (strategies, bars).
+    - position (np.ndarray, optional): Coin holdings per bar with the shape
+    of equity ("position_curve"), used for the exposure.
+    - trades (np.ndarray, optional): Trade log of a single strategy
+    ("trades", see simulations.TRADE_DTYPE), used for the trade counts and
+    turnover.
+    - periods_per_year (float): Bars per year, e.g. 365 for daily klines or
+    365*24 for hourly ones.
+    - risk_free_rate (float): Annual risk free rate, as a fraction.
+    ----------
+    Returns
+    ----------
+    - dict: total_return, cagr, volatility, sharpe, sortino, max_drawdown,
+    max_drawdown_duration (bars), calmar and, when position/trades are
+    given, exposure, n_trades, n_buys, n_sells and turnover. Each metric is
+    a float, or an array with one value per strategy.
+    """
+    equity = np.asarray(equity, dtype=np.float64)
+    n_bars = equity.shape[-1]
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        returns = np.diff(equity, axis=-1) / equity[..., :-1]
+        excess = returns - risk_free_rate / periods_per_year
+
+        mean = excess.mean(axis=-1)
+        volatility = returns.std(axis=-1, ddof=1)
+        downside = np.sqrt(
+            (np.minimum(excess, 0) ** 2).mean(axis=-1)
+        )
+        sharpe = mean / volatility * np.sqrt(periods_per_year)
+        sortino = mean / downside * np.sqrt(periods_per_year)
+
+        total_return = equity[..., -1] / equity[..., 0] - 1
+        years = (n_bars - 1) / periods_per_year
+        cagr = (1 + total_return) ** (1 / years) - 1
+
+        peak = np.maximum.accumulate(equity, axis=-1)
+        drawdown = equity / peak - 1
+        max_drawdown = drawdown.min(axis=-1)
+        calmar = cagr / -max_drawdown
+
+    # Longest run of bars below the running peak
+    underwater = drawdown < 0
+    bars = np.arange(n_bars)
+    last_peak = np.maximum.accumulate(np.where(underwater, 0, bars), axis=-1)
+    max_drawdown_duration = np.where(underwater, bars - last_peak, 0).max(
+        axis=-1
+    )
+
+    metrics = {
+        'total_return': total_return,
+        'cagr': cagr,
+        'volatility': volatility * np.sqrt(periods_per_year),
+        'sharpe': sharpe,
+        'sortino': sortino,
+        'max_drawdown': max_drawdown,
+        'max_drawdown_duration': max_drawdown_duration,
+        'calmar': calmar,
+    }
+
+    if position is not None:
+        metrics['exposure'] = (np.asarray(position) > 0).mean(axis=-1)
+
+    if trades is not None:
+        metrics['n_trades'] = len(trades)
+        metrics['n_buys'] = int((trades['side'] == 1).sum())
+        metrics['n_sells'] = int((trades['side'] == -1).sum())
+        # Traded value relative to the average equity
+        metrics['turnover'] = trades['value'].sum() / equity.mean(axis=-1)
+
+    return {
+        name: np.asarray(value).item() if np.ndim(value) == 0 else value
+        for name, value in metrics.items()
+    }
@@ -0,0 +1,307 @@
+from src.profiling import profiled
+from src.simulations import TRADE_DTYPE, _check_volume
+import pandas as pd
+import numpy as np
+
+# Trade log of the portfolio simulator: TRADE_DTYPE plus the column index
+# of the traded symbol.
+PORTFOLIO_TRADE_DTYPE = np.dtype(
+    [('symbol', np.int64)] + [
+        (name, TRADE_DTYPE.fields[name][0]) for name in TRADE_DTYPE.names
+    ]
+)
+
+
+def panel_matrices(df: pd.DataFrame) -> tuple:
+    """
+    Turns the long output of set_buy_panel into (bars x symbols) matrices.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): DataFrame with date, coin, price, buy and sell
+    columns.
+    ----------
+    Returns
+    ----------
+    - tuple: (dates, coins, prices, buy, sell). Prices are NaN and signals
+    0 where a coin has no row for a date.
+    """
+    bars, dates = pd.factorize(df['date'], sort=True)
+    columns, coins = pd.factorize(df['coin'], sort=True)
+    shape = (len(dates), len(coins))
+
+    prices = np.full(shape, np.nan)
+    buy = np.zeros(shape, dtype=np.int8)
+    sell = np.zeros(shape, dtype=np.int8)
+    prices[bars, columns] = df['price'].to_numpy(dtype=np.float64)
+    buy[bars, columns] = df['buy'].to_numpy()
+    sell[bars, columns] = df['sell'].to_numpy()
+    return pd.Index(dates, name='date'), list(coins), prices, buy, sell
+
+
+def _events_by_bar(signal: np.ndarray, n_bars: int) -> tuple:
+    """
+    Symbol indexes of the signals of each bar, as one flat array and the
+    offsets of each bar in it.
+    """
+    bars, symbols = np.nonzero(signal)
+    offsets = np.searchsorted(bars, np.arange(n_bars + 1))
+    return symbols, offsets.tolist()
+
+
+def _log(trades, bar, side, symbols, fill_prices, quantity, values, fees):
+    """
+    Appends the non empty fills of one bar and side to the trade log.
+    """
+    traded = quantity > 0
+    records = np.empty(traded.sum(), dtype=PORTFOLIO_TRADE_DTYPE)
+    records['symbol'] = symbols[traded]
+    records['bar'] = bar
+    records['side'] = side
+    records['price'] = fill_prices[traded]
+    records['quantity'] = quantity[traded]
+    records['value'] = values[traded]
+    records['fee'] = fees[traded]
+    trades.append(records)
+
+
+@profiled
+def simulate_portfolio(
+        prices: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        initial_capital: float,
+        trade_value: float,
+        max_weight: float = None,
+        rebalance_every: int = None,
+        execution = None,
+        quote_volume: np.ndarray = None,
+        return_positions: bool = False,
+        return_trades: bool = False
+    ) -> dict:
+    """
+    Simulates one capital pool trading many symbols on set_buy signals.
+
+    Each bar is processed in order, with array operations over its
+    symbols. On a sell signal, trade_value worth of the symbol holdings is
+    sold, as in simulate_model_trader. The buy signals of a bar then ask
+    for trade_value each, reduced so that no position exceeds max_weight of
+    the portfolio equity; when the orders cost more than the cash, they
+    are all scaled down by the same factor. As in simulate_model_trader,
+    once a bar with buy signals finds less cash than trade_value, the cash
+    left becomes the trade_value of every later sell and buy. Every
+    rebalance_every bars, the value held in coins is spread equally over
+    the held symbols, within max_weight. Symbols without a price on a bar
+    are not traded and are valued at their last price. With one symbol and
+    no rebalancing, the results are those of simulate_model_trader.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): (bars x symbols) prices, NaN where a symbol has
+    no price.
+    - buy (np.ndarray): (bars x symbols) buy signals (1 means buy).
+    - sell (np.ndarray): (bars x symbols) sell signals (1 means sell).
+    - initial_capital (float): Capital shared by all the symbols.
+    - trade_value (float): Value traded on each signal.
+    - max_weight (float, optional): Largest share of the equity a single
+    position can reach through buys and rebalancing.
+    - rebalance_every (int, optional): Number of bars between rebalances.
+    - execution (ExecutionModel, optional): Fees, slippage and partial
+    fills. Trades fill at the bar price without fees when None.
+    - quote_volume (np.ndarray, optional): (bars x symbols) quote volumes,
+    needed by execution models with impact or max_participation.
+    - return_positions (bool): Whether to add the (bars x symbols)
+    "position_curve" of coin holdings.
+    - return_trades (bool): Whether to add the "trades" log, see
+    PORTFOLIO_TRADE_DTYPE.
+    ----------
+    Returns
+    ----------
+    - dict: initial_capital, final_balance, cash, total_invested,
+    total_fees, coin_holdings and coin_holdings_dollars (one value per
+    symbol), equity_curve and cash_curve, plus the requested extras.
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    n_bars, n_symbols = prices.shape
+    valid = ~np.isnan(prices)
+
+    fee_rate = 0.0
+    capacity = None
+    if execution is not None:
+        quote_volume = _check_volume(execution, quote_volume, n_bars)
+        fee_rate = execution.fee_rate
+        if execution.needs_volume:
+            capacity = execution.capacity(quote_volume, n_bars)
+
+    sell_symbols, sell_offsets = _events_by_bar((sell == 1) & valid, n_bars)
+    buy_symbols, buy_offsets = _events_by_bar((buy == 1) & valid, n_bars)
+    rebalance_bars = set(
+        range(rebalance_every, n_bars, rebalance_every)
+        if rebalance_every else ()
+    )
+
+    cash = float(initial_capital)
+    total_invested = 0.0
+    total_fees = 0.0
+    holdings = np.zeros(n_symbols)
+    last_prices = np.zeros(n_symbols)
+    equity_curve = np.empty(n_bars)
+    cash_curve = np.empty(n_bars)
+    positions = np.empty((n_bars, n_symbols)) if return_positions else None
+    trades = []
+
+    def fill(side, symbols, values, bar):
+        if execution is None:
+            return last_prices[symbols]
+        volumes = None if quote_volume is None else quote_volume[bar, symbols]
+        return execution.fill_price(side, last_prices[symbols], values, volumes)
+
+    def liquid(symbols, values, bar):
+        # Symbols without volume on the bar cannot fill and are left out
+        if capacity is None:
+            return symbols, values
+        bar_capacity = capacity[bar, symbols]
+        keep = bar_capacity > 0
+        return symbols[keep], np.minimum(values[keep], bar_capacity[keep])
+
+    def sell_value(symbols, values, bar):
+        nonlocal cash, total_fees
+        symbols, values = liquid(symbols, values, bar)
+        if not len(symbols):
+            return
+        quantity = np.minimum(values / last_prices[symbols], holdings[symbols])
+        fill_prices = fill(-1, symbols, quantity * last_prices[symbols], bar)
+        proceeds = quantity * fill_prices
+        fees = proceeds * fee_rate
+        holdings[symbols] -= quantity
+        cash += proceeds.sum() - fees.sum()
+        total_fees += fees.sum()
+        if return_trades:
+            _log(trades, bar, -1, symbols, fill_prices, quantity, proceeds, fees)
+
+    def buy_value(symbols, values, bar):
+        nonlocal cash, total_invested, total_fees
+        symbols, values = liquid(symbols, values, bar)
+        if not len(symbols):
+            return
+        total = values.sum()
+        spent_all = total > cash
+        if spent_all:
+            # Shared cash is split pro rata between the orders
+            values = values * (cash / total) if cash > 0 else values * 0
+            total = cash
+        fill_prices = fill(1, symbols, values, bar)
+        fees = values * fee_rate
+        quantity = (values - fees) / fill_prices
+        holdings[symbols] += quantity
+        cash = 0.0 if spent_all else cash - total
+        total_invested += total
+        total_fees += fees.sum()
+        if return_trades:
+            _log(trades, bar, 1, symbols, fill_prices, quantity, values, fees)
+
+    for bar in range(n_bars):
+        np.copyto(last_prices, prices[bar], where=valid[bar])
+
+        start, end = sell_offsets[bar], sell_offsets[bar + 1]
+        if start < end:
+            symbols = sell_symbols[start:end]
+            symbols = symbols[holdings[symbols] > 0]
+            if len(symbols):
+                sell_value(symbols, np.full(len(symbols), trade_value), bar)
+
+        if bar in rebalance_bars:
+            values = holdings * last_prices
+            held = np.flatnonzero((values > 0) & valid[bar])
+            if len(held):
+                equity = cash + values.sum()
+                target = values[held].sum() / len(held)
+                if max_weight is not None:
+                    target = min(target, max_weight * equity)
+                change = target - values[held]
+                over = change < 0
+                if over.any():
+                    sell_value(held[over], -change[over], bar)
+                if (~over).any():
+                    buy_value(held[~over], change[~over], bar)
+
+        start, end = buy_offsets[bar], buy_offsets[bar + 1]
+        if start < end and cash > 0:
+            if cash < trade_value:
+                # Later orders are capped by the cash left, as in
+                # simulate_model_trader
+                trade_value = cash
+            symbols = buy_symbols[start:end]
+            values = np.full(len(symbols), float(trade_value))
+            if max_weight is not None:
+                equity = cash + holdings @ last_prices
+                room = max_weight * equity - holdings[symbols] * last_prices[symbols]
+                values = np.clip(room, 0, values)
+            if values.any():
+                buy_value(symbols, values, bar)
+
+        cash_curve[bar] = cash
+        equity_curve[bar] = cash + holdings @ last_prices
+        if return_positions:
+            positions[bar] = holdings
+
+    output = {
+        "initial_capital": initial_capital,
+        "final_balance": equity_curve[-1] if n_bars else cash,
+        "cash": cash,
+        "total_invested": total_invested,
+        "total_fees": total_fees,
+        "coin_holdings": holdings,
+        "coin_holdings_dollars": holdings * last_prices,
+        "equity_curve": equity_curve,
+        "cash_curve": cash_curve,
+    }
+    if return_positions:
+        output["position_curve"] = positions
+    if return_trades:
+        output["trades"] = (
+            np.concatenate(trades) if trades
+            else np.empty(0, dtype=PORTFOLIO_TRADE_DTYPE)
+        )
+    return output
+
+
+def simulate_portfolio_panel(
+        df: pd.DataFrame,
+        initial_capital: float,
+        trade_value: float,
+        **kwargs
+    ) -> dict:
+    """
+    Runs simulate_portfolio on the output of set_buy_panel.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): DataFrame with date, coin, price, buy and sell
+    columns.
+    - initial_capital (float): Capital shared by all the coins.
+    - trade_value (float): Value traded on each signal.
+    - **kwargs: Other simulate_portfolio parameters.
+    ----------
+    Returns
+    ----------
+    - dict: Output of simulate_portfolio, with the per coin holdings as
+    Series indexed by coin and the curves indexed by date.
+    """
+    dates, coins, prices, buy, sell = panel_matrices(df)
+    output = simulate_portfolio(
+        prices, buy, sell, initial_capital, trade_value, **kwargs
+    )
+    for key in ("coin_holdings", "coin_holdings_dollars"):
+        output[key] = pd.Series(output[key], index=coins)
+    for key in ("equity_curve", "cash_curve"):
+        output[key] = pd.Series(output[key], index=dates)
+    if "position_curve" in output:
+        output["position_curve"] = pd.DataFrame(
+            output["position_curve"], index=dates, columns=coins
+        )
+    output["coins"] = coins
+    return output
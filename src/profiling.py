@@ -0,0 +1,304 @@
+from contextlib import contextmanager
+import pandas as pd
+import numpy as np
+import tracemalloc
+import functools
+import threading
+import json
+import time
+import os
+
+
+class Span:
+    """
+    Timing of one profiled call. rows and attributes can be set from
+    inside the span.
+    """
+
+    __slots__ = (
+        'name', 'start', 'end', 'thread', 'rows', 'attributes',
+        'start_bytes', 'allocated_bytes', 'peak_bytes', '_peak',
+    )
+
+    def __init__(self, name: str, attributes: dict) -> None:
+        self.name = name
+        self.attributes = attributes
+        self.rows = None
+        self.thread = threading.get_ident()
+        self.start_bytes = None
+        self.allocated_bytes = None
+        self.peak_bytes = None
+        self._peak = 0
+        self.end = None
+        self.start = time.perf_counter_ns()
+
+    @property
+    def duration(self) -> float:
+        return (self.end - self.start) / 1e9
+
+    def to_dict(self) -> dict:
+        return {
+            'name': self.name,
+            'start': self.start / 1e9,
+            'duration': self.duration,
+            'thread': self.thread,
+            'rows': self.rows,
+            'allocated_bytes': self.allocated_bytes,
+            'peak_bytes': self.peak_bytes,
+            **self.attributes,
+        }
+
+
+class _NullSpan:
+    """
+    Span handed out while the profiler is disabled. Setting its fields does
+    nothing.
+    """
+
+    __slots__ = ()
+
+    def __setattr__(self, name, value) -> None:
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Profiler:
+    """
+    Records spans (name, duration, row count and, optionally, memory
+    allocated) of the data -> signal -> simulation pipeline.
+
+    Disabled by default: a profiled call then costs one attribute check.
+    When memory tracking is on, tracemalloc measures the bytes allocated by
+    each span (net of what it freed) and its peak. tracemalloc is process
+    wide, so the memory of spans running concurrently on several threads
+    overlaps.
+    """
+
+    def __init__(self) -> None:
+        self.enabled = False
+        self.memory = False
+        self.spans = []
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._started_tracemalloc = False
+
+    def enable(self, memory: bool = False) -> None:
+        """
+        Starts recording spans, and their memory with memory=True.
+        """
+        self.memory = memory
+        if memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+        self.enabled = True
+
+    def disable(self) -> None:
+        """
+        Stops recording spans. The recorded ones are kept.
+        """
+        self.enabled = False
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+        self.memory = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans = []
+
+    @contextmanager
+    def recording(self, memory: bool = False):
+        """
+        Records the spans of a block of code.
+
+        ---------
+        Parameters
+        ----------
+        - memory (bool): Whether to track the memory of each span.
+        ----------
+        Returns
+        ----------
+        - Profiler: The profiler, to export the spans afterwards.
+        """
+        self.enable(memory)
+        try:
+            yield self
+        finally:
+            self.disable()
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, 'stack', None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """
+        Times a block of code.
+
+        ---------
+        Parameters
+        ----------
+        - name (str): Name of the span.
+        - **attributes: Extra fields recorded with the span, e.g. coin.
+        ----------
+        Returns
+        ----------
+        - Span: Recorded span, whose rows can be set inside the block.
+        """
+        if not self.enabled:
+            yield _NULL_SPAN
+            return
+
+        span = Span(name, attributes)
+        stack = self._stack()
+        memory = self.memory and tracemalloc.is_tracing()
+        if memory:
+            current, peak = tracemalloc.get_traced_memory()
+            # The peak is reset for this span, the parent keeps its own
+            if stack:
+                stack[-1]._peak = max(stack[-1]._peak, peak)
+            tracemalloc.reset_peak()
+            span.start_bytes = current
+            span._peak = current
+        stack.append(span)
+        try:
+            yield span
+        finally:
+            stack.pop()
+            if memory:
+                current, peak = tracemalloc.get_traced_memory()
+                peak = max(span._peak, peak)
+                span.allocated_bytes = current - span.start_bytes
+                span.peak_bytes = peak - span.start_bytes
+                if stack:
+                    stack[-1]._peak = max(stack[-1]._peak, peak)
+            span.end = time.perf_counter_ns()
+            with self._lock:
+                self.spans.append(span)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Recorded spans, one row each, in start order.
+        """
+        frame = pd.DataFrame([span.to_dict() for span in self.spans])
+        if frame.empty:
+            return frame
+        return frame.sort_values('start', ignore_index=True)
+
+    def summary(self) -> pd.DataFrame:
+        """
+        Count, total, mean and max duration (seconds), rows and peak memory
+        of the spans, by name, slowest first.
+        """
+        frame = self.to_frame()
+        if frame.empty:
+            return frame
+        summary = frame.groupby('name').agg(
+            count=('duration', 'size'),
+            total=('duration', 'sum'),
+            mean=('duration', 'mean'),
+            max=('duration', 'max'),
+            rows=('rows', 'sum'),
+            peak_bytes=('peak_bytes', 'max'),
+        )
+        return summary.sort_values('total', ascending=False)
+
+    def write_log(self, path: str) -> None:
+        """
+        Writes the spans as a JSON lines log, one span per line.
+        """
+        with open(path, 'w') as file:
+            for span in sorted(self.spans, key=lambda span: span.start):
+                file.write(json.dumps(span.to_dict(), default=str) + '\n')
+
+    def write_chrome_trace(self, path: str) -> None:
+        """
+        Writes the spans in the Chrome trace event format, to open in
+        chrome://tracing or Perfetto.
+        """
+        pid = os.getpid()
+        events = []
+        for span in self.spans:
+            args = {
+                key: value for key, value in span.to_dict().items()
+                if key not in ('name', 'start', 'duration', 'thread')
+                and value is not None
+            }
+            events.append({
+                'name': span.name,
+                'cat': span.name.split('.')[0],
+                'ph': 'X',
+                'ts': span.start / 1e3,
+                'dur': (span.end - span.start) / 1e3,
+                'pid': pid,
+                'tid': span.thread,
+                'args': args,
+            })
+        with open(path, 'w') as file:
+            json.dump(
+                {'traceEvents': events, 'displayTimeUnit': 'ms'},
+                file,
+                default=str
+            )
+
+
+# Shared by every instrumented function of the process
+profiler = Profiler()
+
+
+def span(name: str, **attributes):
+    """
+    Times a block of code with the shared profiler, see Profiler.span.
+    """
+    return profiler.span(name, **attributes)
+
+
+def _count_rows(value) -> int:
+    if isinstance(value, (pd.DataFrame, pd.Series, np.ndarray)):
+        return len(value)
+    return None
+
+
+def profiled(function=None, *, name: str = None):
+    """
+    Decorator recording each call of a function as a span of the shared
+    profiler. The span rows are the length of the returned frame or array,
+    or else of the first frame argument.
+
+    ---------
+    Parameters
+    ----------
+    - function (callable): Decorated function, when used as @profiled.
+    - name (str, optional): Span name, defaults to the module and
+    qualified name of the function.
+    """
+    if function is None:
+        return functools.partial(profiled, name=name)
+
+    span_name = name or (
+        f"{function.__module__.rsplit('.', 1)[-1]}.{function.__qualname__}"
+    )
+
+    @functools.wraps(function)
+    def wrapper(*args, **kwargs):
+        if not profiler.enabled:
+            return function(*args, **kwargs)
+        with profiler.span(span_name) as record:
+            result = function(*args, **kwargs)
+            rows = _count_rows(result)
+            if rows is None:
+                rows = next(
+                    (
+                        len(arg) for arg in (*args, *kwargs.values())
+                        if isinstance(arg, pd.DataFrame)
+                    ),
+                    None
+                )
+            record.rows = rows
+        return result
+
+    return wrapper
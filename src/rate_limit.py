@@ -0,0 +1,57 @@
+import threading
+import time
+
+# Binance spot REQUEST_WEIGHT limit per minute and weight of a klines call.
+BINANCE_WEIGHT_PER_MINUTE = 6000
+KLINES_WEIGHT = 2
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket used to keep concurrent requests under the
+    exchange request-weight limit.
+
+    ---------
+    Parameters
+    ----------
+    - capacity (float): Maximum number of tokens (weight) available at once.
+    - refill_per_second (float): Tokens added back every second.
+    """
+
+    def __init__(self, capacity: float, refill_per_second: float) -> None:
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, weight: float = 1) -> None:
+        """
+        Blocks until weight tokens are available and consumes them.
+        """
+        if weight > self.capacity:
+            raise ValueError(
+                f"Weight {weight} exceeds the bucket capacity {self.capacity}"
+            )
+
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(
+                    self.capacity,
+                    self._tokens + (now - self._updated) * self.refill_per_second
+                )
+                self._updated = now
+
+                if self._tokens >= weight:
+                    self._tokens -= weight
+                    return
+                wait = (weight - self._tokens) / self.refill_per_second
+            time.sleep(wait)
+
+
+# Shared by every fetch in the process, as the limit applies per IP.
+binance_weight_limiter = TokenBucket(
+    capacity=BINANCE_WEIGHT_PER_MINUTE,
+    refill_per_second=BINANCE_WEIGHT_PER_MINUTE / 60
+)
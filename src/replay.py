@@ -0,0 +1,167 @@
+from src.get_treasury_rate import get_treasury_rate
+from src.signal_service import ReplaySource, SignalService
+import pandas as pd
+import numpy as np
+import asyncio
+import time
+
+
+async def replay_async(
+        source: ReplaySource,
+        metrics=None,
+        treasury_data: pd.DataFrame = None,
+        queue_size: int = 10000,
+        THRESHOLD=0.5,
+        weights: dict = None
+    ) -> tuple:
+    """
+    Drives stored candles through the live pipeline (SignalService and
+    StreamingCryptoMetrics) and measures its throughput. Awaitable from a
+    running event loop, e.g. in Jupyter.
+
+    ---------
+    Parameters
+    ----------
+    - source (ReplaySource): Candles to replay, e.g. ReplaySource(df) for a
+    get_historical_data(_many) frame or ReplaySource.from_cache(cache,
+    symbols, interval). Its speed sets how fast they are emitted.
+    - metrics (CryptoMetrics, optional): Its lookback and treasury provider
+    are used to fetch the treasury rate, like set_buy does.
+    - treasury_data (pd.DataFrame, optional): Treasury rate already fetched,
+    takes precedence over metrics.
+    - queue_size (int): Queue size of the SignalService.
+    - THRESHOLD (float): set_buy threshold.
+    - weights (dict, optional): set_buy weights, defaults to
+    DEFAULT_WEIGHTS.
+    ----------
+    Returns
+    ----------
+    - tuple: (signals, stats). signals is a long DataFrame with date, coin,
+    price, buy and sell columns, like set_buy_panel. stats holds the
+    number of candles, the wall time in seconds, the candles/sec
+    throughput and the p99 and max latency (ms) over all symbols.
+    """
+    if treasury_data is None and metrics is not None:
+        # The fetch is blocking, it must not stall the running loop
+        treasury_data = await asyncio.to_thread(
+            get_treasury_rate,
+            lookback=metrics.lookback,
+            provider=metrics.treasury_provider
+        )
+
+    rows = []
+
+    def publish(signals):
+        symbol = signals['symbol']
+        rows.append((
+            signals['date'], symbol, signals[symbol],
+            signals['buy'], signals['sell']
+        ))
+
+    service = SignalService(
+        publish=publish,
+        treasury_data=treasury_data,
+        queue_size=queue_size,
+        THRESHOLD=THRESHOLD,
+        weights=weights
+    )
+    start = time.perf_counter()
+    await service.run(source)
+    seconds = time.perf_counter() - start
+
+    signals = pd.DataFrame(
+        rows, columns=['date', 'coin', 'price', 'buy', 'sell']
+    )
+    latency = service.latency_report()
+    stats = {
+        'candles': len(signals),
+        'seconds': seconds,
+        'candles_per_sec': len(signals) / seconds if seconds else np.nan,
+        'latency_p99_ms': float(latency['latency_p99_ms'].max())
+            if len(latency) else np.nan,
+        'latency_max_ms': float(latency['latency_max_ms'].max())
+            if len(latency) else np.nan,
+    }
+    return signals, stats
+
+
+def replay(
+        source: ReplaySource,
+        metrics=None,
+        treasury_data: pd.DataFrame = None,
+        queue_size: int = 10000,
+        THRESHOLD=0.5,
+        weights: dict = None
+    ) -> tuple:
+    """
+    Runs replay_async in a new event loop, see replay_async for the
+    parameters and results. Cannot be called from a running event loop,
+    await replay_async there instead.
+    """
+    return asyncio.run(replay_async(
+        source, metrics, treasury_data, queue_size, THRESHOLD, weights
+    ))
+
+
+def diff_replay(
+        signals: pd.DataFrame,
+        source: ReplaySource,
+        metrics,
+        THRESHOLD=0.5,
+        weights: dict = None
+    ) -> pd.DataFrame:
+    """
+    Compares the decisions of a replay with the batch set_buy results of
+    the same candles.
+
+    set_buy runs on each symbol's candles with a price, which are exactly
+    the candles the replay emits.
+
+    ---------
+    Parameters
+    ----------
+    - signals (pd.DataFrame): Signals returned by replay.
+    - source (ReplaySource): Source that was replayed.
+    - metrics (CryptoMetrics): Instance whose set_buy is the reference.
+    - THRESHOLD (float): set_buy threshold used by the replay.
+    - weights (dict, optional): set_buy weights used by the replay.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One row per candle whose buy or sell decision differs,
+    or that only one side produced, with the date, coin and the replay and
+    batch decisions. Empty when both agree.
+    """
+    batch = []
+    for symbol in source.symbols:
+        df = source.df[['date', symbol]].dropna().reset_index(drop=True)
+        if df.empty:
+            continue
+        df_buy = metrics.set_buy(df, symbol, THRESHOLD, weights)
+        batch.append(pd.DataFrame({
+            'date': df_buy['date'].to_numpy(),
+            'coin': symbol,
+            'buy': df_buy[f'buy_{symbol}'].to_numpy(),
+            'sell': df_buy[f'sell_{symbol}'].to_numpy(),
+        }))
+    batch = pd.concat(batch, ignore_index=True) if batch else pd.DataFrame(
+        columns=['date', 'coin', 'buy', 'sell']
+    )
+
+    replayed = signals[['date', 'coin', 'buy', 'sell']].astype({'coin': str})
+    batch['date'] = pd.to_datetime(batch['date']).astype(
+        replayed['date'].dtype
+    )
+    merged = replayed.merge(
+        batch,
+        on=['date', 'coin'],
+        how='outer',
+        suffixes=('_replay', '_batch'),
+        indicator=True
+    )
+    differs = (
+        (merged['_merge'] != 'both') |
+        (merged['buy_replay'] != merged['buy_batch']) |
+        (merged['sell_replay'] != merged['sell_batch'])
+    )
+    return merged[differs].drop(columns='_merge').reset_index(drop=True)
@@ -0,0 +1,273 @@
+from src.get_historical_data import INTERVAL_UNITS_MS, interval_to_ms
+from src.kline_block import KlineBlock
+import pandas as pd
+import numpy as np
+
+# Timeframes derived by default from a base interval
+TIMEFRAMES = ('1h', '4h', '1d', '1w')
+
+# Epoch offset of the weekly periods: Binance weekly klines, like pandas'
+# 'W' periods, start on Monday while 1970-01-01 was a Thursday
+WEEK_OFFSET_MS = 4 * INTERVAL_UNITS_MS['d']
+
+# How each kline column is aggregated into a higher timeframe
+AGGREGATIONS = {
+    'open': 'first',
+    'high': 'max',
+    'low': 'min',
+    'close': 'last',
+    'volume': 'sum',
+    'quote_asset_volume': 'sum',
+    'number_of_trades': 'sum',
+    'taker_buy_base_asset_volume': 'sum',
+    'taker_buy_quote_asset_volume': 'sum',
+}
+
+
+def period_starts(open_times: np.ndarray, timeframe: str) -> np.ndarray:
+    """
+    Open time (ms) of the timeframe candle each base candle belongs to,
+    aligned like Binance klines (UTC, weeks starting on Monday).
+    """
+    length = interval_to_ms(timeframe)
+    offset = WEEK_OFFSET_MS if timeframe.endswith('w') else 0
+    open_times = np.asarray(open_times, dtype=np.int64)
+    return (open_times - offset) // length * length + offset
+
+
+def _as_milliseconds(values) -> np.ndarray:
+    values = np.asarray(values)
+    if np.issubdtype(values.dtype, np.datetime64):
+        return values.astype('datetime64[ms]').astype(np.int64)
+    return values.astype(np.int64)
+
+
+def base_interval(open_times: np.ndarray) -> int:
+    """
+    Base interval (ms) of sorted klines: the smallest positive step between
+    open times, so missing candles do not widen it. None with fewer than
+    two distinct open times.
+    """
+    steps = np.diff(np.asarray(open_times, dtype=np.int64))
+    steps = steps[steps > 0]
+    return int(steps.min()) if len(steps) else None
+
+
+def check_timeframe(timeframe: str, interval_ms: int) -> None:
+    """
+    Raises a ValueError when timeframe is not a multiple of the base
+    interval, e.g. 1w from 3d klines, whose periods would mix candles
+    of two timeframe periods.
+    """
+    if interval_ms and interval_to_ms(timeframe) % interval_ms:
+        raise ValueError(
+            f"Timeframe {timeframe} is not a multiple of the base interval "
+            f"of the klines ({interval_ms} ms)"
+        )
+
+
+def _reduce(values: np.ndarray, how: str, bounds: np.ndarray) -> np.ndarray:
+    """
+    Aggregates the runs of values starting at bounds, in one pass.
+    """
+    if how == 'first':
+        return values[bounds]
+    if how == 'last':
+        return values[np.append(bounds[1:], len(values)) - 1]
+    if how == 'max':
+        return np.fmax.reduceat(values, bounds)
+    if how == 'min':
+        return np.fmin.reduceat(values, bounds)
+    return np.add.reduceat(values, bounds)
+
+
+def resample_klines(
+        klines,
+        timeframe: str,
+        interval_ms: int = None
+    ) -> KlineBlock:
+    """
+    Aggregates base klines into a higher timeframe.
+
+    ---------
+    Parameters
+    ----------
+    - klines (KlineBlock or pd.DataFrame): Base klines sorted by open time,
+    with an 'open_time' column and any of the AGGREGATIONS columns.
+    - timeframe (str): Binance interval to build, e.g. 4h or 1w. It must be
+    a multiple of the base interval, otherwise a ValueError is raised.
+    - interval_ms (int, optional): Base interval of klines in milliseconds.
+    Inferred with base_interval when None, 0 skips the check.
+    ----------
+    Returns
+    ----------
+    - KlineBlock: One candle per period with at least one base candle:
+    open_time, close_time and the aggregated columns of klines. The last
+    candle is partial when the base klines stop inside its period.
+    """
+    open_times = _as_milliseconds(klines['open_time'])
+    if interval_ms is None:
+        interval_ms = base_interval(open_times)
+    check_timeframe(timeframe, interval_ms)
+    starts = period_starts(open_times, timeframe)
+    if len(starts) == 0:
+        bounds = np.empty(0, dtype=np.int64)
+    else:
+        bounds = np.flatnonzero(np.diff(starts, prepend=starts[0] - 1))
+
+    arrays = {'open_time': starts[bounds]}
+    for column, how in AGGREGATIONS.items():
+        if column in klines and len(bounds):
+            arrays[column] = _reduce(np.asarray(klines[column]), how, bounds)
+        elif column in klines:
+            arrays[column] = np.asarray(klines[column])[:0]
+    arrays['close_time'] = arrays['open_time'] + interval_to_ms(timeframe) - 1
+    return KlineBlock(arrays)
+
+
+def broadcast_extremes(
+        values: np.ndarray,
+        periods: np.ndarray
+    ) -> tuple:
+    """
+    High and low of each period, repeated on every row of the period.
+
+    Rows are grouped by their period key in one pass when the keys are
+    sorted (one stable sort otherwise), the extremes are reduced per run
+    and written back through the run index of each row, without any merge.
+    NaNs are skipped like pandas' groupby max/min.
+
+    ---------
+    Parameters
+    ----------
+    - values (np.ndarray): Values with shape (rows,) or (rows, columns).
+    - periods (np.ndarray): Period key of each row, e.g. period_starts.
+    ----------
+    Returns
+    ----------
+    - tuple: (highs, lows) arrays with the shape of values.
+    """
+    periods = np.asarray(periods)
+    values = np.asarray(values)
+    if len(periods) == 0:
+        return values.copy(), values.copy()
+
+    order = None
+    if not (periods[1:] >= periods[:-1]).all():
+        order = np.argsort(periods, kind='stable')
+        periods = periods[order]
+        values = values[order]
+
+    changes = np.empty(len(periods), dtype=bool)
+    changes[0] = True
+    np.not_equal(periods[1:], periods[:-1], out=changes[1:])
+    bounds = np.flatnonzero(changes)
+    runs = np.cumsum(changes) - 1
+
+    highs = np.fmax.reduceat(values, bounds, axis=0)[runs]
+    lows = np.fmin.reduceat(values, bounds, axis=0)[runs]
+    if order is not None:
+        inverse = np.empty_like(order)
+        inverse[order] = np.arange(len(order))
+        highs, lows = highs[inverse], lows[inverse]
+    return highs, lows
+
+
+class Resampler:
+    """
+    Incremental multi-timeframe klines built from a single base interval.
+
+    Each update aggregates the new base candles into every timeframe with
+    resample_klines, folding them into the open (partial) candle of each
+    timeframe, so a multi-timeframe strategy can follow 1h/4h/1d/1w candles
+    from one base stream instead of fetching each interval from Binance.
+
+    ---------
+    Parameters
+    ----------
+    - timeframes (tuple): Binance intervals to build.
+    """
+
+    def __init__(self, timeframes: tuple = TIMEFRAMES) -> None:
+        self.timeframes = tuple(timeframes)
+        self.closed = {timeframe: [] for timeframe in self.timeframes}
+        self.partial = {timeframe: None for timeframe in self.timeframes}
+        self.last_open_time = None
+        self.interval_ms = None
+
+    def update(self, klines) -> None:
+        """
+        Adds base candles, sorted by open time. Candles not newer than the
+        last one added are ignored. Raises a ValueError when a timeframe is
+        not a multiple of the base interval seen so far.
+
+        ---------
+        Parameters
+        ----------
+        - klines (KlineBlock or pd.DataFrame): New base klines, see
+        resample_klines.
+        """
+        open_times = _as_milliseconds(klines['open_time'])
+        columns = [column for column in AGGREGATIONS if column in klines]
+        new = np.ones(len(open_times), dtype=bool)
+        if self.last_open_time is not None:
+            new = open_times > self.last_open_time
+        if not new.any():
+            return
+        arrays = {'open_time': open_times[new]}
+        for column in columns:
+            arrays[column] = np.asarray(klines[column])[new]
+
+        # The batches below start with the partial candles, whose open time
+        # is the period start, so the base interval is tracked and checked
+        # here instead of being inferred from each batch
+        steps = arrays['open_time']
+        if self.last_open_time is not None:
+            steps = np.concatenate([[self.last_open_time], steps])
+        interval_ms = base_interval(steps)
+        if interval_ms is not None:
+            self.interval_ms = min(self.interval_ms or interval_ms, interval_ms)
+        for timeframe in self.timeframes:
+            check_timeframe(timeframe, self.interval_ms)
+        self.last_open_time = int(arrays['open_time'][-1])
+
+        for timeframe in self.timeframes:
+            batch = arrays
+            partial = self.partial[timeframe]
+            if partial is not None:
+                # The open candle is aggregated again with the new candles
+                batch = {
+                    column: np.concatenate([partial[column], values])
+                    for column, values in arrays.items()
+                }
+            candles = resample_klines(batch, timeframe, interval_ms=0)
+            n_candles = len(candles)
+            if n_candles > 1:
+                self.closed[timeframe].append(candles.slice(0, n_candles - 1))
+            self.partial[timeframe] = candles.slice(n_candles - 1, n_candles)
+
+    def candles(self, timeframe: str, include_partial: bool = True) -> KlineBlock:
+        """
+        Candles of a timeframe built so far.
+
+        ---------
+        Parameters
+        ----------
+        - timeframe (str): One of the resampler timeframes.
+        - include_partial (bool): Whether to include the open candle, whose
+        period has not ended in the base candles yet.
+        ----------
+        Returns
+        ----------
+        - KlineBlock: open_time, close_time and the aggregated columns.
+        """
+        closed = self.closed[timeframe]
+        if len(closed) > 1:
+            # Keeps a single block so later calls do not concatenate again
+            closed[:] = [KlineBlock.concat(closed)]
+        blocks = list(closed)
+        if include_partial and self.partial[timeframe] is not None:
+            blocks.append(self.partial[timeframe])
+        if not blocks:
+            return KlineBlock({})
+        return blocks[0] if len(blocks) == 1 else KlineBlock.concat(blocks)
@@ -0,0 +1,599 @@
+from src.streaming_metrics import StreamingCryptoMetrics
+from collections import deque
+import pandas as pd
+import numpy as np
+import asyncio
+import inspect
+import json
+import time
+
+BINANCE_STREAM_URL = 'wss://stream.binance.com:9443/stream'
+
+# Binance accepts at most 1024 streams on a single connection
+MAX_STREAMS_PER_CONNECTION = 1024
+
+
+def parse_kline_event(message) -> dict:
+    """
+    Parses a Binance kline stream message into a candle.
+
+    ---------
+    Parameters
+    ----------
+    - message (str or dict): Kline event, raw or wrapped by a combined
+    stream ({'stream': ..., 'data': ...}).
+    ----------
+    Returns
+    ----------
+    - dict: Candle with 'symbol', 'date' (open time), 'close', 'closed'
+    (whether the candle is final) and 'close_time' (ms).
+    """
+    if isinstance(message, (str, bytes)):
+        message = json.loads(message)
+    if 'data' in message:
+        message = message['data']
+    kline = message['k']
+    return {
+        'symbol': kline['s'],
+        'date': pd.Timestamp(kline['t'], unit='ms'),
+        'close': float(kline['c']),
+        'closed': kline['x'],
+        'close_time': kline['T'],
+    }
+
+
+def _is_closed(message) -> bool:
+    """
+    Whether a kline event is for a closed candle, without building the
+    candle.
+    """
+    if isinstance(message, (str, bytes)):
+        message = json.loads(message)
+    return bool(message.get('data', message)['k']['x'])
+
+
+class BinanceKlineSource:
+    """
+    Live kline events of many symbols from the Binance combined websocket
+    streams, one connection per MAX_STREAMS_PER_CONNECTION symbols. Needs
+    the websockets package.
+
+    Each event is yielded with the time.perf_counter() of its arrival on
+    the socket, and at most queue_size events wait between the sockets and
+    the consumer, so a slow consumer slows down the socket reads instead of
+    growing memory. A dropped connection is reopened after an exponential
+    backoff, and the candles closed while it was down are fetched from the
+    klines endpoint (see backfill) before the stream resumes.
+
+    ---------
+    Parameters
+    ----------
+    - symbols (list): Binance symbols, e.g. ['BTCUSDT', 'ETHUSDT'].
+    - interval (str): Kline interval, e.g. 1m, 1h or 1d.
+    - url (str): Combined stream endpoint.
+    - queue_size (int): Maximum number of events read ahead of the
+    consumer.
+    - min_backoff (float): First reconnection delay, in seconds.
+    - max_backoff (float): Largest reconnection delay, in seconds.
+    - client (optional): Object exposing the Binance klines method, used
+    for the backfills. Defaults to BinanceClient.get_client().
+    """
+
+    def __init__(
+            self,
+            symbols: list,
+            interval: str = '1m',
+            url: str = BINANCE_STREAM_URL,
+            queue_size: int = 1024,
+            min_backoff: float = 1.0,
+            max_backoff: float = 60.0,
+            client = None
+        ) -> None:
+        self.symbols = symbols
+        self.interval = interval
+        self.url = url
+        self.queue_size = queue_size
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.client = client
+        # Open time (ms) of the last closed candle received per symbol
+        self.last_closed = {}
+
+    def urls(self) -> list:
+        return [url for url, _ in self._connections()]
+
+    def _connections(self) -> list:
+        return [
+            (
+                f"{self.url}?streams=" + '/'.join(
+                    f'{symbol.lower()}@kline_{self.interval}'
+                    for symbol in symbols
+                ),
+                symbols
+            )
+            for symbols in (
+                self.symbols[i:i + MAX_STREAMS_PER_CONNECTION]
+                for i in range(0, len(self.symbols), MAX_STREAMS_PER_CONNECTION)
+            )
+        ]
+
+    def backfill(self, symbols: list) -> list:
+        """
+        Closed candles of symbols newer than the last closed candle received
+        for each of them, fetched from the klines endpoint.
+
+        ---------
+        Parameters
+        ----------
+        - symbols (list): Symbols to backfill. Symbols without a received
+        closed candle are skipped.
+        ----------
+        Returns
+        ----------
+        - list: Kline events (see parse_kline_event), oldest first per
+        symbol.
+        """
+        # Imported here so the live service only needs the Binance client
+        # when a connection drops
+        from src.get_historical_data import (
+            interval_to_ms,
+            request_klines,
+            time_chunks,
+        )
+        from src.kline_block import decode_klines
+        from src.setup_binance import BinanceClient
+
+        if self.client is None:
+            self.client = BinanceClient.get_client()
+        step = interval_to_ms(self.interval)
+        now = int(time.time() * 1000)
+        events = []
+        for symbol in symbols:
+            last = self.last_closed.get(symbol)
+            if last is None:
+                continue
+            for start, end in time_chunks(last + step, now, self.interval):
+                block = decode_klines(request_klines(
+                    self.client, symbol, self.interval, start, end
+                ))
+                for open_time, close_time, close in zip(
+                        block['open_time'].tolist(),
+                        block['close_time'].tolist(),
+                        block['close'].tolist()
+                    ):
+                    if close_time >= now:
+                        # Still open, the stream sends it once closed
+                        continue
+                    events.append({'k': {
+                        's': symbol,
+                        't': open_time,
+                        'T': close_time,
+                        'c': close,
+                        'x': True,
+                    }})
+        return events
+
+    def _received(self, message) -> dict:
+        if isinstance(message, (str, bytes)):
+            message = json.loads(message)
+        kline = message.get('data', message)['k']
+        if kline['x']:
+            self.last_closed[kline['s']] = kline['t']
+        return message
+
+    async def __aiter__(self):
+        try:
+            import websockets
+        except ImportError as e:
+            raise ImportError(
+                "BinanceKlineSource needs the websockets package"
+            ) from e
+
+        queue = asyncio.Queue(maxsize=self.queue_size)
+
+        async def listen(url, symbols):
+            delay = self.min_backoff
+            connected_before = False
+            while True:
+                try:
+                    async with websockets.connect(url) as connection:
+                        if connected_before:
+                            for event in await asyncio.to_thread(
+                                    self.backfill, symbols
+                                ):
+                                await queue.put(
+                                    (self._received(event), time.perf_counter())
+                                )
+                        connected_before = True
+                        delay = self.min_backoff
+                        async for message in connection:
+                            received = time.perf_counter()
+                            await queue.put((self._received(message), received))
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print(f"An error occured: {e}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_backoff)
+
+        listeners = [
+            asyncio.create_task(listen(url, symbols))
+            for url, symbols in self._connections()
+        ]
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            for listener in listeners:
+                listener.cancel()
+
+
+class ReplaySource:
+    """
+    Local stand-in for BinanceKlineSource: emits closed kline events from a
+    frame of close prices (e.g. get_historical_data_many), bar by bar and
+    symbol by symbol.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): Frame with a 'date' column and one close price
+    column per symbol.
+    - interval_ms (int, optional): Candle length used for the close times.
+    Defaults to the spacing of the first two dates.
+    - speed (float, optional): Replay speed as a multiple of real time,
+    e.g. 60 plays one hour of candles per minute. None emits the events as
+    fast as they are consumed.
+    - symbols (list, optional): Price columns to replay, defaults to every
+    column but 'date'. Lets a get_historical_data frame with volume columns
+    be replayed.
+    """
+
+    def __init__(
+            self,
+            df: pd.DataFrame,
+            interval_ms: int = None,
+            speed: float = None,
+            symbols: list = None
+        ) -> None:
+        self.df = df
+        self.speed = speed
+        dates = pd.to_datetime(df['date']).to_numpy(dtype='datetime64[ms]')
+        self.open_times = dates.astype(np.int64)
+        if interval_ms is None:
+            interval_ms = (
+                int(self.open_times[1] - self.open_times[0])
+                if len(self.open_times) > 1 else 60 * 1000
+            )
+        self.interval_ms = interval_ms
+        if symbols is None:
+            symbols = [column for column in df.columns if column != 'date']
+        self.symbols = list(symbols)
+
+    def events(self):
+        prices = self.df[self.symbols].to_numpy(dtype=np.float64)
+        for open_time, row in zip(self.open_times.tolist(), prices.tolist()):
+            for symbol, price in zip(self.symbols, row):
+                if price != price:
+                    continue
+                yield {
+                    'k': {
+                        's': symbol,
+                        't': open_time,
+                        'T': open_time + self.interval_ms - 1,
+                        'c': price,
+                        'x': True,
+                    }
+                }
+
+    @classmethod
+    def from_cache(
+            cls,
+            cache,
+            symbols: list,
+            interval: str = '1d',
+            speed: float = None
+        ) -> 'ReplaySource':
+        """
+        Replays the candles of a KlineCache.
+
+        ---------
+        Parameters
+        ----------
+        - cache (KlineCache): Cache holding the candles.
+        - symbols (list): Binance symbols to replay.
+        - interval (str): Kline interval of the cached candles.
+        - speed (float, optional): See ReplaySource.
+        ----------
+        Returns
+        ----------
+        - ReplaySource: Source over the cached close prices, aligned on date.
+        """
+        # Imported here so the live service does not need the Binance client
+        from src.get_historical_data import interval_to_ms
+
+        closes = []
+        for symbol in symbols:
+            df, _ = cache.load(symbol, interval)
+            if df is None:
+                print(f"No cached {interval} candles for {symbol}")
+                continue
+            closes.append(pd.Series(
+                df['close'].to_numpy(),
+                index=pd.DatetimeIndex(df['open_time'], name='date'),
+                name=symbol
+            ))
+        if not closes:
+            raise ValueError(f"No cached {interval} candles to replay")
+        wide = pd.concat(closes, axis=1).sort_index().reset_index()
+        return cls(wide, interval_to_ms(interval), speed)
+
+    async def __aiter__(self):
+        if self.speed is None:
+            for event in self.events():
+                yield event
+                # Hands control back to the loop like a socket read would
+                await asyncio.sleep(0)
+            return
+
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        first_open = None
+        last_open = None
+        for event in self.events():
+            open_time = event['k']['t']
+            if open_time != last_open:
+                if first_open is None:
+                    first_open = open_time
+                # Waits until the bar is due at the replay speed
+                due = start + (open_time - first_open) / 1000 / self.speed
+                await asyncio.sleep(max(due - loop.time(), 0))
+                last_open = open_time
+            yield event
+
+
+class LatencyStats:
+    """
+    Latency samples of one symbol, in seconds. Keeps the count, mean and
+    max over the whole run and the percentiles over the last window
+    samples.
+    """
+
+    def __init__(self, window: int = 1024) -> None:
+        self.samples = deque(maxlen=window)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, latency: float) -> None:
+        self.samples.append(latency)
+        self.count += 1
+        self.total += latency
+        if latency > self.max:
+            self.max = latency
+
+    def summary(self) -> dict:
+        samples = np.fromiter(self.samples, dtype=np.float64)
+        p50, p99 = (
+            np.percentile(samples, [50, 99]) if len(samples) else (np.nan,) * 2
+        )
+        return {
+            'candles': self.count,
+            'latency_mean_ms': self.total / self.count * 1e3
+                if self.count else np.nan,
+            'latency_p50_ms': p50 * 1e3,
+            'latency_p99_ms': p99 * 1e3,
+            'latency_max_ms': self.max * 1e3,
+        }
+
+
+class SignalService:
+    """
+    Long running asyncio service that turns kline streams into set_buy
+    buy/sell decisions for many symbols.
+
+    A reader task puts the source events in a bounded buffer and a worker
+    updates the StreamingCryptoMetrics of the symbol on each closed candle
+    and publishes its decision. When bursts of candles fill the buffer, the
+    reader waits for the worker (overflow='block', which slows down the
+    source) or, with overflow='drop_oldest', first drops the oldest queued
+    in-progress (not closed) updates, which never change the decisions.
+    Closed candles are never dropped: skipping one would leave the
+    streaming indicators of its symbol a bar behind the batch signals for
+    good. The latency of each candle, from its arrival to its
+    publication, is tracked per symbol.
+
+    ---------
+    Parameters
+    ----------
+    - publish (callable, optional): Called (or awaited, if it is a
+    coroutine function) with the signals dict of each closed candle.
+    - treasury_data (pd.DataFrame, optional): Output of get_treasury_rate.
+    - queue_size (int): Maximum number of events waiting to be processed.
+    - overflow (str): 'block' or 'drop_oldest', see above.
+    - **signal_params: THRESHOLD, weights and indicator periods passed to
+    every StreamingCryptoMetrics.
+    """
+
+    def __init__(
+            self,
+            publish = None,
+            treasury_data: pd.DataFrame = None,
+            queue_size: int = 10000,
+            overflow: str = 'block',
+            **signal_params
+        ) -> None:
+        if overflow not in ('block', 'drop_oldest'):
+            raise ValueError(
+                f"overflow must be 'block' or 'drop_oldest', got {overflow!r}"
+            )
+        self.publish = publish
+        self.treasury_data = treasury_data
+        self.queue_size = queue_size
+        self.overflow = overflow
+        self.signal_params = signal_params
+
+        self.metrics = {}
+        self.last_dates = {}
+        self.latency = {}
+        self.latest = {}
+        self.dropped = 0
+        self.skipped = 0
+        self.max_queue = 0
+
+    def _metrics_for(self, symbol: str) -> StreamingCryptoMetrics:
+        metrics = self.metrics.get(symbol)
+        if metrics is None:
+            metrics = StreamingCryptoMetrics(
+                symbol, self.treasury_data, **self.signal_params
+            )
+            self.metrics[symbol] = metrics
+            self.latency[symbol] = LatencyStats()
+        return metrics
+
+    def process(self, message, received: float = None) -> dict:
+        """
+        Updates the indicators with one kline event.
+
+        ---------
+        Parameters
+        ----------
+        - message: Kline event, see parse_kline_event.
+        - received (float, optional): time.perf_counter() of its arrival.
+        ----------
+        Returns
+        ----------
+        - dict: Signals of the candle (see StreamingCryptoMetrics.update,
+        plus its 'symbol'), or None if the candle is not closed yet or was
+        already processed.
+        """
+        candle = parse_kline_event(message)
+        if not candle['closed']:
+            return None
+        symbol = candle['symbol']
+        last_date = self.last_dates.get(symbol)
+        if last_date is not None and candle['date'] <= last_date:
+            self.skipped += 1
+            return None
+        self.last_dates[symbol] = candle['date']
+
+        signals = self._metrics_for(symbol).update(
+            {'date': candle['date'], 'close': candle['close']}
+        )
+        signals['symbol'] = symbol
+        self.latest[symbol] = signals
+        if received is not None:
+            self.latency[symbol].add(time.perf_counter() - received)
+        return signals
+
+    def _drop_in_progress(self, pending: deque, item: tuple) -> bool:
+        """
+        Makes room in a full buffer by dropping its oldest in-progress
+        update, or drops item itself if it is one. Returns whether item
+        was dropped.
+        """
+        if not _is_closed(item[0]):
+            self.dropped += 1
+            return True
+        for position, (message, _) in enumerate(pending):
+            if not _is_closed(message):
+                del pending[position]
+                self.dropped += 1
+                break
+        return False
+
+    async def _read(
+            self,
+            source,
+            pending: deque,
+            changed: asyncio.Condition
+        ) -> None:
+        async for message in source:
+            if isinstance(message, tuple):
+                # Sources may stamp the arrival time themselves
+                item = message
+            else:
+                item = (message, time.perf_counter())
+            dropped = False
+            async with changed:
+                if (
+                        self.overflow == 'drop_oldest'
+                        and len(pending) >= self.queue_size
+                    ):
+                    before = self.dropped
+                    if self._drop_in_progress(pending, item):
+                        item = None
+                    dropped = self.dropped > before
+                if item is not None:
+                    # Waits for the worker when the buffer is still full
+                    await changed.wait_for(
+                        lambda: len(pending) < self.queue_size
+                    )
+                    pending.append(item)
+                    if len(pending) > self.max_queue:
+                        self.max_queue = len(pending)
+                    changed.notify_all()
+            if dropped:
+                # Lets the worker catch up, appending does not suspend
+                # after a drop
+                await asyncio.sleep(0)
+
+    async def _work(
+            self,
+            pending: deque,
+            changed: asyncio.Condition
+        ) -> None:
+        is_async = inspect.iscoroutinefunction(self.publish)
+        while True:
+            async with changed:
+                await changed.wait_for(lambda: len(pending) > 0)
+                item = pending.popleft()
+                changed.notify_all()
+            if item is None:
+                # The source is exhausted and every event was processed
+                return
+            message, received = item
+            try:
+                signals = self.process(message, received)
+                if signals is not None and self.publish is not None:
+                    if is_async:
+                        await self.publish(signals)
+                    else:
+                        self.publish(signals)
+            except Exception as e:
+                # A bad message or publisher must not stop the service
+                print(f"An error occured: {e}")
+
+    async def run(self, source) -> None:
+        """
+        Consumes a source (BinanceKlineSource, ReplaySource or any async
+        iterable of kline events, or of (event, time.perf_counter() of
+        arrival) pairs) until it is exhausted or the task is cancelled.
+        """
+        # Events waiting for the worker, at most queue_size of them
+        pending = deque()
+        changed = asyncio.Condition()
+        worker = asyncio.create_task(self._work(pending, changed))
+        try:
+            await self._read(source, pending, changed)
+            async with changed:
+                # Marks the end of the source, past the size limit
+                pending.append(None)
+                changed.notify_all()
+            await worker
+        finally:
+            worker.cancel()
+
+    def latency_report(self) -> pd.DataFrame:
+        """
+        Per symbol candle count and latency statistics in milliseconds.
+        """
+        report = pd.DataFrame.from_dict(
+            {
+                symbol: stats.summary()
+                for symbol, stats in self.latency.items()
+            },
+            orient='index'
+        )
+        report.index.name = 'symbol'
+        return report
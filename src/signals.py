@@ -0,0 +1,339 @@
+import pandas as pd
+import numpy as np
+
+# Weights used by CryptoMetrics.set_buy to combine the indicator votes.
+DEFAULT_WEIGHTS = {
+    'rsi' : 0.4,
+    'treasury_corr' : 0.1,
+    'bb' : 0.3,
+    'MACD' : 0.1,
+}
+
+
+def _as_frame(prices: np.ndarray):
+    """
+    Wraps a (bars,) price array in a Series, or a (bars x symbols) array in
+    a DataFrame so the pandas rolling kernels run column by column.
+    """
+    values = np.asarray(prices, dtype=np.float64)
+    if values.ndim == 1:
+        return pd.Series(values)
+    return pd.DataFrame(values)
+
+
+def _like(values: np.ndarray, prices: np.ndarray) -> np.ndarray:
+    return np.ascontiguousarray(values).reshape(np.shape(prices))
+
+
+def _signal(condition) -> np.ndarray:
+    return np.asarray(condition, dtype=np.int8)
+
+
+def rsi_signals(prices: np.ndarray, PERIOD=14) -> tuple:
+    """
+    Computes the RSI buy and sell signals used by CryptoMetrics.calculate_rsi
+    directly on a price array.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - PERIOD (int, optional): The period over which the RSI is calculated.
+    Defaults to 14.
+    ----------
+    Returns
+    ----------
+    - tuple: (buy, sell) int8 arrays with the same shape as prices.
+    """
+    frame = _as_frame(prices)
+    delta = frame.diff()
+
+    gain = delta.where(delta > 0, 0)
+    loss = -delta.where(delta < 0, 0)
+
+    avg_gain = gain.rolling(window=PERIOD, min_periods=1).mean()
+    avg_loss = loss.rolling(window=PERIOD, min_periods=1).mean()
+
+    rs = avg_gain / avg_loss
+    rsi = (100 - (100 / (1 + rs))).to_numpy()
+
+    buy = _signal(rsi < 30)
+    sell = _signal(rsi > 70)
+    return _like(buy, prices), _like(sell, prices)
+
+
+def bollinger_signals(prices: np.ndarray, PERIOD=15, STD_FACTOR=1.5) -> tuple:
+    """
+    Computes the Bollinger Bands buy and sell signals used by
+    CryptoMetrics.calculate_bollinger_bands directly on a price array.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - PERIOD (int): Number of bars used to track the bands.
+    - STD_FACTOR (float): Standard deviation factor used to generate the
+    bands.
+    ----------
+    Returns
+    ----------
+    - tuple: (buy, sell) int8 arrays with the same shape as prices.
+    """
+    frame = _as_frame(prices)
+    rolling = frame.rolling(PERIOD, min_periods=1)
+    std = rolling.std().to_numpy()
+    mean = rolling.mean().to_numpy()
+    values = frame.to_numpy()
+
+    buy = _signal(values < mean - std * STD_FACTOR)
+    sell = _signal(values > mean + std * STD_FACTOR)
+    return _like(buy, prices), _like(sell, prices)
+
+
+def macd_signals(
+        prices: np.ndarray,
+        short_window = 12,
+        long_window = 26,
+        signal_window = 9
+    ) -> tuple:
+    """
+    Computes the MACD crossover buy and sell signals used by
+    CryptoMetrics.calculate_macd directly on a price array.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - short_window (int): number of bars to lookback and track EMA
+    - long_window (int): number of bars to lookback and track EMA
+    - signal_window (int): number of bars to calulate signal line
+    ----------
+    Returns
+    ----------
+    - tuple: (buy, sell) int8 arrays with the same shape as prices.
+    """
+    frame = _as_frame(prices)
+    ema_short = frame.ewm(span=short_window, adjust=False).mean()
+    ema_long = frame.ewm(span=long_window, adjust=False).mean()
+    macd = ema_short - ema_long
+    signal_line = macd.ewm(span=signal_window, adjust=False).mean()
+
+    buy = _signal(
+        (macd > signal_line) & (macd.shift(1) <= signal_line.shift(1))
+    )
+    sell = _signal(
+        (macd < signal_line) & (macd.shift(1) >= signal_line.shift(1))
+    )
+    return _like(buy, prices), _like(sell, prices)
+
+
+def align_treasury_rate(dates: pd.Series, treasury_data: pd.DataFrame):
+    """
+    Aligns the treasury rate to the given dates the same way
+    CryptoMetrics.calculate_corr_treasury does (left merge on date, then
+    forward fill).
+
+    ---------
+    Parameters
+    ----------
+    - dates (pd.Series): Dates of the price bars.
+    - treasury_data (pd.DataFrame): Output of get_treasury_rate.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Treasury rate for each bar.
+    """
+    aligned = pd.DataFrame({'date': pd.Series(dates).to_numpy()}).merge(
+        treasury_data,
+        on='date',
+        how='left'
+    )
+    return aligned['treasury_rate'].ffill().to_numpy(dtype=np.float64)
+
+
+def _rolling_corr_window(
+        x: np.ndarray,
+        y: np.ndarray,
+        valid: np.ndarray,
+        window: int,
+        min_periods: int
+    ) -> np.ndarray:
+    """
+    Rolling correlation of the (bars, symbols) arrays x and y for a single
+    window, from cumulative sums over blocks of window bars.
+
+    A window ending in block b covers the head of block b and the tail of
+    block b-1. Each block is centered on its own mean before the cumulative
+    sums, and the tail sums are shifted to the center of block b before
+    being added, so the sums never span more than two blocks and keep their
+    rounding error relative to the window itself.
+
+    Unlike pandas, windows where x or y is constant are NaN: their variance
+    is only rounding error (below eps times the sum of squares), and pandas
+    divides by it and returns a finite value of that noise. Such values are
+    never close to the +/-0.7 vote thresholds, so the signals are the same.
+    """
+    bars, symbols = x.shape
+    n_blocks = -(-bars // window)
+
+    sums = np.zeros((6, n_blocks * window, symbols))
+    blocks = sums.reshape(6, n_blocks, window, symbols)
+    n, sx, sy, sxx, syy, sxy = blocks
+    sums[0, :bars] = valid
+    np.copyto(sums[1, :bars], x, where=valid)
+    np.copyto(sums[2, :bars], y, where=valid)
+
+    count = np.maximum(n.sum(axis=1), 1)
+    center_x = sx.sum(axis=1) / count
+    center_y = sy.sum(axis=1) / count
+    sx -= center_x[:, None]
+    sy -= center_y[:, None]
+    sx *= n
+    sy *= n
+    np.multiply(sx, sx, out=sxx)
+    np.multiply(sy, sy, out=syy)
+    np.multiply(sx, sy, out=sxy)
+    np.cumsum(blocks, axis=2, out=blocks)
+
+    tail = blocks[:, :-1, -1:] - blocks[:, :-1, :-1]
+    tn, tx, ty, txx, tyy, txy = tail
+    shift_x = (center_x[1:] - center_x[:-1])[:, None]
+    shift_y = (center_y[1:] - center_y[:-1])[:, None]
+    txy -= shift_y*tx + shift_x*ty - tn*shift_x*shift_y
+    txx -= shift_x*(2*tx - tn*shift_x)
+    tyy -= shift_y*(2*ty - tn*shift_y)
+    tx -= tn*shift_x
+    ty -= tn*shift_y
+    blocks[:, 1:, :-1] += tail
+
+    nobs, sx, sy, sxx, syy, sxy = sums[:, :bars]
+    eps = 2 * window * np.finfo(np.float64).eps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        var_x = sxx - sx*sx/nobs
+        var_y = syy - sy*sy/nobs
+        # Constant windows only differ from zero variance by rounding.
+        defined = (
+            (nobs >= max(min_periods, 2))
+            & (var_x > eps*sxx)
+            & (var_y > eps*syy)
+        )
+        var_x *= var_y
+        corr = sxy - sx*sy/nobs
+        corr /= np.sqrt(var_x)
+    np.clip(corr, -1, 1, out=corr)
+    corr[~defined] = np.nan
+    return corr
+
+
+def rolling_corr(
+        prices: np.ndarray,
+        rates: np.ndarray,
+        PERIOD=90,
+        min_periods: int = None
+    ) -> np.ndarray:
+    """
+    Rolling Pearson correlation between prices and a rate series,
+    computed from cumulative sums instead of pandas' rolling().corr().
+
+    Bars where either value is NaN are left out of the windows, as pandas
+    does. Windows where either series is constant have no defined
+    correlation and are NaN (pandas returns rounding noise there).
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - rates (np.ndarray): Rate aligned to the bars, shape (bars,), or one
+    rate series per symbol with the shape of prices.
+    - PERIOD (int or list, optional): Rolling window, or a list of windows
+    computed in one call. Defaults to 90.
+    - min_periods (int, optional): Valid pairs required in a window.
+    Defaults to the window size.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Correlations with the shape of prices, with a leading
+    axis of len(PERIOD) when a list of windows is given.
+    """
+    x = np.asarray(prices, dtype=np.float64)
+    x = x.reshape(len(x), -1)
+    y = np.asarray(rates, dtype=np.float64)
+    y = y.reshape(len(y), -1)
+    valid = ~(np.isnan(x) | np.isnan(y))
+
+    result = np.stack([
+        _rolling_corr_window(
+            x, y, valid, int(window),
+            window if min_periods is None else min_periods
+        ).reshape(np.shape(prices))
+        for window in np.atleast_1d(PERIOD)
+    ])
+    return result if np.ndim(PERIOD) else result[0]
+
+
+def treasury_corr_signals(
+        prices: np.ndarray,
+        rates: np.ndarray,
+        PERIOD=90
+    ) -> tuple:
+    """
+    Computes the treasury correlation buy and sell signals used by
+    CryptoMetrics.calculate_corr_treasury directly on a price array.
+
+    The correlation is NaN (no signal) where the price or the rate is
+    constant over the window, see rolling_corr.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - rates (np.ndarray): Treasury rate aligned to the bars, see
+    align_treasury_rate, or one rate series per symbol.
+    - PERIOD (int, optional): Rolling correlation window. Defaults to 90.
+    ----------
+    Returns
+    ----------
+    - tuple: (buy, sell) int8 arrays with the same shape as prices.
+    """
+    corr = rolling_corr(prices, rates, PERIOD)
+
+    buy = _signal(corr < -0.7)
+    sell = _signal(corr > 0.7)
+    return _like(buy, prices), _like(sell, prices)
+
+
+def combine_votes(
+        rsi: np.ndarray,
+        treasury_corr: np.ndarray,
+        bb: np.ndarray,
+        macd: np.ndarray,
+        weights: dict = None,
+        THRESHOLD=0.5
+    ) -> np.ndarray:
+    """
+    Combines indicator signals into a weighted vote, as done by
+    CryptoMetrics.set_buy. Works for buy or sell signals alike.
+
+    ---------
+    Parameters
+    ----------
+    - rsi, treasury_corr, bb, macd (np.ndarray): Indicator signals.
+    - weights (dict, optional): Weight of each indicator, keyed like
+    DEFAULT_WEIGHTS. Weights may be arrays broadcasting against the signals.
+    - THRESHOLD (float): threshold to set an indication.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: int8 array with 1 where the weighted vote is above
+    THRESHOLD.
+    """
+    if weights is None:
+        weights = DEFAULT_WEIGHTS
+
+    metric = (
+        rsi*weights['rsi'] +
+        treasury_corr*weights['treasury_corr'] +
+        bb*weights['bb'] +
+        macd*weights['MACD']
+    )
+    return _signal(metric > THRESHOLD)
@@ -1,4 +1,19 @@
+from src.execution import quote_volumes
+from src.profiling import profiled
 import pandas as pd
+import numpy as np
+
+# Record layout of the trade logs returned with return_trades=True: bar
+# index, side (1 buy, -1 sell), fill price, coin quantity, dollar value
+# and fee paid.
+TRADE_DTYPE = np.dtype([
+    ('bar', np.int64),
+    ('side', np.int8),
+    ('price', np.float64),
+    ('quantity', np.float64),
+    ('value', np.float64),
+    ('fee', np.float64),
+])
 
 
 def format_output(
@@ -17,145 +32,536 @@ def format_output(
         "final_balance": final_balance
     }
 
+def _run_signal_kernel(
+        prices: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        initial_capital: float,
+        trade_value: float,
+        return_equity: bool = False,
+        return_trades: bool = False,
+        execution = None,
+        quote_volume: np.ndarray = None
+    ) -> tuple:
+    """
+    Runs the cash/holdings recurrence of the signal simulators over
+    contiguous arrays.
+
+    Cash and holdings only change on bars with a buy or sell signal, so the
+    recurrence is evaluated on those bars only and the per-bar state is
+    rebuilt afterwards with a forward fill over the event indexes.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Coin price for each bar.
+    - buy (np.ndarray): Buy signal for each bar (1 means buy).
+    - sell (np.ndarray): Sell signal for each bar (1 means sell).
+    - initial_capital (float): Capital available for investment.
+    - trade_value (float): Value traded on each signal.
+    - return_equity (bool): Whether to build the per-bar equity and
+    position curves.
+    - return_trades (bool): Whether to build the trade log.
+    - execution (ExecutionModel, optional): Fees, slippage and partial 
+    fills. Trades fill at the bar price without fees when None.
+    - quote_volume (np.ndarray, optional): Quote volume of each bar, needed
+    by execution models with impact or max_participation.
+    ----------
+    Returns
+    ---------
+    - tuple: (balance, coin_holdings, total_invested, stopped, extras), 
+    where stopped flags the early "No more money to invest" exit and extras 
+    holds the requested "equity_curve", "position_curve" and "trades".
+    """
+    n_bars = len(prices)
+    balance = initial_capital
+    coin_holdings = 0
+    total_invested = 0
+    stopped = n_bars > 0 and balance < 0
+
+    events = np.flatnonzero((buy == 1) | (sell == 1))
+    event_prices = prices[events].tolist()
+    event_buys = (buy[events] == 1).tolist()
+    event_sells = (sell[events] == 1).tolist()
+
+    fee_rate = 0.0
+    event_capacity = [np.inf] * len(events)
+    event_volumes = [None] * len(events)
+    if execution is not None:
+        quote_volume = _check_volume(execution, quote_volume, n_bars)
+        fee_rate = execution.fee_rate
+        event_capacity = execution.capacity(quote_volume, n_bars)[events]
+        event_capacity = event_capacity.tolist()
+        if quote_volume is not None:
+            event_volumes = list(quote_volume[events])
+
+    processed = 0
+    event_balance = []
+    event_holdings = []
+    trades = []
+
+    if not stopped:
+        for bar, price, is_buy, is_sell, capacity, volume in zip(
+                events.tolist(), event_prices, event_buys, event_sells,
+                event_capacity, event_volumes
+            ):
+            # Sell logic: Sell trade_value worth of holdings on a sell signal
+            if is_sell and coin_holdings > 0:
+                coins_sold = trade_value / price
+                if coins_sold > coin_holdings:
+                    coins_sold = coin_holdings
+                if coins_sold * price > capacity:
+                    coins_sold = capacity / price
+                fill_price = price
+                if execution is not None:
+                    fill_price = execution.fill_price(
+                        -1, price, coins_sold * price, volume
+                    )
+                proceeds = coins_sold * fill_price
+                fee = proceeds * fee_rate
+                coin_holdings -= coins_sold
+                balance += proceeds - fee
+                if return_trades and coins_sold > 0:
+                    trades.append(
+                        (bar, -1, fill_price, coins_sold, proceeds, fee)
+                    )
+
+            # Buy logic: Buy trade_value worth of the coin on a buy signal
+            if is_buy and balance > 0:
+                if balance < trade_value:
+                    trade_value = balance
+                value = trade_value if trade_value <= capacity else capacity
+                fill_price = price
+                if execution is not None:
+                    fill_price = execution.fill_price(1, price, value, volume)
+                fee = value * fee_rate
+                coins_bought = (value - fee) / fill_price
+                total_invested += value
+                coin_holdings += coins_bought
+                balance -= value
+                if return_trades and value > 0:
+                    trades.append(
+                        (bar, 1, fill_price, coins_bought, value, fee)
+                    )
+
+            processed += 1
+            if return_equity:
+                event_balance.append(balance)
+                event_holdings.append(coin_holdings)
+
+            # The loop stops on the bar following a negative balance
+            if balance < 0 and bar < n_bars - 1:
+                stopped = True
+                break
+
+    if stopped:
+        total_invested = initial_capital - balance
+
+    extras = {}
+    if return_equity:
+        last_event = np.searchsorted(
+            events[:processed], np.arange(n_bars), side='right'
+        ) - 1
+        has_event = last_event >= 0
+        cash = np.full(n_bars, initial_capital, dtype=np.float64)
+        holdings = np.zeros(n_bars, dtype=np.float64)
+        cash[has_event] = np.asarray(event_balance)[last_event[has_event]]
+        holdings[has_event] = (
+            np.asarray(event_holdings)[last_event[has_event]]
+        )
+        extras["equity_curve"] = cash + holdings * prices
+        extras["position_curve"] = holdings
+    if return_trades:
+        extras["trades"] = np.array(trades, dtype=TRADE_DTYPE)
+
+    return balance, coin_holdings, total_invested, stopped, extras
+
+
+def _check_volume(execution, quote_volume, n_bars: int):
+    if quote_volume is None:
+        if execution.needs_volume:
+            raise ValueError(
+                "This execution model needs the quote volume of each bar "
+                "('quote_asset_volume' or 'volume' column)"
+            )
+        return None
+    quote_volume = np.asarray(quote_volume, dtype=np.float64)
+    if (quote_volume < 0).any():
+        raise ValueError("Quote volumes must be non negative")
+    return quote_volume
+
+
+def _signal_arrays(df: pd.DataFrame, coin: str, sell: bool) -> tuple:
+    prices = np.ascontiguousarray(df[coin].to_numpy(dtype=np.float64))
+    buys = np.ascontiguousarray(df[f'buy_{coin}'].to_numpy())
+    if sell:
+        sells = np.ascontiguousarray(df[f'sell_{coin}'].to_numpy())
+    else:
+        sells = np.zeros(len(df), dtype=np.int8)
+    return prices, buys, sells
+
+
+def _print_summary(
+        initial_capital: float,
+        coin_holdings: float,
+        final_price: float,
+        total_invested: float,
+        final_balance: float,
+        stopped: bool
+    ) -> None:
+    if stopped:
+        print("No more money to invest!")
+        print(f"Initial Capital: ${initial_capital:.2f}")
+        print(f"Coin Holdings in BTC: {coin_holdings:.8f}")
+        print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")            
+        print(f"Total Invested: ${total_invested:.2f}")
+        print(f"Final Balance: ${final_balance:.2f}")
+    else:
+        print(f"Initial Capital: ${initial_capital:.2f}")
+        print(f"Coin Holdings: {coin_holdings:.8f} BTC")
+        print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")
+        print(f"Total Invested: ${total_invested:.2f}")
+        print(f"Final Balance: ${final_balance:.2f}")
+        print(f"Total Profit/Loss: ${final_balance - initial_capital:.2f}")
+
+
+@profiled
+def simulate_signals(
+        prices: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        initial_capital: float,
+        trade_value: float,
+        return_equity: bool = False,
+        return_trades: bool = False,
+        execution = None,
+        quote_volume: np.ndarray = None
+    ) -> dict:
+    """
+    Simulates a signal driven strategy over price, buy and sell arrays.
+    Produces the same results as simulate_model_trader, or 
+    simulate_model_buyer when sell is None.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Coin price for each bar.
+    - buy (np.ndarray): Buy signal for each bar (1 means buy).
+    - sell (np.ndarray): Sell signal for each bar, or None to only buy.
+    - initial_capital (float): Capital available for investment.
+    - trade_value (float): Value traded on each signal.
+    - return_equity (bool): Whether to add the per-bar equity curve 
+    (cash + holdings marked at the bar price) under the "equity_curve" key
+    and the coin holdings under "position_curve".
+    - return_trades (bool): Whether to add the trade log (a TRADE_DTYPE
+    record array) under the "trades" key.
+    - execution (ExecutionModel, optional): Fees, slippage and partial 
+    fills applied to every trade. Trades fill at the bar price without fees
+    when None.
+    - quote_volume (np.ndarray, optional): Quote volume of each bar, needed
+    by execution models with impact or max_participation.
+    ----------
+    Returns
+    ---------
+    - dict: Simulation summary built by format_output.
+    """
+    prices = np.ascontiguousarray(prices, dtype=np.float64)
+    buy = np.ascontiguousarray(buy)
+    if sell is None:
+        sell = np.zeros(len(prices), dtype=np.int8)
+    else:
+        sell = np.ascontiguousarray(sell)
+
+    final_price = prices[-1]
+    balance, coin_holdings, total_invested, _, extras = _run_signal_kernel(
+        prices, 
+        buy, 
+        sell, 
+        initial_capital, 
+        trade_value, 
+        return_equity, 
+        return_trades,
+        execution,
+        quote_volume
+    )
+    output = format_output(
+        initial_capital= initial_capital, 
+        coint_holdings= coin_holdings, 
+        final_price = final_price, 
+        total_invested = total_invested, 
+        final_balance = balance + (coin_holdings * final_price)
+    )
+    output.update(extras)
+    return output
+
+
+@profiled
+def simulate_signals_batch(
+        prices: np.ndarray,
+        buy: np.ndarray,
+        sell: np.ndarray,
+        initial_capital,
+        trade_value,
+        execution = None,
+        quote_volume: np.ndarray = None
+    ) -> dict:
+    """
+    Simulates many signal configurations at once. Each row of buy/sell is 
+    one configuration and is simulated exactly like simulate_signals, with 
+    the recurrence vectorized across configurations.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) shared by every 
+    configuration, or (configs, bars).
+    - buy (np.ndarray): Buy signals with shape (configs, bars).
+    - sell (np.ndarray): Sell signals with shape (configs, bars), or None 
+    to only buy.
+    - initial_capital (float or np.ndarray): Capital per configuration.
+    - trade_value (float or np.ndarray): Trade value per configuration.
+    - execution (ExecutionModel, optional): Fees, slippage and partial 
+    fills, see simulate_signals.
+    - quote_volume (np.ndarray, optional): Quote volume of each bar, with 
+    the shape of prices.
+    ----------
+    Returns
+    ---------
+    - dict: format_output keys, each holding one value per configuration.
+    """
+    buy = np.asfortranarray(buy)
+    n_configs, n_bars = buy.shape
+    if sell is None:
+        sell = np.zeros((n_configs, n_bars), dtype=np.int8, order='F')
+    else:
+        sell = np.asfortranarray(sell)
+    prices = np.asarray(prices, dtype=np.float64)
+    shared_prices = prices.ndim == 1
+    if not shared_prices:
+        prices = np.asfortranarray(prices)
+
+    initial_capital = np.broadcast_to(
+        np.asarray(initial_capital, dtype=np.float64), (n_configs,)
+    ).copy()
+    balance = initial_capital.copy()
+    trade_value = np.broadcast_to(
+        np.asarray(trade_value, dtype=np.float64), (n_configs,)
+    ).copy()
+    coin_holdings = np.zeros(n_configs)
+    total_invested = np.zeros(n_configs)
+    stopped = (balance < 0) & (n_bars > 0)
+
+    buy_mask = buy == 1
+    sell_mask = sell == 1
+    events = np.flatnonzero(buy_mask.any(axis=0) | sell_mask.any(axis=0))
+
+    fee_rate = 0.0
+    capacity = np.full(n_bars, np.inf)
+    if execution is not None:
+        quote_volume = _check_volume(execution, quote_volume, n_bars)
+        fee_rate = execution.fee_rate
+        capacity = execution.capacity(quote_volume, n_bars)
+
+    for bar in events.tolist():
+        price = prices[bar] if shared_prices else prices[:, bar]
+        bar_capacity = capacity[..., bar]
+        volume = None if quote_volume is None else quote_volume[..., bar]
+        active = ~stopped
+
+        # Sell logic: Sell trade_value worth of holdings on a sell signal
+        selling = sell_mask[:, bar] & (coin_holdings > 0) & active
+        if selling.any():
+            coins_sold = np.minimum(trade_value / price, coin_holdings)
+            coins_sold = np.minimum(coins_sold, bar_capacity / price)
+            fill_price = price
+            if execution is not None:
+                fill_price = execution.fill_price(
+                    -1, price, coins_sold * price, volume
+                )
+            proceeds = coins_sold * fill_price
+            coin_holdings = np.where(
+                selling, coin_holdings - coins_sold, coin_holdings
+            )
+            balance = np.where(
+                selling, balance + (proceeds - proceeds * fee_rate), balance
+            )
+
+        # Buy logic: Buy trade_value worth of the coin on a buy signal
+        buying = buy_mask[:, bar] & (balance > 0) & active
+        if buying.any():
+            trade_value = np.where(
+                buying & (balance < trade_value), balance, trade_value
+            )
+            value = np.minimum(trade_value, bar_capacity)
+            fill_price = price
+            if execution is not None:
+                fill_price = execution.fill_price(1, price, value, volume)
+            coin_holdings = np.where(
+                buying, 
+                coin_holdings + (value - value * fee_rate) / fill_price, 
+                coin_holdings
+            )
+            total_invested = np.where(
+                buying, total_invested + value, total_invested
+            )
+            balance = np.where(buying, balance - value, balance)
+
+        # The loop stops on the bar following a negative balance
+        if bar < n_bars - 1:
+            stopped |= balance < 0
+
+    total_invested = np.where(
+        stopped, initial_capital - balance, total_invested
+    )
+    final_price = prices[-1] if shared_prices else prices[:, -1]
+
+    return format_output(
+        initial_capital= initial_capital, 
+        coint_holdings= coin_holdings, 
+        final_price = final_price, 
+        total_invested = total_invested, 
+        final_balance = balance + (coin_holdings * final_price)
+    )
+
+
+@profiled
 def simulate_model_trader(
         df: pd.DataFrame, 
         initial_capital: float, 
         trade_value: float, 
         coin: str,
-        verbose: bool = True
+        verbose: bool = True,
+        return_equity: bool = False,
+        return_trades: bool = False,
+        execution = None
     ) -> float:
 
-    balance = initial_capital  # Initial money in USD
-    coin_holdings = 0  # Number of coins owned
-    total_invested = 0  # Total money invested
-    final_balance = 0  # Final balance after simulation
+    prices, buys, sells = _signal_arrays(df, coin, sell=True)
     final_price = df[coin].iloc[-1]  # Final price of the coin
 
-    for _, row in df.iterrows():
-        price = row[coin]  # Get current coin price
-
-        if balance < 0:
-            final_balance = balance + (coin_holdings * final_price)
-            total_invested = initial_capital - balance
-            if verbose:
-                print("No more money to invest!")
-                print(f"Initial Capital: ${initial_capital:.2f}")
-                print(f"Coin Holdings in BTC: {coin_holdings:.8f}")
-                print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")            
-                print(f"Total Invested: ${total_invested:.2f}")
-                print(f"Final Balance: ${final_balance:.2f}")
-            return format_output(
-                initial_capital= initial_capital, 
-                coint_holdings= coin_holdings, 
-                final_price = final_price, 
-                total_invested = total_invested, 
-                final_balance = final_balance
-            )
-        
-        # Sell logic: Sell all holdings when a sell signal appears
-        if row[f'sell_{coin}'] == 1 and coin_holdings > 0:
-            coins_sold = trade_value / price  # Sell coins based on trade value
-            if coins_sold > coin_holdings:  # Prevent selling more than possible
-                coins_sold = coin_holdings
-            coin_holdings -= coins_sold
-            balance += coins_sold * price
-
-
-        # Buy logic: Buy $10 worth of the coin when a buy signal appears
-        if row[f'buy_{coin}'] == 1 and balance > 0:
-
-            if balance < trade_value:
-                trade_value = balance # Prevent buying more than possible
-            coins_bought = trade_value / price  # Calculate how many coins we can buy
-            total_invested += trade_value
-            coin_holdings += coins_bought
-            balance -= trade_value  # Reduce balance
+    balance, coin_holdings, total_invested, stopped, extras = (
+        _run_signal_kernel(
+            prices, 
+            buys, 
+            sells, 
+            initial_capital, 
+            trade_value, 
+            return_equity, 
+            return_trades,
+            execution,
+            quote_volumes(df, coin) if execution is not None else None
+        )
+    )
 
     # Final value: Cash + value of remaining coins
     final_balance = balance + (coin_holdings * final_price)
     
     if verbose:
-        print(f"Initial Capital: ${initial_capital:.2f}")
-        print(f"Coin Holdings: {coin_holdings:.8f} BTC")
-        print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")
-        print(f"Total Invested: ${total_invested:.2f}")
-        print(f"Final Balance: ${final_balance:.2f}")
-        print(f"Total Profit/Loss: ${final_balance - initial_capital:.2f}")
+        _print_summary(
+            initial_capital, 
+            coin_holdings, 
+            final_price, 
+            total_invested, 
+            final_balance, 
+            stopped
+        )
         
-    return format_output(
+    output = format_output(
         initial_capital= initial_capital, 
         coint_holdings= coin_holdings, 
         final_price = final_price, 
         total_invested = total_invested, 
         final_balance = final_balance
     )
+    output.update(extras)
+    return output
 
 
+@profiled
 def simulate_model_buyer(
         df: pd.DataFrame, 
         initial_capital: float, 
         trade_value: float, 
         coin: str,
-        verbose: bool = True
+        verbose: bool = True,
+        return_equity: bool = False,
+        return_trades: bool = False,
+        execution = None
     ) -> float:
 
-    balance = initial_capital  # Initial money in USD
-    coin_holdings = 0  # Number of coins owned
-    total_invested = 0  # Total money invested
-    final_balance = 0  # Final balance after simulation
+    prices, buys, sells = _signal_arrays(df, coin, sell=False)
     final_price = df[coin].iloc[-1]  # Final price of the coin
 
-    for _, row in df.iterrows():
-        price = row[coin]  # Get current coin price
-
-        if balance < 0:
-            final_balance = balance + (coin_holdings * final_price)
-            total_invested = initial_capital - balance
-            if verbose:
-                print("No more money to invest!")
-                print(f"Initial Capital: ${initial_capital:.2f}")
-                print(f"Coin Holdings in BTC: {coin_holdings:.8f}")
-                print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")            
-                print(f"Total Invested: ${total_invested:.2f}")
-                print(f"Final Balance: ${final_balance:.2f}")
-            return format_output(
-                initial_capital= initial_capital, 
-                coint_holdings= coin_holdings, 
-                final_price = final_price, 
-                total_invested = total_invested, 
-                final_balance = final_balance
-            )
-
-        # Buy logic: Buy $10 worth of the coin when a buy signal appears
-        if row[f'buy_{coin}'] == 1 and balance > 0:
-
-            if balance < trade_value:
-                trade_value = balance # Prevent buying more than possible
-            coins_bought = trade_value / price  # Calculate how many coins we can buy
-            total_invested += trade_value
-            coin_holdings += coins_bought
-            balance -= trade_value  # Reduce balance
+    balance, coin_holdings, total_invested, stopped, extras = (
+        _run_signal_kernel(
+            prices, 
+            buys, 
+            sells, 
+            initial_capital, 
+            trade_value, 
+            return_equity, 
+            return_trades,
+            execution,
+            quote_volumes(df, coin) if execution is not None else None
+        )
+    )
 
     # Final value: Cash + value of remaining coins
     final_balance = balance + (coin_holdings * final_price)
     
     if verbose:
-        print(f"Initial Capital: ${initial_capital:.2f}")
-        print(f"Coin Holdings: {coin_holdings:.8f} BTC")
-        print(f"Coin Holdings in dollars: ${coin_holdings*final_price:.2f}")
-        print(f"Total Invested: ${total_invested:.2f}")
-        print(f"Final Balance: ${final_balance:.2f}")
-        print(f"Total Profit/Loss: ${final_balance - initial_capital:.2f}")
+        _print_summary(
+            initial_capital, 
+            coin_holdings, 
+            final_price, 
+            total_invested, 
+            final_balance, 
+            stopped
+        )
         
-    return format_output(
+    output = format_output(
         initial_capital= initial_capital, 
         coint_holdings= coin_holdings, 
         final_price = final_price, 
         total_invested = total_invested, 
         final_balance = final_balance
     )
+    output.update(extras)
+    return output
+
+
+def _dca_purchases(
+        dates: pd.Series,
+        prices: np.ndarray,
+        investment_interval: str
+    ) -> np.ndarray:
+    """
+    Prices paid by each scheduled DCA purchase. Purchases are scheduled
+    every investment_interval from the first to the last day of dates and
+    fill at the first bar at or after their date, so missing days use the
+    next available bar. Dates past the last bar are dropped.
+    """
+    times = pd.to_datetime(dates).to_numpy(dtype='datetime64[ns]')
+    order = None
+    if not (times[1:] >= times[:-1]).all():
+        order = np.argsort(times, kind='stable')
+        times = times[order]
+
+    dca_dates = pd.date_range(
+        start=times[0],
+        end=times[-1],
+        freq=investment_interval,
+        normalize=True
+    ).to_numpy(dtype='datetime64[ns]')
+
+    bars = np.searchsorted(times, dca_dates, side='left')
+    bars = bars[bars < len(times)]
+    if order is not None:
+        bars = order[bars]
+    return prices[bars]
 
 
+@profiled
 def simulate_dca(
         df:pd.DataFrame,
         coin: str,
@@ -164,55 +570,52 @@ def simulate_dca(
         investment_interval:str,
         verbose:bool = True
     ) -> float:
+    """
+    Simulates buying trade_value of the coin every investment_interval
+    (dollar cost averaging) until the balance runs out.
 
-    balance = initial_capital  # Initial money in USD
-    coin_holdings = 0  # Number of coins owned
-    total_invested = 0 # Total money invested on DCA
-    final_balance = 0  # Final balance after simulation
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): DataFrame with 'date' and coin price columns. It is
+    not modified.
+    - coin (str): Coin that is being evaluated.
+    - initial_capital (float): Capital available for investment.
+    - trade_value (float): Value bought on each scheduled date.
+    - investment_interval (str): pandas frequency of the purchases, e.g.
+    'D', 'W' or 'MS'. A purchase on a date without data uses the next
+    available bar.
+    - verbose (bool): Whether to print the summary.
+    ----------
+    Returns
+    ----------
+    - dict: format_output of the simulation.
+    """
     final_price = df[coin].iloc[-1]  # Final price of the coin
-    btc_bought = 0 # Number of BTC bought
+    prices = _dca_purchases(
+        df['date'], df[coin].to_numpy(dtype=np.float64), investment_interval
+    )
 
-    # Normalize days to "YYYY-MM-DD" format
-    df["date"] = pd.to_datetime(df["date"]).dt.date
+    # Balance before each purchase, subtracted one purchase at a time
+    balances = np.subtract.accumulate(
+        np.concatenate([[initial_capital], np.full(len(prices), trade_value)])
+    )
+    coins_bought = np.add.accumulate(trade_value / prices)
+    invested = np.add.accumulate(np.full(len(prices), trade_value))
 
-    # Define days to buy based on investment interval
-    dca_dates = pd.date_range(
-        start=df['date'].min(), 
-        end=df['date'].max(), 
-        freq=investment_interval
-    ).normalize()
-
-    for date in dca_dates:
-        # Converts date to "YYYY-MM-DD" format
-        date = date.date()
-        price = df.loc[df['date'] == date, coin].values[0]
-
-        if balance < 0:
-            final_balance = balance + (coin_holdings * final_price)
-            if verbose:
-                print('Stop!')
-                print(f"Initial Capital: ${initial_capital:.2f}")
-                print(f"Coin Holdings: {coin_holdings:.8f} BTC")
-                print(f"Coin Holdings in dolars: ${coin_holdings*final_price:.2f}")
-                print(f"Total Invested: ${total_invested:.2f}")
-                print(f"Final Balance: ${final_balance:.2f}")
-                print(f"Total Profit/Loss: ${final_balance - initial_capital:.2f}")
-            return format_output(
-                initial_capital= initial_capital, 
-                coint_holdings= coin_holdings, 
-                final_price = final_price, 
-                total_invested = total_invested, 
-                final_balance = final_balance
-            )
+    # The schedule stops at the first purchase made with a negative balance
+    negative = np.flatnonzero(balances[:-1] < 0)
+    stopped = len(negative) > 0
+    purchases = negative[0] if stopped else len(prices)
 
-        if date in df['date'].values:
-            btc_bought = trade_value / price
-            coin_holdings += btc_bought
-            total_invested += trade_value
-            balance -= trade_value
+    balance = balances[purchases]
+    coin_holdings = coins_bought[purchases - 1] if purchases else 0
+    total_invested = invested[purchases - 1] if purchases else 0
 
     final_balance = balance + (coin_holdings * final_price)
     if verbose:
+        if stopped:
+            print('Stop!')
         print(f"Initial Capital: ${initial_capital:.2f}")
         print(f"Coin Holdings: {coin_holdings:.8f} BTC")
         print(f"Coin Holdings in dolars: ${coin_holdings*final_price:.2f}")
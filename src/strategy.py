@@ -0,0 +1,375 @@
+from src.signals import DEFAULT_WEIGHTS, _as_frame, _like, _signal, rolling_corr
+import pandas as pd
+import numpy as np
+
+# Indicators of the default strategy, in the order set_buy adds their votes
+DEFAULT_INDICATORS = {
+    'rsi': {},
+    'treasury_corr': {},
+    'bb': {},
+    'MACD': {},
+}
+
+# Indicator builders, see register_indicator
+INDICATORS = {}
+
+
+class Graph:
+    """
+    Lazy dependency graph of the intermediates of a strategy over one price
+    array (bars,) or matrix (bars x symbols).
+
+    Nodes are keyed by what they compute, e.g. ('ewm_mean', ('price',), 12),
+    so two indicators asking for the same intermediate share one node. A
+    node is only computed when an output depending on it is evaluated, and
+    then only once.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+    - rates (np.ndarray or callable, optional): Treasury rate aligned to the
+    bars, or a function returning it, called only if a node needs it.
+    """
+
+    def __init__(self, prices: np.ndarray, rates = None) -> None:
+        self.prices = prices
+        self.nodes = {
+            ('price',): (lambda: _as_frame(prices), ()),
+            ('rate',): (self._rates, ()),
+        }
+        self.values = {}
+        self._rate_source = rates
+
+    def _rates(self):
+        if self._rate_source is None:
+            raise ValueError("This strategy needs the treasury rate")
+        rates = self._rate_source
+        return rates() if callable(rates) else rates
+
+    def node(self, key: tuple, function, *dependencies) -> tuple:
+        """
+        Adds a node computing function(*dependency values), unless a node
+        with the same key exists, and returns its key.
+        """
+        if key not in self.nodes:
+            self.nodes[key] = (function, dependencies)
+        return key
+
+    def evaluate(self, key: tuple):
+        """
+        Value of a node, computing it and its dependencies if needed.
+        """
+        if key not in self.values:
+            function, dependencies = self.nodes[key]
+            self.values[key] = function(
+                *(self.evaluate(dependency) for dependency in dependencies)
+            )
+        return self.values[key]
+
+    def depends_on(self, key: tuple, dependency: tuple) -> bool:
+        """
+        Whether evaluating the node key would evaluate dependency.
+        """
+        pending, seen = [key], set()
+        while pending:
+            current = pending.pop()
+            if current == dependency:
+                return True
+            if current not in seen:
+                seen.add(current)
+                pending.extend(self.nodes[current][1])
+        return False
+
+    def signal(self, key: tuple) -> np.ndarray:
+        """
+        Value of a boolean node as an int8 array shaped like the prices.
+        """
+        return _like(_signal(self.evaluate(key)), self.prices)
+
+    # Shared intermediates
+
+    def price(self) -> tuple:
+        return ('price',)
+
+    def rate(self) -> tuple:
+        return ('rate',)
+
+    def diff(self, x: tuple) -> tuple:
+        return self.node(('diff', x), lambda value: value.diff(), x)
+
+    def rolling_mean(self, x: tuple, window: int, min_periods: int = 1) -> tuple:
+        return self.node(
+            ('rolling_mean', x, window, min_periods),
+            lambda value: value.rolling(
+                window, min_periods=min_periods
+            ).mean(),
+            x
+        )
+
+    def rolling_std(self, x: tuple, window: int, min_periods: int = 1) -> tuple:
+        return self.node(
+            ('rolling_std', x, window, min_periods),
+            lambda value: value.rolling(
+                window, min_periods=min_periods
+            ).std(),
+            x
+        )
+
+    def ewm_mean(self, x: tuple, span: int) -> tuple:
+        return self.node(
+            ('ewm_mean', x, span),
+            lambda value: value.ewm(span=span, adjust=False).mean(),
+            x
+        )
+
+    def rolling_corr(self, x: tuple, y: tuple, window: int) -> tuple:
+        return self.node(
+            ('rolling_corr', x, y, window),
+            lambda left, right: rolling_corr(
+                left.to_numpy(), np.asarray(right), window
+            ),
+            x, y
+        )
+
+    def crossover(self, fast: tuple, slow: tuple, direction: int) -> tuple:
+        """
+        Bars where fast crosses above (direction=1) or below (direction=-1)
+        slow.
+        """
+        def cross(fast, slow):
+            if direction > 0:
+                return (fast > slow) & (fast.shift(1) <= slow.shift(1))
+            return (fast < slow) & (fast.shift(1) >= slow.shift(1))
+        return self.node(('crossover', fast, slow, direction), cross, fast, slow)
+
+
+def register_indicator(name: str):
+    """
+    Registers an indicator builder under name.
+
+    A builder takes the Graph and the indicator parameters, adds the nodes
+    it needs through the Graph methods (or Graph.node for new ones) and
+    returns the keys of its (buy, sell) boolean nodes.
+    """
+    def register(builder):
+        INDICATORS[name] = builder
+        return builder
+    return register
+
+
+@register_indicator('rsi')
+def rsi_indicator(graph: Graph, PERIOD=14) -> tuple:
+    delta = graph.diff(graph.price())
+    gain = graph.node(
+        ('gain', delta), lambda value: value.where(value > 0, 0), delta
+    )
+    loss = graph.node(
+        ('loss', delta), lambda value: -value.where(value < 0, 0), delta
+    )
+    avg_gain = graph.rolling_mean(gain, PERIOD)
+    avg_loss = graph.rolling_mean(loss, PERIOD)
+    rsi = graph.node(
+        ('rsi', avg_gain, avg_loss),
+        lambda gain, loss: (100 - (100 / (1 + gain / loss))).to_numpy(),
+        avg_gain, avg_loss
+    )
+    return (
+        graph.node(('below', rsi, 30), lambda value: value < 30, rsi),
+        graph.node(('above', rsi, 70), lambda value: value > 70, rsi),
+    )
+
+
+@register_indicator('bb')
+def bollinger_indicator(graph: Graph, PERIOD=15, STD_FACTOR=1.5) -> tuple:
+    price = graph.price()
+    mean = graph.rolling_mean(price, PERIOD)
+    std = graph.rolling_std(price, PERIOD)
+    return (
+        graph.node(
+            ('bb_buy', price, mean, std, STD_FACTOR),
+            lambda price, mean, std: (
+                price.to_numpy() < mean.to_numpy() - std.to_numpy()*STD_FACTOR
+            ),
+            price, mean, std
+        ),
+        graph.node(
+            ('bb_sell', price, mean, std, STD_FACTOR),
+            lambda price, mean, std: (
+                price.to_numpy() > mean.to_numpy() + std.to_numpy()*STD_FACTOR
+            ),
+            price, mean, std
+        ),
+    )
+
+
+@register_indicator('MACD')
+def macd_indicator(
+        graph: Graph,
+        short_window = 12,
+        long_window = 26,
+        signal_window = 9
+    ) -> tuple:
+    ema_short = graph.ewm_mean(graph.price(), short_window)
+    ema_long = graph.ewm_mean(graph.price(), long_window)
+    macd = graph.node(
+        ('sub', ema_short, ema_long),
+        lambda short, long: short - long,
+        ema_short, ema_long
+    )
+    signal_line = graph.ewm_mean(macd, signal_window)
+    return (
+        graph.crossover(macd, signal_line, 1),
+        graph.crossover(macd, signal_line, -1),
+    )
+
+
+@register_indicator('treasury_corr')
+def treasury_corr_indicator(graph: Graph, PERIOD=90) -> tuple:
+    corr = graph.rolling_corr(graph.price(), graph.rate(), PERIOD)
+    return (
+        graph.node(('below', corr, -0.7), lambda value: value < -0.7, corr),
+        graph.node(('above', corr, 0.7), lambda value: value > 0.7, corr),
+    )
+
+
+@register_indicator('ema_cross')
+def ema_cross_indicator(graph: Graph, fast=12, slow=26) -> tuple:
+    ema_fast = graph.ewm_mean(graph.price(), fast)
+    ema_slow = graph.ewm_mean(graph.price(), slow)
+    return (
+        graph.crossover(ema_fast, ema_slow, 1),
+        graph.crossover(ema_fast, ema_slow, -1),
+    )
+
+
+class Strategy:
+    """
+    Declarative set_buy strategy: the indicators with their parameters,
+    the weight of each indicator vote and the threshold of the weighted
+    vote.
+
+    ---------
+    Parameters
+    ----------
+    - indicators (dict, optional): Parameters of each indicator keyed by
+    name, e.g. {'rsi': {'PERIOD': 14}}. An entry can use another name with
+    an 'indicator' key, e.g. {'rsi_fast': {'indicator': 'rsi', 'PERIOD':
+    7}}. Defaults to DEFAULT_INDICATORS.
+    - weights (dict, optional): Weight of each indicator vote, defaults to
+    DEFAULT_WEIGHTS. Indicators without a weight, or with a zero weight,
+    are never computed.
+    - THRESHOLD (float): threshold to set a buy or sell indication.
+    """
+
+    def __init__(
+            self,
+            indicators: dict = None,
+            weights: dict = None,
+            THRESHOLD=0.5
+        ) -> None:
+        self.indicators = DEFAULT_INDICATORS if indicators is None else indicators
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.THRESHOLD = THRESHOLD
+        for name, params in self.indicators.items():
+            kind = params.get('indicator', name)
+            if kind not in INDICATORS:
+                raise ValueError(f"Unknown indicator {kind!r} for {name!r}")
+        unknown = set(self.weights) - set(self.indicators)
+        if unknown:
+            raise ValueError(f"Weights of undefined indicators: {sorted(unknown)}")
+
+    def __repr__(self) -> str:
+        return (
+            f'Strategy(indicators={self.indicators!r}, '
+            f'weights={self.weights!r}, THRESHOLD={self.THRESHOLD!r})'
+        )
+
+    @classmethod
+    def from_dict(cls, spec: dict) -> 'Strategy':
+        """
+        Builds a strategy from a spec with 'indicators', 'weights' and
+        'THRESHOLD' entries, e.g. loaded from JSON.
+        """
+        return cls(
+            indicators=spec.get('indicators'),
+            weights=spec.get('weights'),
+            THRESHOLD=spec.get('THRESHOLD', 0.5)
+        )
+
+    def compile(self, prices: np.ndarray, rates = None) -> Graph:
+        """
+        Builds the graph of the strategy over a price array, with 'buy' and
+        'sell' output nodes. Nothing is computed until they are evaluated.
+
+        ---------
+        Parameters
+        ----------
+        - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+        - rates (np.ndarray or callable, optional): Treasury rate aligned to
+        the bars (see align_treasury_rate), or a function returning it.
+        ----------
+        Returns
+        ----------
+        - Graph: The compiled strategy.
+        """
+        graph = Graph(prices, rates)
+        votes = []
+        for name, params in self.indicators.items():
+            weight = self.weights.get(name, 0)
+            if np.all(np.equal(weight, 0)):
+                continue
+            params = {
+                key: value for key, value in params.items()
+                if key != 'indicator'
+            }
+            kind = self.indicators[name].get('indicator', name)
+            votes.append((INDICATORS[kind](graph, **params), weight))
+
+        for side in (0, 1):
+            keys = tuple(vote[side] for vote, _ in votes)
+            weights = [weight for _, weight in votes]
+
+            def vote(*signals, weights=weights):
+                metric = np.zeros(np.shape(prices))
+                for signal, weight in zip(signals, weights):
+                    metric = metric + _like(_signal(signal), prices)*weight
+                return metric > self.THRESHOLD
+
+            graph.node((('buy', 'sell')[side],), vote, *keys)
+        return graph
+
+    def uses_rate(self) -> bool:
+        """
+        Whether the weighted votes need the treasury rate, without
+        computing anything.
+        """
+        graph = self.compile(np.empty(0))
+        return any(
+            graph.depends_on((output,), graph.rate())
+            for output in ('buy', 'sell')
+        )
+
+    def evaluate(
+            self,
+            prices: np.ndarray,
+            rates = None,
+            outputs: tuple = ('buy', 'sell')
+        ) -> dict:
+        """
+        Computes outputs of the strategy, evaluating only the nodes they
+        depend on.
+
+        ---------
+        Parameters
+        ----------
+        - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols).
+        - rates (np.ndarray or callable, optional): See compile.
+        - outputs (tuple): Names of the output nodes, 'buy' and/or 'sell'.
+        ----------
+        Returns
+        ----------
+        - dict: int8 array shaped like prices for each output.
+        """
+        graph = self.compile(prices, rates)
+        return {output: graph.signal((output,)) for output in outputs}
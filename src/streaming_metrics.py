@@ -0,0 +1,374 @@
+from collections import deque
+from src.signals import DEFAULT_WEIGHTS
+import pandas as pd
+import math
+
+NaN = float('nan')
+
+
+def _is_negative(value: float) -> bool:
+    return math.copysign(1.0, value) < 0
+
+
+class RollingMean:
+    """
+    O(1) rolling mean over a fixed window, using the same Kahan-compensated
+    add/remove updates as pandas' rolling().mean() so both agree bar for bar.
+    """
+
+    def __init__(self, window: int, min_periods: int = None) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.values = deque()
+        self.nobs = 0
+        self.neg_ct = 0
+        self.sum_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self.value()
+
+    def _add(self, value: float) -> None:
+        if self.prev_value is None:
+            self.prev_value = value
+        if value != value:
+            return
+        self.nobs += 1
+        y = value - self.compensation_add
+        t = self.sum_x + y
+        self.compensation_add = t - self.sum_x - y
+        self.sum_x = t
+        if _is_negative(value):
+            self.neg_ct += 1
+
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+    def _remove(self, value: float) -> None:
+        if value != value:
+            return
+        self.nobs -= 1
+        y = -value - self.compensation_remove
+        t = self.sum_x + y
+        self.compensation_remove = t - self.sum_x - y
+        self.sum_x = t
+        if _is_negative(value):
+            self.neg_ct -= 1
+
+    def value(self) -> float:
+        if self.nobs < self.min_periods or self.nobs == 0:
+            return NaN
+        if self.num_consecutive_same_value >= self.nobs:
+            return self.prev_value
+        result = self.sum_x / self.nobs
+        if self.neg_ct == 0 and result < 0:
+            return 0.0
+        if self.neg_ct == self.nobs and result > 0:
+            return 0.0
+        return result
+
+
+class RollingVariance:
+    """
+    O(1) rolling variance over a fixed window with Welford add/remove
+    updates, matching pandas' rolling().var().
+    """
+
+    def __init__(
+            self,
+            window: int,
+            min_periods: int = None,
+            ddof: int = 1
+        ) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.ddof = ddof
+        self.values = deque()
+        self.nobs = 0
+        self.mean_x = 0.0
+        self.ssqdm_x = 0.0
+        self.compensation_add = 0.0
+        self.compensation_remove = 0.0
+        self.num_consecutive_same_value = 0
+        self.prev_value = None
+
+    def update(self, value: float) -> float:
+        if len(self.values) == self.window:
+            self._remove(self.values.popleft())
+        self.values.append(value)
+        self._add(value)
+        return self.value()
+
+    def _add(self, value: float) -> None:
+        if self.prev_value is None:
+            self.prev_value = value
+        if value != value:
+            return
+        if value == self.prev_value:
+            self.num_consecutive_same_value += 1
+        else:
+            self.num_consecutive_same_value = 1
+        self.prev_value = value
+
+        self.nobs += 1
+        prev_mean = self.mean_x - self.compensation_add
+        y = value - self.compensation_add
+        t = y - self.mean_x
+        self.compensation_add = t + self.mean_x - y
+        self.mean_x = self.mean_x + t / self.nobs
+        self.ssqdm_x = self.ssqdm_x + (value - prev_mean) * (value - self.mean_x)
+
+    def _remove(self, value: float) -> None:
+        if value != value:
+            return
+        self.nobs -= 1
+        if self.nobs:
+            prev_mean = self.mean_x - self.compensation_remove
+            y = value - self.compensation_remove
+            t = y - self.mean_x
+            self.compensation_remove = t + self.mean_x - y
+            self.mean_x = self.mean_x - t / self.nobs
+            self.ssqdm_x = (
+                self.ssqdm_x - (value - prev_mean) * (value - self.mean_x)
+            )
+        else:
+            self.mean_x = 0.0
+            self.ssqdm_x = 0.0
+
+    def value(self) -> float:
+        if self.nobs < self.min_periods or self.nobs <= self.ddof:
+            return NaN
+        if self.nobs == 1 or self.num_consecutive_same_value >= self.nobs:
+            return 0.0
+        return self.ssqdm_x / (self.nobs - self.ddof)
+
+    def std(self) -> float:
+        variance = self.value()
+        if variance != variance:
+            return variance
+        return math.sqrt(variance) if variance > 0 else 0.0
+
+
+class ExponentialMean:
+    """
+    O(1) exponential moving average, matching pandas'
+    ewm(span=span, adjust=False).mean().
+    """
+
+    def __init__(self, span: float) -> None:
+        self.alpha = 1. / (1. + (span - 1) / 2.0)
+        self.old_wt_factor = 1. - self.alpha
+        self.weighted = None
+
+    def update(self, value: float) -> float:
+        if self.weighted is None or self.weighted != self.weighted:
+            self.weighted = value
+        elif value == value:
+            old_wt = self.old_wt_factor
+            if self.weighted != value:
+                self.weighted = (
+                    (old_wt * self.weighted + self.alpha * value)
+                    / (old_wt + self.alpha)
+                )
+        return self.weighted
+
+
+class RollingCorrelation:
+    """
+    O(1) rolling Pearson correlation between two series, computed the way
+    pandas' rolling().corr() does (pairwise NaN masking, rolling means and
+    variances). Windows where either series is constant have no defined
+    correlation and return NaN, where pandas returns rounding noise.
+    """
+
+    def __init__(self, window: int) -> None:
+        self.mean_x_y = RollingMean(window)
+        self.mean_x = RollingMean(window)
+        self.mean_y = RollingMean(window)
+        self.var_x = RollingVariance(window)
+        self.var_y = RollingVariance(window)
+        self.pairs = deque()
+        self.window = window
+        self.count = 0
+
+    def update(self, x: float, y: float) -> float:
+        x, y = x + 0 * y, y + 0 * x
+        mean_x_y = self.mean_x_y.update(x * y)
+        mean_x = self.mean_x.update(x)
+        mean_y = self.mean_y.update(y)
+        var_x = self.var_x.update(x)
+        var_y = self.var_y.update(y)
+
+        if len(self.pairs) == self.window:
+            self.count -= self.pairs.popleft()
+        self.pairs.append(x == x)
+        self.count += x == x
+
+        denominator = (var_x * var_y) ** 0.5
+        if self.count < 2 or not denominator > 0:
+            return NaN
+        numerator = (mean_x_y - mean_x * mean_y) * (
+            self.count / (self.count - 1)
+        )
+        return numerator / denominator
+
+
+class StreamingCryptoMetrics:
+    """
+    Stateful, per coin version of CryptoMetrics.set_buy for live signals.
+
+    Keeps O(1) rolling state for the RSI, Bollinger Bands, MACD and treasury
+    rate correlation, so each new candle costs a few microseconds instead of
+    recomputing the whole history. The rolling updates replicate the pandas
+    kernels used by the batch calculate_* methods, so the signals match them
+    bar for bar.
+
+    ---------
+    Parameters
+    ----------
+    - coin (str): Coin that is being evaluated.
+    - treasury_data (pd.DataFrame, optional): Output of get_treasury_rate.
+    Candles can also carry their own 'treasury_rate'.
+    - THRESHOLD (float): threshold to set a buy or sell indication.
+    - weights (dict, optional): Weight of each indicator, defaults to the
+    set_buy weights.
+    """
+
+    def __init__(
+            self,
+            coin: str,
+            treasury_data: pd.DataFrame = None,
+            THRESHOLD=0.5,
+            weights: dict = None,
+            rsi_period=14,
+            corr_period=90,
+            bb_period=15,
+            bb_std_factor=1.5,
+            short_window=12,
+            long_window=26,
+            signal_window=9
+        ) -> None:
+        self.coin = coin
+        self.THRESHOLD = THRESHOLD
+        self.weights = DEFAULT_WEIGHTS if weights is None else weights
+        self.bb_std_factor = bb_std_factor
+
+        self.treasury_rates = {}
+        if treasury_data is not None:
+            self.treasury_rates = dict(zip(
+                treasury_data['date'], treasury_data['treasury_rate']
+            ))
+        self.treasury_rate = NaN
+
+        self.prev_price = NaN
+        self.avg_gain = RollingMean(rsi_period, min_periods=1)
+        self.avg_loss = RollingMean(rsi_period, min_periods=1)
+        self.bb_mean = RollingMean(bb_period, min_periods=1)
+        self.bb_var = RollingVariance(bb_period, min_periods=1)
+        self.ema_short = ExponentialMean(short_window)
+        self.ema_long = ExponentialMean(long_window)
+        self.signal_line = ExponentialMean(signal_window)
+        self.prev_macd = NaN
+        self.prev_signal_line = NaN
+        self.treasury_corr = RollingCorrelation(corr_period)
+
+    def update(self, candle: dict) -> dict:
+        """
+        Updates the indicators with a closed candle.
+
+        ---------
+        Parameters
+        ----------
+        - candle (dict): Candle with a 'date' and the coin price under the
+        coin name (or 'close'), and optionally a 'treasury_rate'.
+        ----------
+        Returns
+        ----------
+        - dict: Indicator values, their buy/sell signals and the weighted
+        'buy'/'sell' decisions of set_buy for this candle.
+        """
+        price = float(candle[self.coin] if self.coin in candle else candle['close'])
+        date = candle['date']
+
+        rate = candle.get('treasury_rate', self.treasury_rates.get(date, NaN))
+        if rate == rate:
+            self.treasury_rate = float(rate)
+
+        # RSI
+        delta = price - self.prev_price
+        gain = delta if delta > 0 else 0.0
+        loss = -(delta if delta < 0 else 0.0)
+        self.prev_price = price
+        avg_gain = self.avg_gain.update(gain)
+        avg_loss = self.avg_loss.update(loss)
+        rsi = 100 - (100 / (1 + _divide(avg_gain, avg_loss)))
+
+        # Bollinger Bands
+        mean = self.bb_mean.update(price)
+        self.bb_var.update(price)
+        std = self.bb_var.std()
+        bb_buy = price < mean - std * self.bb_std_factor
+        bb_sell = price > mean + std * self.bb_std_factor
+
+        # MACD
+        macd = self.ema_short.update(price) - self.ema_long.update(price)
+        signal_line = self.signal_line.update(macd)
+        macd_buy = (
+            macd > signal_line and self.prev_macd <= self.prev_signal_line
+        )
+        macd_sell = (
+            macd < signal_line and self.prev_macd >= self.prev_signal_line
+        )
+        self.prev_macd = macd
+        self.prev_signal_line = signal_line
+
+        # Treasury rate correlation
+        corr = self.treasury_corr.update(price, self.treasury_rate)
+
+        signals = {
+            'date': date,
+            self.coin: price,
+            'rsi': rsi,
+            'rsi_buy': int(rsi < 30),
+            'rsi_sell': int(rsi > 70),
+            'treasury_corr': corr,
+            'treasury_corr_buy': int(corr < -0.7),
+            'treasury_corr_sell': int(corr > 0.7),
+            'bb_buy': int(bb_buy),
+            'bb_sell': int(bb_sell),
+            'MACD': macd,
+            'Signal_Line': signal_line,
+            'MACD_buy': int(macd_buy),
+            'MACD_sell': int(macd_sell),
+        }
+        for side in ('buy', 'sell'):
+            metric = (
+                signals[f'rsi_{side}']*self.weights['rsi'] +
+                signals[f'treasury_corr_{side}']*self.weights['treasury_corr'] +
+                signals[f'bb_{side}']*self.weights['bb'] +
+                signals[f'MACD_{side}']*self.weights['MACD']
+            )
+            signals[side] = int(metric > self.THRESHOLD)
+        return signals
+
+
+def _divide(numerator: float, denominator: float) -> float:
+    """
+    Float division with NumPy semantics (x/0 gives inf or NaN).
+    """
+    if denominator == 0:
+        if numerator != numerator or numerator == 0:
+            return NaN
+        sign = math.copysign(1.0, numerator) * math.copysign(1.0, denominator)
+        return math.copysign(math.inf, sign)
+    return numerator / denominator
@@ -0,0 +1,124 @@
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from itertools import repeat
+from src.simulations import simulate_signals_batch
+from src.signals import DEFAULT_WEIGHTS
+import numpy as np
+
+# Views on the shared memory blocks attached by each worker process.
+WORKER_ARRAYS = {}
+_WORKER_BLOCKS = []
+
+
+def evaluate_configs(
+        arrays: dict,
+        indexes: dict,
+        weights: np.ndarray,
+        thresholds: np.ndarray,
+        trade_values: np.ndarray,
+        initial_capital: float
+    ) -> dict:
+    """
+    Builds the (configs x bars) buy/sell matrices for a block of
+    configurations and simulates them in one batch.
+
+    ---------
+    Parameters
+    ----------
+    - arrays (dict): 'prices' and the '{indicator}_{side}' signal tables of
+    compute_signal_tables.
+    - indexes (dict): Row of each configuration in the indicator tables.
+    - weights (np.ndarray): (configs x indicators) vote weights, in the
+    DEFAULT_WEIGHTS order.
+    - thresholds (np.ndarray): Vote threshold of each configuration.
+    - trade_values (np.ndarray): Trade value of each configuration.
+    - initial_capital (float): Capital available for investment.
+    ----------
+    Returns
+    ----------
+    - dict: simulate_signals_batch output, one value per configuration.
+    """
+    votes = {}
+    for side in ('buy', 'sell'):
+        metric = 0
+        for column, indicator in enumerate(DEFAULT_WEIGHTS):
+            signal = arrays[f'{indicator}_{side}'][indexes[indicator]]
+            metric = metric + signal * weights[:, column, None]
+        votes[side] = metric > thresholds[:, None]
+
+    return simulate_signals_batch(
+        prices=arrays['prices'],
+        buy=votes['buy'],
+        sell=votes['sell'],
+        initial_capital=initial_capital,
+        trade_value=trade_values
+    )
+
+
+def share_arrays(arrays: dict) -> tuple:
+    """
+    Copies arrays into new shared memory blocks.
+
+    ---------
+    Returns
+    ----------
+    - tuple: (blocks, specs). The caller closes and unlinks the blocks;
+    specs is what attach_shared needs to map them in a worker.
+    """
+    blocks = []
+    specs = {}
+    for name, array in arrays.items():
+        block = shared_memory.SharedMemory(
+            create=True, size=max(array.nbytes, 1)
+        )
+        blocks.append(block)
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        specs[name] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach_shared(specs: dict) -> None:
+    """
+    Process pool initializer mapping the shared blocks of share_arrays
+    into WORKER_ARRAYS.
+    """
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        _WORKER_BLOCKS.append(block)
+        WORKER_ARRAYS[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+
+
+def _call_shared(function, *args):
+    return function(WORKER_ARRAYS, *args)
+
+
+def map_shared(function, arrays: dict, n_jobs: int, *iterables) -> list:
+    """
+    Calls function(arrays, *args) for every args of zip(*iterables), in a
+    pool of n_jobs processes reading arrays from shared memory.
+
+    ---------
+    Parameters
+    ----------
+    - function (callable): Module level function, so it can be sent to the
+    workers.
+    - arrays (dict): Arrays shared with the workers.
+    - n_jobs (int): Number of worker processes.
+    - *iterables: Other arguments of each call, as for map.
+    ----------
+    Returns
+    ----------
+    - list: Output of each call, in order.
+    """
+    shared, specs = share_arrays(arrays)
+    try:
+        with ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=attach_shared,
+                initargs=(specs,)
+            ) as pool:
+            return list(pool.map(_call_shared, repeat(function), *iterables))
+    finally:
+        for block in shared:
+            block.close()
+            block.unlink()
@@ -0,0 +1,470 @@
+from src.profiling import profiled
+import pandas as pd
+import numpy as np
+
+# Scale of the Parkinson estimator, 1 / (4 ln 2)
+PARKINSON_FACTOR = 1 / (4 * np.log(2))
+
+# Weight of the open to close term of the Garman-Klass estimator
+GARMAN_KLASS_FACTOR = 2 * np.log(2) - 1
+
+
+def _as_matrix(values) -> np.ndarray:
+    values = np.asarray(values, dtype=np.float64)
+    return values.reshape(len(values), -1)
+
+
+def _annualize(volatility: np.ndarray, periods_per_year: float = None):
+    if periods_per_year is not None:
+        volatility *= np.sqrt(periods_per_year)
+    return volatility
+
+
+# Cells per channel of the row chunks the rolling kernels work on, so
+# their sums stay in the CPU cache
+CHUNK_CELLS = 2**17
+
+
+def _rolling_moments(x: np.ndarray, valid: np.ndarray, window: int) -> tuple:
+    """
+    Rolling count, sum and sum of squares of the (bars, symbols) array x,
+    from cumulative sums over blocks of window bars.
+
+    As in src.signals._rolling_corr_window, each block is centered on its
+    own mean and the tail sums of the previous block are shifted to that
+    center, so the sums never span more than two blocks. The sums are
+    returned centered, with the center of each row.
+    """
+    bars, symbols = x.shape
+    n_blocks = -(-bars // window)
+
+    sums = np.zeros((3, n_blocks * window, symbols))
+    blocks = sums.reshape(3, n_blocks, window, symbols)
+    n, sx, sxx = blocks
+    sums[0, :bars] = valid
+    np.copyto(sums[1, :bars], x, where=valid)
+
+    center = sx.sum(axis=1) / np.maximum(n.sum(axis=1), 1)
+    sx -= center[:, None]
+    sx *= n
+    np.multiply(sx, sx, out=sxx)
+    np.cumsum(blocks, axis=2, out=blocks)
+
+    tail = blocks[:, :-1, -1:] - blocks[:, :-1, :-1]
+    tn, tx, txx = tail
+    shift = (center[1:] - center[:-1])[:, None]
+    txx -= shift*(2*tx - tn*shift)
+    tx -= tn*shift
+    blocks[:, 1:, :-1] += tail
+
+    centers = np.repeat(center, window, axis=0)[:bars]
+    nobs, sx, sxx = sums[:, :bars]
+    return nobs, sx, sxx, centers
+
+
+def _row_chunks(bars: int, symbols: int, window: int):
+    """
+    Splits the bars into chunks of whole blocks of window bars. Each chunk
+    also reads the block before it, which the windows of its first block
+    need: yields (read, write) row slices, write relative to read.
+    """
+    chunk_blocks = max(CHUNK_CELLS // max(symbols, 1) // window, 1)
+    for first_block in range(0, -(-bars // window), chunk_blocks):
+        start = first_block * window
+        end = min(start + chunk_blocks * window, bars)
+        read_start = max(start - window, 0)
+        yield (
+            slice(read_start, end),
+            slice(start - read_start, end - read_start)
+        )
+
+
+def _rolling_mean(
+        x: np.ndarray,
+        window: int,
+        min_periods: int = None
+    ) -> np.ndarray:
+    """
+    Rolling mean of the non NaN values of the (bars, symbols) array x.
+    """
+    min_periods = window if min_periods is None else min_periods
+    mean = np.empty_like(x)
+    for read, write in _row_chunks(*x.shape, window):
+        rows = x[read]
+        nobs, sx, _, centers = _rolling_moments(rows, ~np.isnan(rows), window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chunk = sx / nobs + centers
+        chunk[nobs < max(min_periods, 1)] = np.nan
+        mean[read][write] = chunk[write]
+    return mean
+
+
+def returns_matrix(prices: np.ndarray, log: bool = False) -> np.ndarray:
+    """
+    Bar to bar returns of a price array or (bars x symbols) matrix.
+
+    ---------
+    Parameters
+    ----------
+    - prices (np.ndarray): Prices with shape (bars,) or (bars, symbols),
+    NaN where a symbol has no price.
+    - log (bool): Whether to return log returns instead of simple ones.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Returns with the shape of prices. The first bar, and the
+    bars following a missing price, are NaN like pct_change(fill_method=None).
+    """
+    prices = np.asarray(prices, dtype=np.float64)
+    returns = np.full(prices.shape, np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        if log:
+            np.log(prices[1:] / prices[:-1], out=returns[1:])
+        else:
+            np.subtract(prices[1:] / prices[:-1], 1, out=returns[1:])
+    return returns
+
+
+@profiled
+def rolling_volatility(
+        returns: np.ndarray,
+        window: int = 15,
+        min_periods: int = None,
+        ddof: int = 1,
+        periods_per_year: float = None
+    ) -> np.ndarray:
+    """
+    Rolling standard deviation of returns, for every symbol at once.
+
+    Computed from blocked cumulative sums (see _rolling_moments) in a few
+    array passes, whatever the number of symbols. Matches pandas'
+    rolling(window).std() up to rounding.
+
+    ---------
+    Parameters
+    ----------
+    - returns (np.ndarray): Returns with shape (bars,) or (bars, symbols),
+    e.g. from returns_matrix.
+    - window (int): Number of bars of each window.
+    - min_periods (int, optional): Valid returns required in a window.
+    Defaults to the window size.
+    - ddof (int): Delta degrees of freedom of the variance.
+    - periods_per_year (float, optional): Bars per year to annualize the
+    volatility, e.g. 365 for daily klines. Per bar volatility when None.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Volatility with the shape of returns.
+    """
+    x = _as_matrix(returns)
+    min_periods = window if min_periods is None else min_periods
+    variance = np.empty_like(x)
+    for read, write in _row_chunks(*x.shape, window):
+        rows = x[read]
+        nobs, sx, sxx, _ = _rolling_moments(rows, ~np.isnan(rows), window)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            chunk = (sxx - sx*sx/nobs) / (nobs - ddof)
+        np.maximum(chunk, 0, out=chunk)
+        chunk[(nobs < max(min_periods, 1)) | (nobs <= ddof)] = np.nan
+        variance[read][write] = chunk[write]
+    volatility = _annualize(np.sqrt(variance, out=variance), periods_per_year)
+    return volatility.reshape(np.shape(returns))
+
+
+@profiled
+def ewma_volatility(
+        returns: np.ndarray,
+        decay: float = 0.94,
+        min_periods: int = 1,
+        periods_per_year: float = None
+    ) -> np.ndarray:
+    """
+    RiskMetrics exponentially weighted volatility, for every symbol at once.
+
+    The variance is updated once per bar, variance = decay*variance +
+    (1 - decay)*return**2, starting from the first squared return (zero mean
+    returns are assumed). A missing return keeps the previous variance.
+
+    ---------
+    Parameters
+    ----------
+    - returns (np.ndarray): Returns with shape (bars,) or (bars, symbols).
+    - decay (float): Weight of the previous variance, 0.94 in RiskMetrics
+    for daily returns.
+    - min_periods (int): Valid returns required before the volatility is
+    defined.
+    - periods_per_year (float, optional): Bars per year to annualize the
+    volatility. Per bar volatility when None.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Volatility with the shape of returns.
+    """
+    # pandas' adjust=False recursion is the O(1) per bar update above
+    variance = pd.DataFrame(np.square(_as_matrix(returns))).ewm(
+        alpha=1 - decay,
+        adjust=False,
+        ignore_na=True,
+        min_periods=max(min_periods, 1)
+    ).mean().to_numpy()
+    volatility = _annualize(np.sqrt(variance), periods_per_year)
+    return volatility.reshape(np.shape(returns))
+
+
+@profiled
+def parkinson_volatility(
+        high: np.ndarray,
+        low: np.ndarray,
+        window: int = 15,
+        min_periods: int = None,
+        periods_per_year: float = None
+    ) -> np.ndarray:
+    """
+    Rolling Parkinson volatility from the high and low of each bar:
+    sqrt(mean(ln(high/low)**2) / (4 ln 2)) over the window.
+
+    ---------
+    Parameters
+    ----------
+    - high (np.ndarray): Highs with shape (bars,) or (bars, symbols).
+    - low (np.ndarray): Lows with the shape of high.
+    - window (int): Number of bars of each window.
+    - min_periods (int, optional): Valid bars required in a window.
+    Defaults to the window size.
+    - periods_per_year (float, optional): Bars per year to annualize the
+    volatility. Per bar volatility when None.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Volatility with the shape of high.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        range_term = np.square(np.log(_as_matrix(high) / _as_matrix(low)))
+    variance = _rolling_mean(range_term, window, min_periods) * PARKINSON_FACTOR
+    np.maximum(variance, 0, out=variance)
+    volatility = _annualize(np.sqrt(variance), periods_per_year)
+    return volatility.reshape(np.shape(high))
+
+
+@profiled
+def garman_klass_volatility(
+        open: np.ndarray,
+        high: np.ndarray,
+        low: np.ndarray,
+        close: np.ndarray,
+        window: int = 15,
+        min_periods: int = None,
+        periods_per_year: float = None
+    ) -> np.ndarray:
+    """
+    Rolling Garman-Klass volatility from the OHLC of each bar:
+    sqrt(mean(0.5 ln(high/low)**2 - (2 ln 2 - 1) ln(close/open)**2)) over
+    the window.
+
+    ---------
+    Parameters
+    ----------
+    - open (np.ndarray): Opens with shape (bars,) or (bars, symbols).
+    - high (np.ndarray): Highs with the shape of open.
+    - low (np.ndarray): Lows with the shape of open.
+    - close (np.ndarray): Closes with the shape of open.
+    - window (int): Number of bars of each window.
+    - min_periods (int, optional): Valid bars required in a window.
+    Defaults to the window size.
+    - periods_per_year (float, optional): Bars per year to annualize the
+    volatility. Per bar volatility when None.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: Volatility with the shape of open.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        range_term = np.square(np.log(_as_matrix(high) / _as_matrix(low)))
+        body_term = np.square(np.log(_as_matrix(close) / _as_matrix(open)))
+    terms = 0.5*range_term - GARMAN_KLASS_FACTOR*body_term
+    variance = _rolling_mean(terms, window, min_periods)
+    np.maximum(variance, 0, out=variance)
+    volatility = _annualize(np.sqrt(variance), periods_per_year)
+    return volatility.reshape(np.shape(open))
+
+
+def _center(rows: np.ndarray) -> np.ndarray:
+    """
+    Mean of each column of rows, ignoring NaNs (0 for empty columns).
+    """
+    counts = np.maximum((~np.isnan(rows)).sum(axis=0), 1)
+    return np.nansum(rows, axis=0) / counts
+
+
+def _cross_sums(x: np.ndarray, center: np.ndarray) -> list:
+    """
+    Pairwise sums of the (rows, symbols) array x around center, counting
+    only the rows where both symbols have a value: [count, sum of x_i,
+    sum of x_i**2, sum of x_i*x_j], each a (symbols, symbols) matrix.
+    """
+    valid = ~np.isnan(x)
+    mask = valid.astype(np.float64)
+    x0 = np.where(valid, x - center, 0)
+    return [
+        mask.T @ mask,
+        x0.T @ mask,
+        np.square(x0).T @ mask,
+        x0.T @ x0,
+    ]
+
+
+def _covariance(sums: list, min_periods: int, ddof: int = 1) -> np.ndarray:
+    n, sx, _, sxy = sums
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = (sxy - sx*sx.T/n) / (n - ddof)
+    covariance[(n < max(min_periods, 1)) | (n <= ddof)] = np.nan
+    return covariance
+
+
+def _correlation(sums: list, min_periods: int) -> np.ndarray:
+    n, sx, sxx, sxy = sums
+    eps = 2 * n * np.finfo(np.float64).eps
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # Variances over the rows where the other symbol has a value too
+        variance = sxx - sx*sx/n
+        # Constant windows only differ from zero variance by rounding.
+        defined = (
+            (n >= max(min_periods, 2))
+            & (variance > eps*sxx)
+            & (variance.T > eps*sxx.T)
+        )
+        correlation = (sxy - sx*sx.T/n) / np.sqrt(variance * variance.T)
+    np.clip(correlation, -1, 1, out=correlation)
+    correlation[~defined] = np.nan
+    return correlation
+
+
+class RollingCovariance:
+    """
+    O(1) rolling covariance and correlation matrices across symbols.
+
+    Each update adds the pairwise sums (see _cross_sums) of the new row of
+    returns and removes those of the row leaving the window, so a bar costs
+    O(symbols**2) whatever the window. Every window updates, the sums are
+    recomputed from the buffered rows around their mean, which bounds the
+    rounding drift of the add/remove updates. Pairs are only counted on the
+    rows where both symbols have a return, as pandas' rolling().cov() does.
+
+    ---------
+    Parameters
+    ----------
+    - n_symbols (int): Number of symbols of each row.
+    - window (int): Number of rows of each window.
+    - min_periods (int, optional): Valid pairs required for a defined
+    covariance. Defaults to the window size.
+    """
+
+    def __init__(
+            self,
+            n_symbols: int,
+            window: int,
+            min_periods: int = None
+        ) -> None:
+        self.window = window
+        self.min_periods = window if min_periods is None else min_periods
+        self.rows = np.full((window, n_symbols), np.nan)
+        self.center = np.zeros(n_symbols)
+        self.sums = _cross_sums(self.rows[:0], self.center)
+        self.count = 0
+
+    def update(self, returns: np.ndarray) -> None:
+        """
+        Adds the returns of one bar, NaN where a symbol has none.
+        """
+        slot = self.count % self.window
+        row = np.asarray(returns, dtype=np.float64)[None, :]
+        self.count += 1
+        if slot == self.window - 1 or self.count <= self.window:
+            self.rows[slot] = row
+            if slot == self.window - 1:
+                self._recompute()
+            else:
+                self._add(row, 1)
+            return
+        self._add(self.rows[slot:slot + 1], -1)
+        self.rows[slot] = row
+        self._add(row, 1)
+
+    def _add(self, row: np.ndarray, sign: int) -> None:
+        for total, term in zip(self.sums, _cross_sums(row, self.center)):
+            if sign > 0:
+                total += term
+            else:
+                total -= term
+
+    def _recompute(self) -> None:
+        rows = self.rows[:min(self.count, self.window)]
+        self.center = _center(rows)
+        self.sums = _cross_sums(rows, self.center)
+
+    def covariance(self, ddof: int = 1) -> np.ndarray:
+        """
+        (symbols x symbols) covariance matrix of the current window.
+        """
+        return _covariance(self.sums, self.min_periods, ddof)
+
+    def correlation(self) -> np.ndarray:
+        """
+        (symbols x symbols) correlation matrix of the current window.
+        """
+        return _correlation(self.sums, self.min_periods)
+
+
+@profiled
+def rolling_covariance(
+        returns: np.ndarray,
+        window: int = 30,
+        at: np.ndarray = None,
+        min_periods: int = None,
+        correlation: bool = False
+    ) -> np.ndarray:
+    """
+    Rolling covariance (or correlation) matrices across all symbols.
+
+    With at, each requested window is computed directly with matrix
+    products; otherwise a RollingCovariance is updated bar by bar and every
+    matrix is kept, which takes bars * symbols**2 floats.
+
+    ---------
+    Parameters
+    ----------
+    - returns (np.ndarray): (bars x symbols) returns.
+    - window (int): Number of bars of each window.
+    - at (np.ndarray, optional): Bars whose window matrices are returned,
+    defaults to every bar.
+    - min_periods (int, optional): Valid pairs required in a window.
+    Defaults to the window size.
+    - correlation (bool): Whether to return correlations instead of
+    covariances.
+    ----------
+    Returns
+    ----------
+    - np.ndarray: (len(at) or bars, symbols, symbols) matrices, NaN for the
+    pairs without enough valid rows.
+    """
+    x = _as_matrix(returns)
+    bars, n_symbols = x.shape
+    min_periods = window if min_periods is None else min_periods
+    reduce = _correlation if correlation else _covariance
+
+    if at is not None:
+        at = np.atleast_1d(at)
+        matrices = np.empty((len(at), n_symbols, n_symbols))
+        for position, bar in enumerate(at):
+            rows = x[max(bar - window + 1, 0):bar + 1]
+            matrices[position] = reduce(
+                _cross_sums(rows, _center(rows)), min_periods
+            )
+        return matrices
+
+    rolling = RollingCovariance(n_symbols, window, min_periods)
+    matrices = np.empty((bars, n_symbols, n_symbols))
+    for bar in range(bars):
+        rolling.update(x[bar])
+        matrices[bar] = reduce(rolling.sums, min_periods)
+    return matrices
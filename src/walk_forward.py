@@ -0,0 +1,208 @@
+from src.get_treasury_rate import get_treasury_rate
+from src.simulations import roi
+from src.signals import DEFAULT_WEIGHTS, align_treasury_rate
+from src.parameter_sweep import compute_signal_tables, expand_grid
+from src.sweep_workers import evaluate_configs, map_shared
+import pandas as pd
+import numpy as np
+
+
+def walk_forward_splits(
+        n_bars: int,
+        train_size: int,
+        test_size: int,
+        step: int = None,
+        anchored: bool = False
+    ) -> list:
+    """
+    Splits n_bars into consecutive train/test windows.
+
+    ---------
+    Parameters
+    ----------
+    - n_bars (int): Number of bars of the history.
+    - train_size (int): Number of bars of each train window.
+    - test_size (int): Number of bars of each test window.
+    - step (int, optional): Bars between the start of two folds. Defaults to
+    test_size, so the test windows do not overlap.
+    - anchored (bool): Whether every train window starts at the first bar
+    (expanding window) instead of rolling with the folds.
+    ----------
+    Returns
+    ----------
+    - list: (train_start, test_start, test_end) bar indexes of each fold.
+    The train window is [train_start, test_start) and the test window
+    [test_start, test_end).
+    """
+    if step is None:
+        step = test_size
+
+    folds = []
+    start = 0
+    while start + train_size + test_size <= n_bars:
+        test_start = start + train_size
+        folds.append((0 if anchored else start, test_start, test_start + test_size))
+        start += step
+    return folds
+
+
+def _slice_arrays(arrays: dict, start: int, end: int) -> dict:
+    return {name: array[..., start:end] for name, array in arrays.items()}
+
+
+def _evaluate_fold(
+        arrays: dict,
+        indexes: dict,
+        weights: np.ndarray,
+        thresholds: np.ndarray,
+        trade_values: np.ndarray,
+        initial_capital: float,
+        fold: tuple,
+        chunk_size: int
+    ) -> dict:
+    """
+    Simulates every configuration on the train window of a fold, then the
+    best one on its test window.
+    """
+    train_start, test_start, test_end = fold
+    train = _slice_arrays(arrays, train_start, test_start)
+
+    train_balances = []
+    for start in range(0, len(thresholds), chunk_size):
+        block = slice(start, start + chunk_size)
+        output = evaluate_configs(
+            train,
+            {name: index[block] for name, index in indexes.items()},
+            weights[block],
+            thresholds[block],
+            trade_values[block],
+            initial_capital
+        )
+        train_balances.append(output['final_balance'])
+    train_balances = np.concatenate(train_balances)
+
+    # argmax keeps the first of tied configurations
+    best = int(np.argmax(train_balances))
+    block = slice(best, best + 1)
+    test = evaluate_configs(
+        _slice_arrays(arrays, test_start, test_end),
+        {name: index[block] for name, index in indexes.items()},
+        weights[block],
+        thresholds[block],
+        trade_values[block],
+        initial_capital
+    )
+    return {
+        'config': best,
+        'train_final_balance': train_balances[best],
+        **{key: value[0] for key, value in test.items()},
+    }
+
+
+def walk_forward(
+        df: pd.DataFrame,
+        coin: str,
+        grid: dict,
+        initial_capital: float,
+        train_size: int,
+        test_size: int,
+        step: int = None,
+        anchored: bool = False,
+        lookback: int = None,
+        treasury_data: pd.DataFrame = None,
+        n_jobs: int = 1,
+        chunk_size: int = 512
+    ) -> pd.DataFrame:
+    """
+    Walk-forward backtest of set_buy + simulate_model_trader.
+
+    On each fold, every configuration of the grid (THRESHOLD, weights or
+    any other sweep parameter) is simulated on the train window, and the
+    one with the highest final balance is simulated on the following test
+    window. Indicators only look back, so they are computed once over the
+    whole history and sliced per fold. Each test window starts again from
+    initial_capital, which makes the folds independent; with n_jobs > 1
+    they run in a process pool reading the indicator tables from shared
+    memory.
+
+    ---------
+    Parameters
+    ----------
+    - df (pd.DataFrame): Output of get_historical_data for the coin.
+    - coin (str): Coin that is being evaluated.
+    - grid (dict): Lists of values keyed by parameter name (see
+    parameter_sweep.DEFAULT_GRID).
+    - initial_capital (float): Capital available on each fold.
+    - train_size (int): Number of bars of each train window.
+    - test_size (int): Number of bars of each test window.
+    - step (int, optional): Bars between two folds, defaults to test_size.
+    - anchored (bool): Whether the train windows all start at the first bar.
+    - lookback (int, optional): Lookback used to fetch the treasury rate.
+    - treasury_data (pd.DataFrame, optional): Treasury rate already fetched,
+    skips the call to get_treasury_rate.
+    - n_jobs (int): Number of worker processes.
+    - chunk_size (int): Number of configurations simulated per block.
+    ----------
+    Returns
+    ----------
+    - pd.DataFrame: One row per fold with its dates, the selected
+    parameters, the train final balance and the test simulation results.
+    """
+    if treasury_data is None:
+        treasury_data = get_treasury_rate(lookback=lookback)
+
+    df = df.reset_index(drop=True)
+    prices = np.ascontiguousarray(df[coin].to_numpy(dtype=np.float64))
+    rates = align_treasury_rate(df['date'], treasury_data)
+
+    folds = walk_forward_splits(len(df), train_size, test_size, step, anchored)
+    if not folds:
+        raise ValueError(
+            f"{len(df)} bars are not enough for a {train_size} bar train "
+            f"and {test_size} bar test window"
+        )
+
+    configs = expand_grid(grid)
+    tables, indexes = compute_signal_tables(prices, rates, configs)
+    arrays = {'prices': prices, **tables}
+
+    weights = configs[
+        [f'weight_{indicator}' for indicator in DEFAULT_WEIGHTS]
+    ].to_numpy(dtype=np.float64)
+    thresholds = configs['THRESHOLD'].to_numpy(dtype=np.float64)
+    trade_values = configs['trade_value'].to_numpy(dtype=np.float64)
+    args = (
+        indexes, weights, thresholds, trade_values, initial_capital
+    )
+
+    if n_jobs > 1:
+        outputs = map_shared(
+            _evaluate_fold, arrays, n_jobs,
+            *zip(*[args + (fold, chunk_size) for fold in folds])
+        )
+    else:
+        outputs = [
+            _evaluate_fold(arrays, *args, fold, chunk_size) for fold in folds
+        ]
+
+    dates = df['date']
+    results = pd.DataFrame({
+        'fold': np.arange(len(folds)),
+        'train_start': dates.iloc[[fold[0] for fold in folds]].to_numpy(),
+        'test_start': dates.iloc[[fold[1] for fold in folds]].to_numpy(),
+        'test_end': dates.iloc[[fold[2] - 1 for fold in folds]].to_numpy(),
+    })
+    selected = configs.iloc[[output.pop('config') for output in outputs]]
+    results = pd.concat(
+        [results, selected.reset_index(drop=True), pd.DataFrame(outputs)],
+        axis=1
+    )
+    results['train_roi'] = roi(
+        invested_amount=initial_capital,
+        final_balance=results['train_final_balance']
+    )
+    results['roi'] = roi(
+        invested_amount=results['initial_capital'],
+        final_balance=results['final_balance']
+    )
+    return results
@@ -0,0 +1,115 @@
+import os
+import sys
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DAY_MS = 86_400_000
+
+
+def synthetic_prices(
+        n: int,
+        seed: int = 0,
+        coin: str = 'BTCUSDT',
+        start: str = '2020-01-01',
+        freq: str = 'D'
+    ) -> pd.DataFrame:
+    """
+    Geometric random walk with a 'date' column and the coin prices.
+    """
+    rng = np.random.default_rng(seed)
+    prices = 30000 * np.exp(np.cumsum(rng.normal(0, 0.03, n)))
+    return pd.DataFrame({
+        'date': pd.date_range(start, periods=n, freq=freq),
+        coin: prices
+    })
+
+
+def synthetic_treasury(n: int = 2500, seed: int = 1) -> pd.DataFrame:
+    """
+    Business day treasury rate frame shaped like get_treasury_rate output.
+    """
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'date': pd.bdate_range('2019-12-01', periods=n),
+        'treasury_rate': 2 + np.cumsum(rng.normal(0, 0.02, n))
+    })
+
+
+class StaticTreasuryProvider:
+    """
+    Treasury provider returning a fixed frame and counting the requests.
+    """
+
+    def __init__(self, data: pd.DataFrame) -> None:
+        self.data = data
+        self.calls = 0
+
+    def get(self, lookback: int) -> pd.DataFrame:
+        self.calls += 1
+        return self.data.copy()
+
+
+class FakeKlineClient:
+    """
+    Offline stand-in for the Binance client klines endpoint.
+
+    ---------
+    Parameters
+    ----------
+    - listing_days (int): Candles listed before now.
+    - missing (set): Candle positions that Binance never returns (gaps).
+    - interval_ms (int): Candle interval in milliseconds.
+    - now (int): Current time in milliseconds.
+    """
+
+    def __init__(
+            self,
+            listing_days: int = 3000,
+            missing: set = (),
+            interval_ms: int = DAY_MS,
+            now: int = None
+        ) -> None:
+        if now is None:
+            now = int(pd.Timestamp.now(tz='UTC').timestamp() * 1000)
+        self.interval_ms = interval_ms
+        first = (now // interval_ms - listing_days) * interval_ms
+        self.open_times = [
+            t for t in range(first, now, interval_ms)
+            if (t - first) // interval_ms not in missing
+        ]
+        self.calls = 0
+
+    def klines(self, symbol, interval, limit=500, startTime=None, endTime=None):
+        self.calls += 1
+        data = []
+        for t in self.open_times:
+            if startTime is not None and t < startTime:
+                continue
+            if endTime is not None and t > endTime:
+                break
+            price = str(100 + (t // self.interval_ms) % 50)
+            data.append([
+                t, price, price, price, price, '1.5', t + self.interval_ms - 1,
+                '10.0', 3, '0.5', '5.0', '0'
+            ])
+            if len(data) >= limit:
+                break
+        return data
+
+
+@pytest.fixture
+def treasury_data() -> pd.DataFrame:
+    return synthetic_treasury()
+
+
+@pytest.fixture
+def treasury_provider(treasury_data) -> StaticTreasuryProvider:
+    return StaticTreasuryProvider(treasury_data)
+
+
+@pytest.fixture
+def fake_client() -> FakeKlineClient:
+    return FakeKlineClient(listing_days=2500, missing={100, 101, 2000})
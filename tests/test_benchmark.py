@@ -0,0 +1,103 @@
+import pandas as pd
+import pytest
+
+import src.get_treasury_rate as treasury_module
+import src.setup_binance as binance_module
+from src.benchmark import (
+    FUNCTIONS,
+    compare_to_baseline,
+    load_baseline,
+    main,
+    offline,
+    run_benchmarks,
+    save_baseline,
+)
+
+
+def test_run_benchmarks_offline():
+    results = run_benchmarks(
+        sizes={'tiny': 600}, symbols=(1, 2), repeat=1, verbose=False
+    )
+
+    assert len(results) == 2 * len(FUNCTIONS)
+    assert list(results['function'].unique()) == list(FUNCTIONS)
+    assert set(results['case']) == {'tinyx1', 'tinyx2'}
+    assert (results['seconds'] > 0).all()
+    assert (results['repeat'] == 1).all()
+
+
+def test_run_benchmarks_skips_large_cases():
+    results = run_benchmarks(
+        sizes={'tiny': 600}, symbols=(1, 2), functions=('set_buy',),
+        max_cells=1000, repeat=1, verbose=False
+    )
+
+    assert results['case'].tolist() == ['tinyx1']
+
+
+def test_unknown_function():
+    with pytest.raises(ValueError):
+        run_benchmarks(functions=('calculate_vwap',), verbose=False)
+
+
+def test_offline_blocks_the_network():
+    get_client = binance_module.BinanceClient.get_client
+    download = treasury_module.yf.download
+
+    with offline():
+        with pytest.raises(RuntimeError):
+            binance_module.BinanceClient.get_client()
+        with pytest.raises(RuntimeError):
+            treasury_module.yf.download('^TNX')
+
+    assert binance_module.BinanceClient.get_client == get_client
+    assert treasury_module.yf.download is download
+
+
+def test_baseline_round_trip(tmp_path):
+    results = pd.DataFrame({
+        'case': ['1kx1'], 'n_bars': [1000], 'n_symbols': [1],
+        'function': ['set_buy'], 'seconds': [0.01], 'repeat': [5],
+        'peak_mb': [2.0],
+    })
+    path = tmp_path / 'baseline.json'
+
+    save_baseline(results, path)
+
+    pd.testing.assert_frame_equal(load_baseline(path), results)
+
+
+def test_compare_to_baseline():
+    baseline = pd.DataFrame({
+        'case': ['a', 'a', 'a', 'a'],
+        'function': ['same', 'slower', 'noise', 'heavier'],
+        'seconds': [1.0, 1.0, 0.0001, 1.0],
+        'peak_mb': [10.0, 10.0, 10.0, 10.0],
+    })
+    results = baseline.copy()
+    results['seconds'] = [1.1, 1.5, 0.0005, 1.0]
+    results['peak_mb'] = [10.0, 10.0, 10.0, 20.0]
+
+    comparison = compare_to_baseline(results, baseline)
+
+    assert comparison['regression'].tolist() == [False, True, False, True]
+    assert comparison['time_ratio'].iloc[1] == pytest.approx(1.5)
+
+
+def test_main_saves_and_compares(tmp_path, capsys):
+    path = tmp_path / 'baseline.json'
+    args = ['--sizes', '1k', '--symbols', '1', '--functions', 'set_buy',
+            '--repeat', '1']
+
+    assert main(args + ['--save', str(path)]) == 0
+
+    slow = load_baseline(path)
+    slow['seconds'] = 1000.0
+    save_baseline(slow, path)
+    assert main(args + ['--baseline', str(path)]) == 0
+    assert 'No regressions.' in capsys.readouterr().out
+
+    fast = load_baseline(path)
+    fast['seconds'] = 0.0
+    save_baseline(fast, path)
+    assert main(args + ['--baseline', str(path)]) == 1
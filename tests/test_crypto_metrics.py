@@ -0,0 +1,62 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import baseline_crypto_metrics as baseline
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+
+COIN = 'BTCUSDT'
+
+
+@pytest.fixture
+def baseline_metrics(monkeypatch, treasury_data):
+    monkeypatch.setattr(
+        baseline, 'get_treasury_rate', lambda lookback: treasury_data.copy()
+    )
+    return baseline.CryptoMetrics(1)
+
+
+@pytest.mark.parametrize('seed', range(4))
+def test_set_buy_matches_baseline(seed, baseline_metrics, treasury_provider):
+    df = synthetic_prices(2000, seed=seed)
+    expected = baseline_metrics.set_buy(df, COIN)
+    result = CryptoMetrics(1, treasury_provider=treasury_provider).set_buy(df, COIN)
+
+    pd.testing.assert_frame_equal(result, expected)
+
+
+@pytest.mark.parametrize('name', ['calculate_rsi', 'calculate_bollinger_bands', 'calculate_macd'])
+def test_indicators_match_baseline(name, baseline_metrics):
+    df = synthetic_prices(1000, seed=7)
+
+    pd.testing.assert_frame_equal(
+        getattr(CryptoMetrics(1), name)(df, COIN),
+        getattr(baseline_metrics, name)(df, COIN)
+    )
+
+
+def test_set_buy_panel_matches_baseline(baseline_metrics, treasury_provider):
+    dates = pd.date_range('2020-01-01', periods=1500)
+    wide = pd.DataFrame({'date': dates})
+    for k in range(6):
+        prices = synthetic_prices(1500, seed=k)[COIN].to_numpy(copy=True)
+        if k % 3 == 0:
+            # Coin listed later than the others
+            prices[:k * 50 + 30] = np.nan
+        wide[f'C{k}USDT'] = prices
+
+    panel = CryptoMetrics(
+        1, treasury_provider=treasury_provider
+    ).set_buy_panel(wide)
+
+    assert len(panel) == wide.drop(columns='date').notna().sum().sum()
+    for coin in wide.columns[1:]:
+        single = wide[['date', coin]].dropna().reset_index(drop=True)
+        expected = baseline_metrics.set_buy(single, coin)
+        rows = panel[panel['coin'] == coin].reset_index(drop=True)
+
+        np.testing.assert_array_equal(rows['date'], expected['date'])
+        np.testing.assert_array_equal(rows['price'], expected[coin])
+        np.testing.assert_array_equal(rows['buy'], expected[f'buy_{coin}'])
+        np.testing.assert_array_equal(rows['sell'], expected[f'sell_{coin}'])
@@ -0,0 +1,150 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.execution import ExecutionModel, quote_volumes
+from src.simulations import simulate_model_trader, simulate_signals, simulate_signals_batch
+
+COIN = 'BTCUSDT'
+
+
+def _frame(prices, buys, sells, quote_volume=None) -> pd.DataFrame:
+    df = pd.DataFrame({
+        'date': pd.date_range('2021-01-01', periods=len(prices)),
+        COIN: np.asarray(prices, dtype=np.float64),
+        f'buy_{COIN}': buys,
+        f'sell_{COIN}': sells,
+    })
+    if quote_volume is not None:
+        df['quote_asset_volume'] = quote_volume
+    return df
+
+
+def test_fee_rate_follows_order_type():
+    assert ExecutionModel(taker_fee=0.002, maker_fee=0.001).fee_rate == 0.002
+    assert ExecutionModel(
+        taker_fee=0.002, maker_fee=0.001, maker=True
+    ).fee_rate == 0.001
+
+
+def test_fill_price_slippage_impact_and_cap():
+    model = ExecutionModel(slippage=0.001, impact=0.1, max_slippage=0.01)
+
+    # 0.001 + 0.1 * 1000 / 1e6
+    assert model.fill_price(1, 100.0, 1000.0, 1e6) == pytest.approx(100.11)
+    assert model.fill_price(-1, 100.0, 1000.0, 1e6) == pytest.approx(99.89)
+    # The impact is capped by max_slippage
+    assert model.fill_price(1, 100.0, 1e6, 1e6) == pytest.approx(101.0)
+    # No liquidity, only the fixed slippage
+    assert model.fill_price(1, 100.0, 1000.0, 0.0) == pytest.approx(100.1)
+    np.testing.assert_allclose(
+        model.fill_price(1, 100.0, np.array([0.0, 1000.0]), np.array([1e6, np.nan])),
+        [100.1, 100.1]
+    )
+
+
+def test_capacity():
+    volume = np.array([1000.0, 0.0, np.nan, 50.0])
+
+    assert np.isinf(ExecutionModel(slippage=0.01).capacity(None, 4)).all()
+    np.testing.assert_array_equal(
+        ExecutionModel(impact=0.1).capacity(volume, 4), [np.inf, 0, 0, np.inf]
+    )
+    np.testing.assert_array_equal(
+        ExecutionModel(max_participation=0.1).capacity(volume, 4), [100, 0, 0, 5]
+    )
+
+
+@pytest.mark.parametrize('kwargs', [
+    dict(taker_fee=1), dict(maker_fee=-0.1), dict(max_slippage=1),
+    dict(slippage=0.6), dict(impact=-1), dict(max_participation=0),
+])
+def test_invalid_parameters(kwargs):
+    with pytest.raises(ValueError):
+        ExecutionModel(**kwargs)
+
+
+def test_missing_or_negative_volume():
+    prices, buys, sells = np.array([100.0, 110.0]), np.array([1, 0]), np.array([0, 1])
+
+    with pytest.raises(ValueError):
+        simulate_signals(prices, buys, sells, 1000, 100, execution=ExecutionModel(impact=0.1))
+    with pytest.raises(ValueError):
+        simulate_signals(
+            prices, buys, sells, 1000, 100,
+            execution=ExecutionModel(impact=0.1), quote_volume=np.array([-1.0, 1.0])
+        )
+
+
+def test_quote_volumes():
+    df = _frame([10.0, 20.0], [0, 0], [0, 0])
+    assert quote_volumes(df, COIN) is None
+
+    df['volume'] = [1.0, 2.0]
+    np.testing.assert_array_equal(quote_volumes(df, COIN), [10.0, 40.0])
+
+    df['quote_asset_volume'] = [5.0, 6.0]
+    np.testing.assert_array_equal(quote_volumes(df, COIN), [5.0, 6.0])
+
+
+def test_fees_and_slippage_hand_computed():
+    df = _frame([100.0, 110.0, 120.0], [1, 0, 0], [0, 1, 0])
+    model = ExecutionModel(taker_fee=0.01, slippage=0.02)
+
+    result = simulate_model_trader(
+        df, 1000, 100, COIN, verbose=False, return_trades=True, execution=model
+    )
+
+    # Buy 100 at 102 paying a 1 fee, sell 100 / 110 coins at 107.8
+    coins = (100 - 1) / 102
+    proceeds = 100 / 110 * 107.8
+    assert result['coin_holdings'] == pytest.approx(coins - 100 / 110)
+    assert result['total_invested'] == 100
+    assert result['final_balance'] == pytest.approx(
+        900 + proceeds * 0.99 + (coins - 100 / 110) * 120
+    )
+    trades = result['trades']
+    np.testing.assert_array_equal(trades['side'], [1, -1])
+    np.testing.assert_allclose(trades['price'], [102.0, 107.8])
+    np.testing.assert_allclose(trades['fee'], [1.0, proceeds * 0.01])
+
+
+def test_partial_fills_hand_computed():
+    # The second buy has no liquidity and the sell fills 30 of 100
+    df = _frame(
+        [100.0, 100.0, 100.0, 100.0], [1, 1, 0, 0], [0, 0, 1, 0],
+        quote_volume=[1e6, 0.0, 300.0, 1e6]
+    )
+    model = ExecutionModel(taker_fee=0.0, max_participation=0.1)
+
+    result = simulate_model_trader(
+        df, 1000, 100, COIN, verbose=False, return_trades=True, execution=model
+    )
+
+    assert result['total_invested'] == 100
+    assert result['coin_holdings'] == pytest.approx(0.7)
+    assert result['final_balance'] == pytest.approx(1000)
+    trades = result['trades']
+    np.testing.assert_array_equal(trades['bar'], [0, 2])
+    np.testing.assert_allclose(trades['quantity'], [1.0, 0.3])
+
+
+def test_batch_matches_single_with_execution():
+    rng = np.random.default_rng(0)
+    prices = 100 + rng.standard_normal(300).cumsum()
+    volume = rng.random(300) * 2000
+    volume[rng.random(300) < 0.1] = 0
+    buy = (rng.random((5, 300)) < 0.2).astype(np.int8)
+    sell = (rng.random((5, 300)) < 0.2).astype(np.int8)
+    model = ExecutionModel(slippage=0.001, impact=0.5, max_participation=0.05)
+
+    batch = simulate_signals_batch(
+        prices, buy, sell, 1000, 50, execution=model, quote_volume=volume
+    )
+    for row in range(5):
+        single = simulate_signals(
+            prices, buy[row], sell[row], 1000, 50,
+            execution=model, quote_volume=volume
+        )
+        for key, value in single.items():
+            assert batch[key][row] == pytest.approx(value), key
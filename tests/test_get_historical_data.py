@@ -0,0 +1,179 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import DAY_MS, FakeKlineClient
+from src.get_historical_data import (
+    fetch_klines_many,
+    get_historical_data,
+    get_historical_data_many,
+    interval_to_ms,
+    iter_klines,
+    lookback_windows,
+    map_to_chunks,
+    time_chunks,
+)
+from src.kline_cache import KlineCache, find_gaps
+
+
+def test_cached_matches_uncached(fake_client, tmp_path):
+    cache = KlineCache(str(tmp_path))
+    expected = get_historical_data('BTCUSDT', 1500, client=fake_client)
+    result = get_historical_data(
+        'BTCUSDT', 1500, client=fake_client, cache=cache
+    )
+
+    assert result.equals(expected)
+    assert list(result.columns) == ['date', 'BTCUSDT']
+
+
+def test_second_call_is_served_from_cache(fake_client, tmp_path):
+    cache = KlineCache(str(tmp_path))
+    first = get_historical_data('BTCUSDT', 1500, client=fake_client, cache=cache)
+    calls = fake_client.calls
+    second = get_historical_data('BTCUSDT', 1500, client=fake_client, cache=cache)
+
+    # Only the window after the last closed candle is requested again
+    assert fake_client.calls - calls == 1
+    assert second.equals(first)
+
+
+def test_longer_lookback_fetches_only_older_history(fake_client, tmp_path):
+    cache = KlineCache(str(tmp_path))
+    get_historical_data('BTCUSDT', 1500, client=fake_client, cache=cache)
+    calls = fake_client.calls
+    result = get_historical_data('BTCUSDT', 3000, client=fake_client, cache=cache)
+
+    # Two windows of older history and the window after the cached candles
+    assert fake_client.calls - calls == 3
+    expected = get_historical_data('BTCUSDT', 3000, client=fake_client)
+    assert result.equals(expected)
+
+
+def test_exchange_gaps_are_not_refetched(tmp_path):
+    client = FakeKlineClient(listing_days=1200, missing={300, 301, 900})
+    cache = KlineCache(str(tmp_path))
+    get_historical_data('BTCUSDT', 1500, client=client, cache=cache)
+    cached, meta = cache.load('BTCUSDT', '1d')
+    open_times = cached['open_time'].to_numpy().astype('datetime64[ms]')
+
+    gaps = find_gaps(open_times.astype(np.int64), DAY_MS)
+    assert len(gaps) == 2
+    assert meta['known_gaps'] == {start for start, _ in gaps}
+
+    calls = client.calls
+    get_historical_data('BTCUSDT', 1500, client=client, cache=cache)
+    assert client.calls - calls == 1
+
+
+def test_find_gaps():
+    open_times = np.array([0, 1, 2, 5, 6, 9]) * DAY_MS
+
+    assert find_gaps(open_times, DAY_MS) == [
+        (3 * DAY_MS, 5 * DAY_MS - 1), (7 * DAY_MS, 9 * DAY_MS - 1)
+    ]
+
+
+
+def test_map_to_chunks():
+    assert map_to_chunks(2500) == [
+        {'startLookback': 0, 'endLookback': 1000},
+        {'startLookback': 1000, 'endLookback': 2000},
+        {'startLookback': 2000, 'endLookback': 2500},
+    ]
+    assert map_to_chunks(0) == []
+
+
+def test_lookback_windows_cover_lookback_oldest_first():
+    today = 10_000 * DAY_MS
+    windows = lookback_windows(2500, '1d', today)
+
+    assert windows[0][0] == today - 2500 * DAY_MS
+    assert windows[-1][1] == today
+    assert all(end - start <= 1000 * DAY_MS for start, end in windows)
+    assert all(a[1] == b[0] for a, b in zip(windows, windows[1:]))
+
+
+def test_time_chunks_hold_at_most_chunk_size_candles():
+    chunks = time_chunks(0, 2500 * DAY_MS - 1, '1d')
+
+    assert chunks == [
+        (0, 1000 * DAY_MS - 1),
+        (1000 * DAY_MS, 2000 * DAY_MS - 1),
+        (2000 * DAY_MS, 2500 * DAY_MS - 1),
+    ]
+
+
+def test_concurrent_fetch_matches_sequential(fake_client):
+    windows = time_chunks(
+        fake_client.open_times[0], fake_client.open_times[-1], '1d'
+    )
+    concurrent = fetch_klines_many(
+        fake_client, {'BTCUSDT': windows, 'ETHUSDT': windows},
+        max_workers=8, rate_limiter=None
+    )
+    sequential = fetch_klines_many(
+        fake_client, {'BTCUSDT': windows}, max_workers=1, rate_limiter=None
+    )
+
+    pd.testing.assert_frame_equal(concurrent['BTCUSDT'], sequential['BTCUSDT'])
+    assert len(concurrent['BTCUSDT']) == len(fake_client.open_times)
+    assert concurrent['BTCUSDT']['open_time'].is_monotonic_increasing
+
+
+def test_iter_klines_matches_single_fetch(fake_client):
+    chunks = list(iter_klines(
+        'BTCUSDT', 1500, client=fake_client, max_workers=2, rate_limiter=None
+    ))
+    streamed = pd.concat(chunks, ignore_index=True)
+    expected = get_historical_data('BTCUSDT', 1500, client=fake_client)
+
+    assert len(chunks) == 2
+    np.testing.assert_array_equal(streamed['close'], expected['BTCUSDT'])
+
+
+def test_many_matches_single(fake_client):
+    many = get_historical_data_many(['BTCUSDT', 'ETHUSDT'], 400, client=fake_client)
+    single = get_historical_data('BTCUSDT', 400, client=fake_client)
+
+    assert list(many.columns) == ['date', 'BTCUSDT', 'ETHUSDT']
+    np.testing.assert_array_equal(many['BTCUSDT'], single['BTCUSDT'])
+    np.testing.assert_array_equal(many['date'], single['date'])
+
+
+def test_interval_to_ms():
+    assert interval_to_ms('1s') == 1000
+    assert interval_to_ms('15m') == 15 * 60_000
+    assert interval_to_ms('4h') == 4 * 3_600_000
+    assert interval_to_ms('3d') == 3 * DAY_MS
+    assert interval_to_ms('1w') == 7 * DAY_MS
+    for interval in ('1M', 'h', '1x'):
+        with pytest.raises(ValueError):
+            interval_to_ms(interval)
+
+
+@pytest.mark.parametrize('interval, candles', [
+    ('1h', 24 * 100), ('15m', 96 * 100), ('4h', 600), ('1w', 15)
+])
+def test_intraday_windows_count_candles_of_the_interval(interval, candles):
+    today = 20_000 * DAY_MS
+    windows = lookback_windows(100, interval, today)
+    interval_ms = interval_to_ms(interval)
+
+    assert len(windows) == -(-candles // 1000)
+    assert windows[0][0] == today - candles * interval_ms
+    assert all(end - start <= 1000 * interval_ms for start, end in windows)
+
+
+def test_intraday_history(tmp_path):
+    hour_ms = interval_to_ms('1h')
+    client = FakeKlineClient(listing_days=5000, interval_ms=hour_ms)
+    expected = get_historical_data('BTCUSDT', 30, interval='1h', client=client)
+    cached = get_historical_data(
+        'BTCUSDT', 30, interval='1h', client=client,
+        cache=KlineCache(str(tmp_path))
+    )
+
+    assert len(expected) in (30 * 24, 30 * 24 + 1)
+    assert (expected['date'].diff().dropna() == pd.Timedelta(hours=1)).all()
+    assert cached.equals(expected)
@@ -0,0 +1,87 @@
+import pandas as pd
+
+from conftest import synthetic_treasury
+from src.get_treasury_rate import CSVTreasurySource, TreasuryRateProvider
+
+
+class CountingSource:
+    """
+    Treasury source returning a synthetic series, or raising when failing.
+    """
+
+    name = 'counting'
+
+    def __init__(self, failing: bool = False) -> None:
+        self.failing = failing
+        self.calls = 0
+
+    def fetch(self, start_date, end_date) -> pd.DataFrame:
+        self.calls += 1
+        if self.failing:
+            raise ConnectionError('offline')
+        data = synthetic_treasury()
+        data['date'] = pd.bdate_range(end=end_date, periods=len(data))
+        return data[data['date'] >= start_date].reset_index(drop=True)
+
+
+def test_fetches_once_and_slices_shorter_lookbacks():
+    source = CountingSource()
+    provider = TreasuryRateProvider(source, cache_dir=None)
+    long = provider.get(1000)
+    short = provider.get(100)
+
+    assert source.calls == 1
+    assert len(short) < len(long)
+    pd.testing.assert_frame_equal(short, long.tail(len(short)).reset_index(drop=True))
+
+
+def test_longer_lookback_fetches_again():
+    source = CountingSource()
+    provider = TreasuryRateProvider(source, cache_dir=None)
+    provider.get(100)
+    provider.get(1000)
+
+    assert source.calls == 2
+
+
+def test_failing_source_is_called_once(capsys):
+    source = CountingSource(failing=True)
+    provider = TreasuryRateProvider(source, cache_dir=None)
+    results = [provider.get(lookback) for lookback in (100, 100, 1000)]
+
+    assert source.calls == 1
+    assert all(result.empty for result in results)
+    assert list(results[0].columns) == ['date', 'treasury_rate']
+    assert capsys.readouterr().out.count('An error occured') == 1
+
+
+def test_failing_source_serves_disk_cache(tmp_path):
+    expected = TreasuryRateProvider(CountingSource(), str(tmp_path)).get(100)
+    source = CountingSource(failing=True)
+    provider = TreasuryRateProvider(source, str(tmp_path))
+    # A longer lookback than the cached one needs the source
+    results = [provider.get(1000) for _ in range(3)]
+
+    assert source.calls == 1
+    for result in results:
+        pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_disk_cache_is_shared_by_new_providers(tmp_path):
+    source = CountingSource()
+    expected = TreasuryRateProvider(source, str(tmp_path)).get(300)
+    result = TreasuryRateProvider(source, str(tmp_path)).get(300)
+
+    assert source.calls == 1
+    pd.testing.assert_frame_equal(result, expected, check_dtype=False)
+
+
+def test_csv_source(tmp_path):
+    path = tmp_path / 'rates.csv'
+    synthetic_treasury(n=50).to_csv(path, index=False)
+    source = CSVTreasurySource(str(path))
+    data = source.fetch(pd.Timestamp('2019-12-10'), pd.Timestamp('2020-01-01'))
+
+    assert source.name == 'csv_rates'
+    assert data['date'].min() >= pd.Timestamp('2019-12-10')
+    assert data['date'].max() < pd.Timestamp('2020-01-01')
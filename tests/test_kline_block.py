@@ -0,0 +1,81 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.get_historical_data import parse_data_to_df
+from src.kline_block import KlineBlock, decode_klines
+
+MINUTE_MS = 60_000
+
+
+def _payload(n: int = 50, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    payload = []
+    for i in range(n):
+        open_time = 1_600_000_000_000 + i * MINUTE_MS
+        prices = [f'{value:.8f}' for value in 100 + rng.random(4)]
+        payload.append([
+            open_time, *prices, f'{rng.random():.8f}', open_time + MINUTE_MS - 1,
+            f'{rng.random() * 1e4:.8f}', int(rng.integers(0, 500)),
+            f'{rng.random():.8f}', f'{rng.random() * 1e3:.8f}', '0'
+        ])
+    return payload
+
+
+def _original_parse(data: list) -> pd.DataFrame:
+    # parse_data_to_df before it was built on decode_klines
+    df = pd.DataFrame(data, columns=[
+        'open_time', 'open', 'high', 'low', 'close', 'volume', 'close_time',
+        'quote_asset_volume', 'number_of_trades', 'taker_buy_base_asset_volume',
+        'taker_buy_quote_asset_volume', 'ignore'
+    ])
+    df['open_time'] = pd.to_datetime(df['open_time'], unit='ms')
+    df['close_time'] = pd.to_datetime(df['close_time'], unit='ms')
+    df = df.drop('ignore', axis=1)
+    return df.astype({
+        column: 'int64' if column == 'number_of_trades' else 'float64'
+        for column in df.columns if column not in ('open_time', 'close_time')
+    })
+
+
+def test_parse_data_to_df_matches_original():
+    payload = _payload()
+
+    pd.testing.assert_frame_equal(parse_data_to_df(payload), _original_parse(payload))
+
+
+def test_decode_selected_columns_and_dtype():
+    payload = _payload()
+    block = decode_klines(payload, ['open_time', 'close', 'number_of_trades'], np.float32)
+
+    assert block.columns == ['open_time', 'close', 'number_of_trades']
+    assert 'volume' not in block
+    assert block['open_time'].dtype == np.int64
+    assert block['number_of_trades'].dtype == np.int64
+    assert block['close'].dtype == np.float32
+    np.testing.assert_allclose(
+        block['close'], [float(row[4]) for row in payload], rtol=1e-6
+    )
+    assert block.nbytes == len(payload) * (8 + 4 + 8)
+
+
+def test_decode_empty_payload():
+    block = decode_klines([])
+
+    assert len(block) == 0
+    assert len(block.to_df()) == 0
+
+
+def test_slice_and_concat():
+    block = decode_klines(_payload())
+    parts = [block.slice(0, 20), block.slice(20, 35), block.slice(35, len(block))]
+
+    assert [len(part) for part in parts] == [20, 15, 15]
+    # Slices are views on the block arrays
+    assert np.shares_memory(parts[1]['close'], block['close'])
+    pd.testing.assert_frame_equal(KlineBlock.concat(parts).to_df(), block.to_df())
+
+
+def test_columns_must_have_same_length():
+    with pytest.raises(ValueError):
+        KlineBlock({'open_time': np.arange(3), 'close': np.arange(2.0)})
@@ -0,0 +1,133 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.metrics_cache import MetricsCache, frame_digest, param_digest
+
+COIN = 'BTCUSDT'
+NO_RATE_WEIGHTS = {'rsi': 0.4, 'treasury_corr': 0, 'bb': 0.3, 'MACD': 0.3}
+
+
+def test_lru_eviction_by_bytes():
+    # 800 bytes per entry, two fit in the budget
+    cache = MetricsCache(max_bytes=2000)
+    values = {key: np.full(100, float(i)) for i, key in enumerate('abc')}
+
+    cache.put('a', values['a'])
+    cache.put('b', values['b'])
+    cache.get('a')
+    cache.put('c', values['c'])
+
+    assert list(cache.entries) == ['a', 'c']
+    assert cache.get('b') is None
+    stats = cache.stats()
+    assert stats['evictions'] == 1
+    assert stats['bytes'] == 1600
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+    # Larger than the whole budget, never kept in memory
+    cache.put('big', np.zeros(1000))
+    assert 'big' not in cache.entries
+    assert cache.bytes == 1600
+
+
+def test_results_are_copies():
+    cache = MetricsCache()
+    df = pd.DataFrame({'a': [1.0, 2.0]})
+
+    cache.put('key', df)
+    df.loc[0, 'a'] = 100.0
+    cached = cache.get('key')
+    cached.loc[1, 'a'] = 200.0
+
+    pd.testing.assert_frame_equal(cache.get('key'), pd.DataFrame({'a': [1.0, 2.0]}))
+
+
+def test_disk_tier_round_trip(tmp_path):
+    df = synthetic_prices(100)
+    MetricsCache(directory=tmp_path).put('key', df)
+
+    # A new process only has the files
+    cache = MetricsCache(directory=tmp_path)
+    pd.testing.assert_frame_equal(cache.get('key'), df)
+    assert cache.stats()['disk_hits'] == 1
+    pd.testing.assert_frame_equal(cache.get('key'), df)
+    assert cache.stats()['hits'] == 1
+
+    # Evicted from memory, read back from disk
+    small = MetricsCache(max_bytes=1, directory=tmp_path)
+    pd.testing.assert_frame_equal(small.get('key'), df)
+    assert small.entries == {}
+
+    cache.clear(disk=True)
+    assert cache.get('key') is None
+    assert not list(tmp_path.glob('*.pkl'))
+
+
+def test_digests_follow_the_content():
+    df = synthetic_prices(100)
+    changed = df.copy()
+    changed.loc[50, COIN] += 1e-9
+
+    assert frame_digest(df) == frame_digest(df.copy())
+    assert frame_digest(df) != frame_digest(changed)
+    assert frame_digest(df, ['date']) == frame_digest(changed, ['date'])
+
+    # repr truncates large arrays, the digest does not
+    values = np.zeros(5000)
+    other = values.copy()
+    other[2500] = 1
+    assert param_digest(values) != param_digest(other)
+    assert param_digest({'a': 1, 'b': 2}) == param_digest({'b': 2, 'a': 1})
+
+
+def test_cached_set_buy(treasury_provider):
+    df = synthetic_prices(1000)
+    cache = MetricsCache()
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider, cache=cache)
+    expected = CryptoMetrics(len(df), treasury_provider=treasury_provider).set_buy(df, COIN)
+
+    pd.testing.assert_frame_equal(metrics.set_buy(df, COIN), expected)
+    pd.testing.assert_frame_equal(metrics.set_buy(df, COIN), expected)
+    assert cache.stats()['hits'] == 1
+
+    # Another threshold is another result
+    metrics.set_buy(df, COIN, THRESHOLD=0.3)
+    assert cache.stats()['misses'] == 2
+
+
+def test_set_buy_without_rate_skips_the_treasury(treasury_provider):
+    df = synthetic_prices(1000)
+    cache = MetricsCache()
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider, cache=cache)
+    expected = CryptoMetrics(len(df), treasury_provider=treasury_provider).set_buy(
+        df, COIN, weights=NO_RATE_WEIGHTS
+    )
+    treasury_provider.calls = 0
+
+    for _ in range(2):
+        result = metrics.set_buy(df, COIN, weights=NO_RATE_WEIGHTS)
+
+    pd.testing.assert_frame_equal(result, expected)
+    assert treasury_provider.calls == 0
+    assert cache.stats()['hits'] == 1
+
+    metrics.set_buy(df, COIN)
+    assert treasury_provider.calls > 0
+
+
+@pytest.mark.parametrize('columns', [['volume'], []])
+def test_set_buy_key_ignores_unused_columns(columns, treasury_provider):
+    df = synthetic_prices(500)
+    for column in columns:
+        df[column] = 1.0
+    cache = MetricsCache()
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider, cache=cache)
+
+    metrics.set_buy(df, COIN)
+    # A column set_buy does not read does not change the key
+    metrics.set_buy(df.assign(other=0), COIN)
+
+    assert cache.stats()['hits'] == 1
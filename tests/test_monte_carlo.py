@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.monte_carlo import generate_paths, monte_carlo, summarize_paths
+
+COIN = 'BTCUSDT'
+
+
+@pytest.fixture
+def history() -> pd.DataFrame:
+    return synthetic_prices(400, seed=5)
+
+
+def _run(history, treasury_data, **kwargs):
+    return monte_carlo(
+        history, COIN, 1000, 10, n_paths=150, treasury_data=treasury_data,
+        **kwargs
+    )
+
+
+@pytest.mark.parametrize('method', ['bootstrap', 'gbm'])
+def test_results_do_not_depend_on_jobs_or_chunks(history, treasury_data, method):
+    expected = _run(history, treasury_data, method=method, seed=1)
+
+    pd.testing.assert_frame_equal(
+        _run(history, treasury_data, method=method, seed=1, n_jobs=2, chunk_size=40),
+        expected
+    )
+    pd.testing.assert_frame_equal(
+        _run(history, treasury_data, method=method, seed=1, chunk_size=7),
+        expected
+    )
+    assert len(expected) == 150
+    assert not _run(history, treasury_data, method=method, seed=2).equals(expected)
+
+
+def test_bootstrap_paths_reuse_historical_returns():
+    log_returns = np.random.default_rng(0).normal(0, 0.02, 300)
+    rate_changes = np.zeros(300)
+    prices, rates = generate_paths(
+        log_returns, rate_changes, 100.0, 2.0, n_paths=5, n_bars=50,
+        block_size=10, seed=3
+    )
+
+    assert prices.shape == rates.shape == (50, 5)
+    np.testing.assert_allclose(prices[0], 100.0)
+    np.testing.assert_allclose(rates, 2.0)
+    steps = np.diff(np.log(prices), axis=0)
+    assert np.isin(np.round(steps, 12), np.round(log_returns, 12)).all()
+
+
+def test_generate_paths_checks_arguments():
+    log_returns = np.zeros(10)
+    with pytest.raises(ValueError):
+        generate_paths(log_returns, log_returns, 1.0, 1.0, 2, 5, method='garch')
+    with pytest.raises(ValueError):
+        generate_paths(log_returns, log_returns, 1.0, 1.0, 2, 5, seed=[1, 2, 3])
+
+
+def test_summarize_paths(history, treasury_data):
+    results = _run(history, treasury_data, seed=1)
+    summary = summarize_paths(results)
+
+    assert summary.loc['prob_loss', 'roi'] == (results['roi'] < 0).mean()
+    assert summary.loc['50%', 'final_balance'] == results['final_balance'].median()
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.parameter_sweep import expand_grid, sweep_parameters
+from src.signals import DEFAULT_WEIGHTS
+from src.simulations import simulate_model_trader
+
+COIN = 'BTCUSDT'
+EQUAL_WEIGHTS = {'rsi': 0.25, 'treasury_corr': 0.25, 'bb': 0.25, 'MACD': 0.25}
+GRID = {
+    'THRESHOLD': [0.3, 0.5],
+    'weights': [DEFAULT_WEIGHTS, EQUAL_WEIGHTS],
+    'trade_value': [10, 400],
+}
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_sweep_matches_set_buy_loop(n_jobs, treasury_data, treasury_provider):
+    df = synthetic_prices(800, seed=2)
+    result = sweep_parameters(
+        df, COIN, GRID, 1000, treasury_data=treasury_data,
+        n_jobs=n_jobs, chunk_size=3
+    )
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider)
+
+    assert len(result) == 8
+    for config in result.to_dict('records'):
+        weights = {name: config[f'weight_{name}'] for name in DEFAULT_WEIGHTS}
+        signals = metrics.set_buy(
+            df, COIN, THRESHOLD=config['THRESHOLD'], weights=weights
+        )
+        signals[COIN] = df[COIN].to_numpy()
+        expected = simulate_model_trader(
+            signals, 1000, config['trade_value'], COIN, verbose=False
+        )
+        for key, value in expected.items():
+            assert config[key] == value, key
+
+
+def test_results_are_ranked_by_final_balance(treasury_data):
+    result = sweep_parameters(
+        synthetic_prices(500), COIN, GRID, 1000, treasury_data=treasury_data
+    )
+
+    assert result['final_balance'].is_monotonic_decreasing
+    np.testing.assert_allclose(
+        result['roi'],
+        (result['final_balance'] - 1000) / 1000 * 100
+    )
+
+
+def test_expand_grid_defaults():
+    configs = expand_grid({'THRESHOLD': [0.3, 0.5, 0.7]})
+
+    assert len(configs) == 3
+    assert (configs['rsi_period'] == 14).all()
+    assert (configs['weight_rsi'] == DEFAULT_WEIGHTS['rsi']).all()
+    assert 'weights' not in configs
+
+
+def test_expand_grid_rejects_incomplete_weights():
+    weights = {'rsi': 0.5, 'bb': 0.5, 'MACD': 0.5}
+
+    with pytest.raises(ValueError, match='treasury_corr'):
+        expand_grid({'weights': [weights]})
+    with pytest.raises(ValueError):
+        expand_grid({'rsi_windows': [14]})
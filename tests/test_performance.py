@@ -0,0 +1,85 @@
+import math
+import statistics
+import numpy as np
+import pytest
+
+from conftest import synthetic_prices
+from src.performance import performance_metrics
+from src.simulations import TRADE_DTYPE, simulate_model_trader
+
+EQUITY = [100.0, 110.0, 99.0, 99.0, 121.0, 110.0]
+
+
+def test_hand_computed_curve():
+    returns = [0.1, -0.1, 0.0, 22 / 99, -1 / 11]
+    metrics = performance_metrics(np.array(EQUITY), periods_per_year=1)
+
+    assert metrics['total_return'] == pytest.approx(0.1)
+    assert metrics['cagr'] == pytest.approx(1.1 ** (1 / 5) - 1)
+    assert metrics['max_drawdown'] == pytest.approx(-0.1)
+    # Bars 2 and 3 are below the peak of bar 1
+    assert metrics['max_drawdown_duration'] == 2
+    assert metrics['volatility'] == pytest.approx(statistics.stdev(returns))
+    assert metrics['sharpe'] == pytest.approx(
+        statistics.mean(returns) / statistics.stdev(returns)
+    )
+    downside = math.sqrt(sum(min(r, 0) ** 2 for r in returns) / 5)
+    assert metrics['sortino'] == pytest.approx(statistics.mean(returns) / downside)
+    assert metrics['calmar'] == pytest.approx(metrics['cagr'] / 0.1)
+
+
+def test_annualization_and_risk_free_rate():
+    daily = performance_metrics(np.array(EQUITY), periods_per_year=365)
+    excess = performance_metrics(
+        np.array(EQUITY), periods_per_year=365, risk_free_rate=0.0365
+    )
+    returns = np.diff(EQUITY) / EQUITY[:-1]
+
+    assert daily['volatility'] == pytest.approx(returns.std(ddof=1) * math.sqrt(365))
+    assert excess['sharpe'] == pytest.approx(
+        (returns.mean() - 0.0001) / returns.std(ddof=1) * math.sqrt(365)
+    )
+
+
+def test_many_curves_match_one_by_one():
+    curves = np.array([EQUITY, EQUITY[::-1], [100.0] * 3 + [50.0] * 3])
+    together = performance_metrics(curves)
+
+    for row, curve in enumerate(curves):
+        alone = performance_metrics(curve)
+        for name, value in alone.items():
+            np.testing.assert_equal(together[name][row], value, err_msg=name)
+
+
+def test_trade_and_position_metrics():
+    position = np.array([0, 1, 1, 0, 0, 2.0])
+    trades = np.array(
+        [(1, 1, 10.0, 1.0, 10.0, 0.0), (3, -1, 11.0, 1.0, 11.0, 0.0),
+         (5, 1, 12.0, 2.0, 24.0, 0.0)],
+        dtype=TRADE_DTYPE
+    )
+    metrics = performance_metrics(np.array(EQUITY), position, trades)
+
+    assert metrics['exposure'] == pytest.approx(0.5)
+    assert (metrics['n_trades'], metrics['n_buys'], metrics['n_sells']) == (3, 2, 1)
+    assert metrics['turnover'] == pytest.approx(45 / np.mean(EQUITY))
+
+
+def test_simulator_curves():
+    df = synthetic_prices(300, seed=4)
+    rng = np.random.default_rng(0)
+    df['buy_BTCUSDT'] = (rng.random(300) < 0.2).astype(int)
+    df['sell_BTCUSDT'] = (rng.random(300) < 0.1).astype(int)
+    result = simulate_model_trader(
+        df, 1000, 50, 'BTCUSDT', verbose=False,
+        return_equity=True, return_trades=True
+    )
+    metrics = performance_metrics(
+        result['equity_curve'], result['position_curve'], result['trades']
+    )
+
+    assert metrics['total_return'] == pytest.approx(
+        result['final_balance'] / 1000 - 1
+    )
+    assert metrics['n_trades'] == len(result['trades'])
+    assert -1 <= metrics['max_drawdown'] <= 0
@@ -0,0 +1,87 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.execution import ExecutionModel
+from src.portfolio import simulate_portfolio, simulate_portfolio_panel
+from src.simulations import simulate_model_trader
+
+COIN = 'BTCUSDT'
+
+
+def _signals(n: int, seed: int, volume: bool = False) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    df = synthetic_prices(n, seed=seed)
+    df[f'buy_{COIN}'] = (rng.random(n) < 0.3).astype(int)
+    df[f'sell_{COIN}'] = (rng.random(n) < 0.3).astype(int)
+    if volume:
+        df['quote_asset_volume'] = rng.random(n) * 5000
+        df.loc[rng.random(n) < 0.1, 'quote_asset_volume'] = 0.0
+    return df
+
+
+@pytest.mark.parametrize('seed', range(3))
+@pytest.mark.parametrize('execution', [
+    None,
+    ExecutionModel(taker_fee=0.001, slippage=0.002, impact=0.1, max_participation=0.05),
+])
+def test_single_symbol_matches_model_trader(seed, execution):
+    df = _signals(1000, seed, volume=execution is not None)
+    expected = simulate_model_trader(
+        df, 1000, 100, COIN, verbose=False, return_equity=True,
+        return_trades=True, execution=execution
+    )
+
+    column = lambda name: df[[name]].to_numpy(dtype=np.float64)
+    result = simulate_portfolio(
+        column(COIN), column(f'buy_{COIN}'), column(f'sell_{COIN}'), 1000, 100,
+        execution=execution,
+        quote_volume=None if execution is None else column('quote_asset_volume'),
+        return_positions=True, return_trades=True
+    )
+
+    assert result['final_balance'] == pytest.approx(expected['final_balance'])
+    assert result['total_invested'] == pytest.approx(expected['total_invested'])
+    assert result['coin_holdings'][0] == pytest.approx(expected['coin_holdings'])
+    np.testing.assert_allclose(result['equity_curve'], expected['equity_curve'])
+    np.testing.assert_allclose(result['position_curve'][:, 0], expected['position_curve'])
+    trades, expected_trades = result['trades'], expected['trades']
+    assert (trades['symbol'] == 0).all()
+    np.testing.assert_array_equal(trades['bar'], expected_trades['bar'])
+    np.testing.assert_array_equal(trades['side'], expected_trades['side'])
+    for field in ('price', 'quantity', 'value', 'fee'):
+        np.testing.assert_allclose(trades[field], expected_trades[field], err_msg=field)
+
+
+def test_panel_coins_without_constraints_match_model_trader(treasury_provider):
+    wide = pd.DataFrame({'date': pd.date_range('2020-01-01', periods=800)})
+    for k in range(3):
+        wide[f'C{k}USDT'] = synthetic_prices(800, seed=k)[COIN]
+    metrics = CryptoMetrics(800, treasury_provider=treasury_provider)
+    panel = metrics.set_buy_panel(wide)
+
+    # Enough capital for every buy, so the coins never compete for cash
+    result = simulate_portfolio_panel(panel, 1e9, 100)
+
+    for coin in result['coins']:
+        df_buy = metrics.set_buy(wide[['date', coin]], coin)
+        expected = simulate_model_trader(df_buy, 1e9, 100, coin, verbose=False)
+        assert result['coin_holdings'][coin] == pytest.approx(expected['coin_holdings'])
+
+
+def test_max_weight_caps_positions():
+    n = 200
+    prices = np.full((n, 2), 100.0)
+    buy = np.ones((n, 2))
+    sell = np.zeros((n, 2))
+
+    result = simulate_portfolio(
+        prices, buy, sell, 1000, 100, max_weight=0.3, return_positions=True
+    )
+
+    values = result['position_curve'] * prices
+    assert (values <= 0.3 * result['equity_curve'][:, None] + 1e-9).all()
+    np.testing.assert_allclose(result['coin_holdings_dollars'], [300, 300])
+    assert result['cash'] == pytest.approx(400)
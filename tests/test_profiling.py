@@ -0,0 +1,154 @@
+import json
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.profiling import Profiler, profiled, profiler, span
+
+
+@pytest.fixture
+def shared_profiler():
+    profiler.clear()
+    yield profiler
+    profiler.disable()
+    profiler.clear()
+
+
+def test_disabled_profiler_records_nothing():
+    local = Profiler()
+
+    with local.span('work') as record:
+        record.rows = 10
+
+    assert local.spans == []
+    assert local.to_frame().empty
+    assert local.summary().empty
+
+
+def test_nested_spans_and_summary():
+    local = Profiler()
+
+    with local.recording():
+        for _ in range(3):
+            with local.span('outer', coin='BTCUSDT') as outer:
+                outer.rows = 5
+                with local.span('inner'):
+                    pass
+
+    frame = local.to_frame()
+    assert frame['name'].tolist() == ['outer', 'inner'] * 3
+    assert (frame['coin'].dropna() == 'BTCUSDT').all()
+    assert (frame['duration'] >= 0).all()
+    assert frame['allocated_bytes'].isna().all()
+
+    summary = local.summary()
+    assert summary.index.tolist() == ['outer', 'inner']
+    assert summary.loc['outer', 'count'] == 3
+    assert summary.loc['outer', 'rows'] == 15
+    outer_total = frame.loc[frame['name'] == 'outer', 'duration'].sum()
+    assert summary.loc['outer', 'total'] == pytest.approx(outer_total)
+    assert not local.enabled
+
+
+def test_memory_tracking():
+    local = Profiler()
+
+    with local.recording(memory=True):
+        with local.span('outer'):
+            with local.span('allocate'):
+                kept = np.ones(1_000_000)
+            np.ones(2_000_000).sum()
+
+    spans = local.to_frame().set_index('name')
+    assert spans.loc['allocate', 'allocated_bytes'] >= kept.nbytes
+    # The temporary array of the outer span is freed but counts in its peak
+    assert spans.loc['outer', 'peak_bytes'] >= kept.nbytes + 16_000_000
+    assert spans.loc['outer', 'allocated_bytes'] < kept.nbytes + 16_000_000
+
+
+def test_spans_of_threads():
+    local = Profiler()
+    # Keeps the threads alive together, so their idents are distinct
+    barrier = threading.Barrier(4)
+
+    def work():
+        with local.span('thread'):
+            with local.span('nested'):
+                barrier.wait()
+
+    with local.recording():
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    frame = local.to_frame()
+    assert len(frame) == 8
+    assert frame['thread'].nunique() == 4
+
+
+def test_write_log_and_chrome_trace(tmp_path):
+    local = Profiler()
+    with local.recording():
+        with local.span('data.fetch', coin='BTCUSDT') as record:
+            record.rows = 3
+        with local.span('signals.set_buy'):
+            pass
+
+    local.write_log(tmp_path / 'profile.jsonl')
+    local.write_chrome_trace(tmp_path / 'profile.json')
+
+    with open(tmp_path / 'profile.jsonl') as file:
+        lines = [json.loads(line) for line in file]
+    assert [line['name'] for line in lines] == ['data.fetch', 'signals.set_buy']
+    assert lines[0]['rows'] == 3 and lines[0]['coin'] == 'BTCUSDT'
+
+    with open(tmp_path / 'profile.json') as file:
+        events = json.load(file)['traceEvents']
+    assert [event['cat'] for event in events] == ['data', 'signals']
+    assert all(event['ph'] == 'X' and event['dur'] >= 0 for event in events)
+    assert events[0]['args'] == {'rows': 3, 'coin': 'BTCUSDT'}
+
+
+def test_profiled_decorator(shared_profiler):
+    @profiled
+    def frame_length(df):
+        return None
+
+    @profiled(name='custom.array')
+    def array(n):
+        return np.zeros(n)
+
+    df = pd.DataFrame({'a': range(7)})
+    assert frame_length(df) is None
+    with shared_profiler.recording():
+        frame_length(df)
+        array(4)
+        with span('block'):
+            array(2)
+
+    frame = shared_profiler.to_frame()
+    assert frame['name'].tolist() == [
+        'test_profiling.test_profiled_decorator.<locals>.frame_length',
+        'custom.array', 'block', 'custom.array',
+    ]
+    assert frame['rows'].tolist()[:2] == [7, 4]
+    assert frame['rows'].iloc[3] == 2
+
+
+def test_pipeline_records_spans(shared_profiler, treasury_provider):
+    df = synthetic_prices(500)
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider)
+    expected = metrics.set_buy(df, 'BTCUSDT')
+
+    with shared_profiler.recording():
+        result = metrics.set_buy(df, 'BTCUSDT')
+
+    pd.testing.assert_frame_equal(result, expected)
+    names = set(shared_profiler.to_frame()['name'])
+    assert any('set_buy' in name for name in names)
@@ -0,0 +1,61 @@
+import pytest
+
+from src import rate_limit
+from src.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """
+    Monotonic clock advanced by time.sleep instead of waiting.
+    """
+
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(rate_limit.time, 'monotonic', clock.monotonic)
+    monkeypatch.setattr(rate_limit.time, 'sleep', clock.sleep)
+    return clock
+
+
+def test_acquire_up_to_capacity_does_not_wait(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=1)
+    for _ in range(5):
+        bucket.acquire(2)
+
+    assert clock.sleeps == []
+
+
+def test_acquire_waits_for_refill(clock):
+    bucket = TokenBucket(capacity=10, refill_per_second=2)
+    bucket.acquire(10)
+    bucket.acquire(3)
+
+    assert clock.sleeps == [pytest.approx(1.5)]
+    assert clock.now == pytest.approx(1.5)
+
+
+def test_tokens_do_not_exceed_capacity(clock):
+    bucket = TokenBucket(capacity=4, refill_per_second=1)
+    bucket.acquire(4)
+    clock.now += 100
+    bucket.acquire(4)
+    bucket.acquire(1)
+
+    assert clock.sleeps == [pytest.approx(1.0)]
+
+
+def test_weight_above_capacity_raises(clock):
+    with pytest.raises(ValueError):
+        TokenBucket(capacity=4, refill_per_second=1).acquire(5)
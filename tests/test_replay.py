@@ -0,0 +1,41 @@
+import asyncio
+
+import pandas as pd
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.replay import diff_replay, replay, replay_async
+from src.signal_service import ReplaySource
+
+
+def _source() -> ReplaySource:
+    wide = pd.DataFrame({'date': pd.date_range('2021-01-01', periods=400)})
+    for seed, symbol in enumerate(['AUSDT', 'BUSDT']):
+        prices = synthetic_prices(400, seed=seed)['BTCUSDT']
+        # BUSDT is listed later
+        wide[symbol] = prices.where(prices.index >= 50 * seed)
+    return ReplaySource(wide)
+
+
+def test_replay_matches_set_buy(treasury_provider):
+    source = _source()
+    metrics = CryptoMetrics(400, treasury_provider=treasury_provider)
+
+    signals, stats = replay(source, metrics=metrics)
+
+    assert stats['candles'] == 750
+    assert diff_replay(signals, source, metrics).empty
+
+
+def test_replay_async_in_running_loop(treasury_data):
+    source = _source()
+
+    async def notebook_cell():
+        # replay() would fail here, like in a Jupyter cell
+        return await replay_async(source, treasury_data=treasury_data)
+
+    signals, stats = asyncio.run(notebook_cell())
+    expected, _ = replay(source, treasury_data=treasury_data)
+
+    assert stats['candles'] == 750
+    pd.testing.assert_frame_equal(signals, expected)
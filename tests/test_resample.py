@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.get_historical_data import interval_to_ms
+from src.resample import Resampler, base_interval, broadcast_extremes, resample_klines
+
+MINUTE_MS = 60_000
+PANDAS_RULES = {'1h': '1h', '4h': '4h', '1d': '24h', '1w': '168h'}
+
+
+def _minute_klines(n: int = 20000, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    open_time = 1_600_000_000_000 // MINUTE_MS * MINUTE_MS + np.arange(n) * MINUTE_MS
+    close = 100 + rng.standard_normal(n).cumsum()
+    return pd.DataFrame({
+        'open_time': open_time,
+        'open': close + rng.standard_normal(n) * 0.1,
+        'high': close + 1,
+        'low': close - 1,
+        'close': close,
+        'volume': rng.random(n),
+        'number_of_trades': rng.integers(0, 9, n),
+    })
+
+
+def _pandas_resample(klines: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    index = pd.to_datetime(klines['open_time'], unit='ms')
+    # Binance weeks start on Monday, 1970-01-05 is the first one
+    expected = klines.set_index(index).resample(
+        PANDAS_RULES[timeframe], origin=pd.Timestamp('1970-01-05')
+    ).agg({
+        'open': 'first', 'high': 'max', 'low': 'min', 'close': 'last',
+        'volume': 'sum', 'number_of_trades': 'sum'
+    }).dropna()
+    return expected
+
+
+@pytest.mark.parametrize('timeframe', ['1h', '4h', '1d', '1w'])
+def test_resample_matches_pandas(timeframe):
+    klines = _minute_klines()
+    expected = _pandas_resample(klines, timeframe)
+    result = resample_klines(klines, timeframe).to_df()
+
+    np.testing.assert_array_equal(
+        pd.to_datetime(result['open_time'], unit='ms'), expected.index
+    )
+    for column in expected.columns:
+        np.testing.assert_allclose(
+            result[column], expected[column], rtol=1e-12, err_msg=column
+        )
+
+
+@pytest.mark.parametrize('timeframe', ['1h', '4h', '1d', '1w'])
+def test_resampler_matches_one_shot(timeframe):
+    klines = _minute_klines()
+    resampler = Resampler()
+    for start in range(0, len(klines), 777):
+        # Overlapping batches, the repeated candles are ignored
+        resampler.update(klines.iloc[max(0, start - 5):start + 777])
+
+    expected = resample_klines(klines, timeframe).to_df()
+    result = resampler.candles(timeframe).to_df()
+    closed = resampler.candles(timeframe, include_partial=False).to_df()
+
+    pd.testing.assert_frame_equal(result, expected, rtol=1e-12)
+    pd.testing.assert_frame_equal(closed, expected.iloc[:-1], rtol=1e-12)
+
+
+def test_broadcast_extremes_matches_groupby():
+    rng = np.random.default_rng(1)
+    values = rng.standard_normal((500, 3))
+    values[rng.random(values.shape) < 0.1] = np.nan
+    periods = rng.integers(0, 40, 500)
+
+    highs, lows = broadcast_extremes(values, periods)
+    grouped = pd.DataFrame(values).groupby(periods)
+
+    np.testing.assert_array_equal(highs, grouped.transform('max').to_numpy())
+    np.testing.assert_array_equal(lows, grouped.transform('min').to_numpy())
+
+
+def test_base_interval_ignores_gaps():
+    open_times = np.array([0, 1, 2, 5, 6, 9]) * MINUTE_MS
+
+    assert base_interval(open_times) == MINUTE_MS
+    assert base_interval(open_times[:1]) is None
+
+
+@pytest.mark.parametrize('interval, timeframe', [
+    ('3d', '1w'), ('1d', '4h'), ('7m', '1h'), ('1h', '90m')
+])
+def test_timeframe_must_be_multiple_of_base(interval, timeframe):
+    step = interval_to_ms(interval)
+    klines = _minute_klines(50)
+    klines['open_time'] = np.arange(50) * step
+    # A missing candle doubles one step, the base interval is unchanged
+    klines = klines.drop(index=10)
+
+    with pytest.raises(ValueError):
+        resample_klines(klines, timeframe)
+    with pytest.raises(ValueError):
+        Resampler((timeframe,)).update(klines)
+
+
+def test_resampler_checks_interval_across_updates():
+    klines = _minute_klines(10)
+    klines['open_time'] = np.arange(10) * interval_to_ms('3d')
+    resampler = Resampler(('1w',))
+    # A single candle has no base interval yet
+    resampler.update(klines.iloc[:1])
+
+    with pytest.raises(ValueError):
+        resampler.update(klines.iloc[1:2])
@@ -0,0 +1,125 @@
+import asyncio
+
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.signal_service import ReplaySource, SignalService
+from src.streaming_metrics import StreamingCryptoMetrics
+
+SYMBOLS = ['AUSDT', 'BUSDT', 'CUSDT']
+
+
+def _wide(n: int = 300) -> pd.DataFrame:
+    wide = pd.DataFrame({'date': pd.date_range('2021-01-01', periods=n)})
+    for seed, symbol in enumerate(SYMBOLS):
+        wide[symbol] = synthetic_prices(n, seed=seed)['BTCUSDT']
+    return wide
+
+
+def _event(symbol: str, open_time: int, close: float, closed: bool) -> dict:
+    return {'k': {
+        's': symbol, 't': open_time, 'T': open_time + 59_999,
+        'c': close, 'x': closed,
+    }}
+
+
+class BurstSource:
+    """
+    Emits every event without suspending, like a burst of socket reads.
+    """
+
+    def __init__(self, events: list) -> None:
+        self.events = events
+
+    async def __aiter__(self):
+        for event in self.events:
+            yield event
+
+
+def _burst(n: int = 200) -> list:
+    events = []
+    for bar in range(n):
+        open_time = bar * 60_000
+        for tick in range(3):
+            events.append(_event('AUSDT', open_time, 100 + bar + tick, False))
+        events.append(_event('AUSDT', open_time, 100 + bar, True))
+    return events
+
+
+def _expected(wide: pd.DataFrame, treasury_data, symbol: str) -> list:
+    metrics = StreamingCryptoMetrics(symbol, treasury_data)
+    return [
+        metrics.update({'date': date, 'close': price})
+        # The service dates the candles from their millisecond open times
+        for date, price in zip(wide['date'].astype('datetime64[ms]'), wide[symbol])
+    ]
+
+
+@pytest.mark.parametrize('overflow', ['block', 'drop_oldest'])
+def test_replay_matches_streaming_metrics(overflow, treasury_data):
+    wide = _wide()
+    published = []
+    service = SignalService(
+        published.append, treasury_data, queue_size=8, overflow=overflow
+    )
+
+    asyncio.run(service.run(ReplaySource(wide)))
+
+    published = pd.DataFrame(published)
+    for symbol in SYMBOLS:
+        signals = published[published['symbol'] == symbol]
+        expected = pd.DataFrame(_expected(wide, treasury_data, symbol))
+        pd.testing.assert_frame_equal(
+            signals[expected.columns].reset_index(drop=True), expected
+        )
+    assert service.max_queue <= 8
+    assert service.latency_report()['candles'].tolist() == [300] * 3
+
+
+def test_drop_oldest_keeps_closed_candles():
+    published = []
+
+    async def publish(signals):
+        published.append(signals['date'])
+        await asyncio.sleep(0)
+
+    service = SignalService(publish, queue_size=4, overflow='drop_oldest')
+    asyncio.run(service.run(BurstSource(_burst())))
+
+    assert service.dropped > 0
+    assert service.max_queue <= 4
+    assert published == [pd.Timestamp(bar * 60_000, unit='ms') for bar in range(200)]
+
+
+def test_block_processes_every_event():
+    processed = []
+    published = []
+    service = SignalService(published.append, queue_size=2)
+    process = service.process
+    service.process = lambda message, received: (
+        processed.append(message) or process(message, received)
+    )
+
+    asyncio.run(service.run(BurstSource(_burst(20))))
+
+    assert service.dropped == 0
+    assert service.max_queue <= 2
+    assert len(processed) == 80
+    assert len(published) == 20
+
+
+def test_bad_message_does_not_stop_the_service(capsys):
+    events = [_event('AUSDT', 0, 1.0, True), {'k': {}}, _event('AUSDT', 60_000, 2.0, True)]
+    published = []
+    service = SignalService(published.append)
+
+    asyncio.run(service.run(BurstSource(events)))
+
+    assert len(published) == 2
+    assert 'An error occured' in capsys.readouterr().out
+
+
+def test_invalid_overflow():
+    with pytest.raises(ValueError):
+        SignalService(overflow='drop_newest')
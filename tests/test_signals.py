@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices, synthetic_treasury
+from src.signals import align_treasury_rate, rolling_corr, treasury_corr_signals
+
+
+def _panel(n: int, symbols: int, seed: int) -> np.ndarray:
+    return np.stack([
+        synthetic_prices(n, seed=seed * 7 + j)['BTCUSDT'].to_numpy()
+        for j in range(symbols)
+    ], axis=1)
+
+
+def _pandas_corr(prices: np.ndarray, rates: np.ndarray, window: int) -> np.ndarray:
+    return pd.DataFrame(prices).rolling(window).corr(pd.Series(rates)).to_numpy()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_rolling_corr_matches_pandas(seed):
+    df = synthetic_prices(1500, seed=seed)
+    rates = align_treasury_rate(df['date'], synthetic_treasury(seed=seed + 100))
+    prices = _panel(1500, 20, seed)
+    prices[np.random.default_rng(seed).random(prices.shape) < 0.01] = np.nan
+    prices[:200, 3] = np.nan
+
+    expected = _pandas_corr(prices, rates, 90)
+    result = rolling_corr(prices, rates, 90)
+
+    np.testing.assert_array_equal(np.isnan(result), np.isnan(expected))
+    np.testing.assert_allclose(result, expected, rtol=0, atol=1e-9)
+
+
+def test_rolling_corr_windows_in_one_call():
+    df = synthetic_prices(600)
+    rates = align_treasury_rate(df['date'], synthetic_treasury())
+    prices = _panel(600, 4, 0)
+
+    result = rolling_corr(prices, rates, [30, 90, 180])
+
+    assert result.shape == (3, 600, 4)
+    for corr, window in zip(result, [30, 90, 180]):
+        np.testing.assert_allclose(
+            corr, _pandas_corr(prices, rates, window), rtol=0, atol=1e-9
+        )
+    assert rolling_corr(prices[:, 0], rates, 90).shape == (600,)
+    assert rolling_corr(prices[:, 0], rates, [90]).shape == (1, 600)
+
+
+def test_treasury_corr_signals_thresholds():
+    df = synthetic_prices(800, seed=4)
+    rates = align_treasury_rate(df['date'], synthetic_treasury())
+    prices = df['BTCUSDT'].to_numpy()
+    corr = pd.Series(prices).rolling(90).corr(pd.Series(rates))
+
+    buy, sell = treasury_corr_signals(prices, rates)
+
+    np.testing.assert_array_equal(buy, (corr < -0.7).astype(int))
+    np.testing.assert_array_equal(sell, (corr > 0.7).astype(int))
+
+
+def test_constant_windows_are_nan_unlike_pandas():
+    df = synthetic_prices(600, seed=0)
+    rates = align_treasury_rate(df['date'], synthetic_treasury(seed=0)).copy()
+    rates[200:400] = 2.0
+    prices = df['BTCUSDT'].to_numpy()
+
+    expected = pd.Series(prices).rolling(90).corr(pd.Series(rates)).to_numpy()
+    result = rolling_corr(prices, rates, 90)
+
+    # Windows inside the flat stretch have no defined correlation: pandas
+    # returns rounding noise there, rolling_corr returns NaN
+    bars = np.arange(600)
+    flat = (bars >= 289) & (bars < 400)
+    assert np.isnan(result[flat]).all()
+    assert np.isfinite(expected[flat]).all()
+    assert np.abs(expected[flat]).max() < 1e-5
+    np.testing.assert_allclose(result[~flat], expected[~flat], rtol=0, atol=1e-9)
+
+    buy, sell = treasury_corr_signals(prices, rates)
+    np.testing.assert_array_equal(buy, (expected < -0.7).astype(int))
+    np.testing.assert_array_equal(sell, (expected > 0.7).astype(int))
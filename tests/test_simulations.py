@@ -0,0 +1,99 @@
+import contextlib
+import io
+import numpy as np
+import pytest
+
+import baseline_simulations as baseline
+from conftest import synthetic_prices
+from src import simulations
+
+COIN = 'BTCUSDT'
+
+
+def _run(function, *args, **kwargs):
+    """
+    Calls function capturing what it prints.
+    """
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        result = function(*args, **kwargs)
+    return result, output.getvalue()
+
+
+def _signals_frame(seed: int):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 300))
+    df = synthetic_prices(n, seed=seed)
+    df[f'buy_{COIN}'] = (rng.random(n) < rng.random()).astype(int)
+    df[f'sell_{COIN}'] = rng.random(n) < rng.random()
+    return df
+
+
+@pytest.mark.parametrize('initial_capital', [-5.0, 0.0, 50.0, 1000.0, 1e5])
+@pytest.mark.parametrize('trade_value', [10.0, 100.0, 333.3])
+@pytest.mark.parametrize('seed', range(8))
+@pytest.mark.parametrize('name', ['simulate_model_trader', 'simulate_model_buyer'])
+def test_signal_simulators_match_baseline(name, seed, trade_value, initial_capital):
+    df = _signals_frame(seed)
+    expected, expected_output = _run(
+        getattr(baseline, name), df, initial_capital, trade_value, COIN,
+        verbose=True
+    )
+    result, output = _run(
+        getattr(simulations, name), df, initial_capital, trade_value, COIN,
+        verbose=True, return_equity=True
+    )
+    equity = result.pop('equity_curve')
+    result.pop('position_curve')
+
+    assert result == expected
+    assert output == expected_output
+    assert len(equity) == len(df)
+
+
+def test_negative_balance_stops_like_baseline():
+    df = _signals_frame(3)
+    df[f'buy_{COIN}'] = 1
+    expected, expected_output = _run(
+        baseline.simulate_model_trader, df, -5.0, 10.0, COIN
+    )
+    result, output = _run(simulations.simulate_model_trader, df, -5.0, 10.0, COIN)
+
+    assert 'No more money to invest!' in output
+    assert result == expected
+    assert output == expected_output
+
+
+@pytest.mark.parametrize('interval', ['D', '7D', 'W', 'MS'])
+@pytest.mark.parametrize('initial_capital', [25.0, 1000.0, 1e6])
+def test_dca_matches_baseline(interval, initial_capital):
+    df = synthetic_prices(400, seed=5)
+    expected, expected_output = _run(
+        baseline.simulate_dca, df.copy(), COIN, initial_capital, 10.0, interval
+    )
+    result, output = _run(
+        simulations.simulate_dca, df, COIN, initial_capital, 10.0, interval
+    )
+
+    assert result == expected
+    assert output == expected_output
+
+
+def test_dca_stop_path_matches_baseline():
+    df = synthetic_prices(60, seed=2)
+    expected, expected_output = _run(
+        baseline.simulate_dca, df.copy(), COIN, 35.0, 10.0, 'D'
+    )
+    result, output = _run(simulations.simulate_dca, df, COIN, 35.0, 10.0, 'D')
+
+    assert output.startswith('Stop!')
+    assert result == expected
+    assert output == expected_output
+
+
+def test_dca_does_not_modify_input():
+    df = synthetic_prices(30)
+    before = df.copy()
+    _run(simulations.simulate_dca, df, COIN, 1000.0, 10.0, 'D')
+
+    assert df.equals(before)
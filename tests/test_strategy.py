@@ -0,0 +1,101 @@
+import numpy as np
+import pytest
+
+from conftest import synthetic_prices
+from src.signals import (
+    align_treasury_rate,
+    bollinger_signals,
+    combine_votes,
+    macd_signals,
+    rsi_signals,
+    treasury_corr_signals,
+)
+from src.strategy import Strategy
+
+COIN = 'BTCUSDT'
+EQUAL_WEIGHTS = {'rsi': 0.25, 'treasury_corr': 0.25, 'bb': 0.25, 'MACD': 0.25}
+
+
+def _inputs(treasury_data, n_symbols: int = 1) -> tuple:
+    columns = []
+    for seed in range(n_symbols):
+        df = synthetic_prices(1500, seed=seed)
+        columns.append(df[COIN].to_numpy())
+    rates = align_treasury_rate(df['date'], treasury_data)
+    if n_symbols == 1:
+        return columns[0], rates
+    return np.stack(columns, axis=1), np.repeat(rates[:, None], n_symbols, axis=1)
+
+
+def _expected(prices, rates, weights=None, THRESHOLD=0.5) -> dict:
+    votes = [
+        rsi_signals(prices), treasury_corr_signals(prices, rates),
+        bollinger_signals(prices), macd_signals(prices),
+    ]
+    return {
+        output: combine_votes(*(vote[side] for vote in votes), weights, THRESHOLD)
+        for side, output in enumerate(('buy', 'sell'))
+    }
+
+
+@pytest.mark.parametrize('n_symbols', [1, 4])
+@pytest.mark.parametrize('weights, THRESHOLD', [
+    (None, 0.5), (EQUAL_WEIGHTS, 0.3), (EQUAL_WEIGHTS, 0.6),
+])
+def test_default_strategy_matches_combine_votes(n_symbols, weights, THRESHOLD, treasury_data):
+    prices, rates = _inputs(treasury_data, n_symbols)
+
+    result = Strategy(weights=weights, THRESHOLD=THRESHOLD).evaluate(prices, rates)
+    expected = _expected(prices, rates, weights, THRESHOLD)
+
+    for output in ('buy', 'sell'):
+        assert result[output].dtype == np.int8
+        np.testing.assert_array_equal(result[output], expected[output], err_msg=output)
+
+
+def test_zero_weight_skips_the_rate(treasury_data):
+    prices, rates = _inputs(treasury_data)
+    weights = {**EQUAL_WEIGHTS, 'treasury_corr': 0}
+    calls = []
+
+    def fetch_rates():
+        calls.append(1)
+        return rates
+
+    strategy = Strategy(weights=weights)
+    result = strategy.evaluate(prices, fetch_rates)
+    expected = _expected(prices, rates, weights)
+
+    assert not strategy.uses_rate()
+    assert Strategy().uses_rate()
+    assert calls == []
+    np.testing.assert_array_equal(result['buy'], expected['buy'])
+
+
+def test_aliased_and_extra_indicators(treasury_data):
+    prices, _ = _inputs(treasury_data)
+    strategy = Strategy.from_dict({
+        'indicators': {
+            'rsi_fast': {'indicator': 'rsi', 'PERIOD': 7},
+            'bb': {'PERIOD': 20, 'STD_FACTOR': 2},
+            'ema_cross': {'fast': 5, 'slow': 20},
+        },
+        'weights': {'rsi_fast': 0.5, 'bb': 0.5, 'ema_cross': 0.0},
+        'THRESHOLD': 0.4,
+    })
+
+    result = strategy.evaluate(prices, outputs=('buy',))
+
+    rsi_buy, _ = rsi_signals(prices, PERIOD=7)
+    bb_buy, _ = bollinger_signals(prices, PERIOD=20, STD_FACTOR=2)
+    np.testing.assert_array_equal(
+        result['buy'], (rsi_buy * 0.5 + bb_buy * 0.5 > 0.4).astype(np.int8)
+    )
+    assert list(result) == ['buy']
+
+
+def test_invalid_strategies():
+    with pytest.raises(ValueError, match='vwap'):
+        Strategy(indicators={'vwap': {}})
+    with pytest.raises(ValueError, match='MACD'):
+        Strategy(indicators={'rsi': {}}, weights={'rsi': 1, 'MACD': 1})
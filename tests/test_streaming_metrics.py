@@ -0,0 +1,83 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from conftest import synthetic_prices
+from src.crypto_metrics import CryptoMetrics
+from src.streaming_metrics import StreamingCryptoMetrics
+
+COIN = 'BTCUSDT'
+
+
+def _prices(case: str) -> pd.DataFrame:
+    df = synthetic_prices(3000, seed=len(case))
+    if case == 'flat':
+        df.loc[100:140, COIN] = df.loc[100, COIN]
+    elif case == 'rounded':
+        df[COIN] = df[COIN].round(-3)
+    return df
+
+
+def _assert_same(streamed, batch, undefined=None):
+    streamed = np.asarray(streamed, dtype=np.float64)
+    batch = np.asarray(batch, dtype=np.float64)
+    if undefined is not None:
+        # Constant windows are NaN where pandas returns rounding noise
+        batch = np.where(undefined, np.nan, batch)
+    np.testing.assert_array_equal(np.isnan(streamed), np.isnan(batch))
+    np.testing.assert_allclose(streamed, batch, rtol=1e-9, atol=1e-12)
+
+
+@pytest.mark.parametrize('case', ['random', 'flat', 'rounded'])
+def test_streaming_matches_batch(case, treasury_data, treasury_provider):
+    df = _prices(case)
+    metrics = CryptoMetrics(len(df), treasury_provider=treasury_provider)
+    rsi = metrics.calculate_rsi(df, COIN)
+    corr = metrics.calculate_corr_treasury(df, COIN)
+    bands = metrics.calculate_bollinger_bands(df, COIN)
+    macd = metrics.calculate_macd(df, COIN)
+    votes = metrics.set_buy(df, COIN)
+
+    stream = StreamingCryptoMetrics(COIN, treasury_data=treasury_data)
+    streamed = pd.DataFrame([
+        stream.update({'date': date, COIN: price})
+        for date, price in zip(df['date'], df[COIN])
+    ])
+
+    _assert_same(streamed['rsi'], rsi[f'rsi_{COIN}'])
+    window = df[COIN].rolling(90)
+    _assert_same(
+        streamed['treasury_corr'], corr[f'treasury_corr_{COIN}'],
+        undefined=(window.max() == window.min()).to_numpy()
+    )
+    _assert_same(streamed['MACD'], macd[f'MACD_{COIN}'])
+    for signal, frame in [
+            ('rsi', rsi), ('bb', bands), ('MACD', macd), ('treasury_corr', corr)
+        ]:
+        for side in ('buy', 'sell'):
+            column = f'{signal}_{side}'
+            np.testing.assert_array_equal(
+                streamed[column], frame[f'{column}_{COIN}'].astype(int),
+                err_msg=column
+            )
+    np.testing.assert_array_equal(streamed['buy'], votes[f'buy_{COIN}'])
+    np.testing.assert_array_equal(streamed['sell'], votes[f'sell_{COIN}'])
+
+
+def test_candle_treasury_rate_matches_table(treasury_data):
+    df = synthetic_prices(200)
+    rates = treasury_data.set_index('date')['treasury_rate']
+    candle_rates = rates.reindex(df['date']).ffill().to_numpy()
+    from_table = StreamingCryptoMetrics(COIN, treasury_data=treasury_data)
+    from_candle = StreamingCryptoMetrics(COIN)
+
+    expected = pd.DataFrame([
+        from_table.update({'date': date, COIN: price})
+        for date, price in zip(df['date'], df[COIN])
+    ])
+    result = pd.DataFrame([
+        from_candle.update({'date': date, COIN: price, 'treasury_rate': rate})
+        for date, price, rate in zip(df['date'], df[COIN], candle_rates)
+    ])
+
+    pd.testing.assert_frame_equal(result, expected)
@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from src.crypto_metrics import CryptoMetrics
+from src.volatility import (
+    ewma_volatility,
+    garman_klass_volatility,
+    parkinson_volatility,
+    returns_matrix,
+    rolling_covariance,
+    rolling_volatility,
+)
+
+
+@pytest.fixture
+def prices() -> np.ndarray:
+    rng = np.random.default_rng(0)
+    prices = 100 * np.exp(np.cumsum(rng.standard_normal((3000, 12)) * 0.01, axis=0))
+    prices[rng.random(prices.shape) < 0.01] = np.nan
+    prices[:300, 3] = np.nan
+    return prices
+
+
+def test_returns_match_pct_change(prices):
+    expected = pd.DataFrame(prices).pct_change(fill_method=None).to_numpy()
+
+    np.testing.assert_array_equal(returns_matrix(prices), expected)
+
+
+@pytest.mark.parametrize('window, min_periods', [(15, None), (30, 5), (1, None), (5000, 1)])
+def test_rolling_volatility_matches_pandas(prices, window, min_periods):
+    returns = returns_matrix(prices)
+    expected = pd.DataFrame(returns).rolling(
+        window, min_periods=min_periods
+    ).std().to_numpy()
+
+    result = rolling_volatility(returns, window, min_periods)
+
+    np.testing.assert_allclose(result, expected, rtol=1e-9, atol=1e-15)
+    assert rolling_volatility(returns[:, 0], window, min_periods).shape == (3000,)
+
+
+def test_ewma_volatility_matches_pandas(prices):
+    returns = returns_matrix(prices)
+    expected = np.sqrt(pd.DataFrame(returns**2).ewm(
+        alpha=0.06, adjust=False, ignore_na=True
+    ).mean().to_numpy())
+
+    np.testing.assert_allclose(ewma_volatility(returns), expected, rtol=1e-12)
+
+
+def test_range_volatilities_match_pandas(prices):
+    rng = np.random.default_rng(1)
+    high = prices * (1 + rng.random(prices.shape) * 0.02)
+    low = prices * (1 - rng.random(prices.shape) * 0.02)
+    open = prices * (1 + rng.standard_normal(prices.shape) * 0.003)
+
+    parkinson = np.sqrt(
+        pd.DataFrame(np.log(high / low)**2).rolling(20).mean() / (4*np.log(2))
+    ).to_numpy()
+    terms = 0.5*np.log(high / low)**2 - (2*np.log(2) - 1)*np.log(prices / open)**2
+    garman_klass = np.sqrt(
+        pd.DataFrame(terms).rolling(20).mean().clip(lower=0)
+    ).to_numpy()
+
+    np.testing.assert_allclose(
+        parkinson_volatility(high, low, 20), parkinson, rtol=1e-9
+    )
+    np.testing.assert_allclose(
+        garman_klass_volatility(open, high, low, prices, 20), garman_klass,
+        rtol=1e-9
+    )
+
+
+@pytest.mark.parametrize('correlation', [False, True])
+def test_rolling_covariance_matches_pandas(prices, correlation):
+    returns = returns_matrix(prices)[:400, :8]
+    rolling = pd.DataFrame(returns).rolling(30)
+    expected = rolling.corr() if correlation else rolling.cov()
+    tolerance = {'rtol': 1e-7, 'atol': 1e-10} if correlation else {'rtol': 1e-8, 'atol': 1e-14}
+
+    every_bar = rolling_covariance(returns, 30, correlation=correlation)
+    at = [5, 29, 30, 100, 333, 399]
+    some_bars = rolling_covariance(returns, 30, at=at, correlation=correlation)
+
+    for bar in range(len(returns)):
+        np.testing.assert_allclose(
+            every_bar[bar], expected.loc[bar].to_numpy(), **tolerance
+        )
+    for position, bar in enumerate(at):
+        np.testing.assert_allclose(
+            some_bars[position], expected.loc[bar].to_numpy(), **tolerance
+        )
+
+
+def test_calculate_volatility_matches_pandas():
+    rng = np.random.default_rng(2)
+    n = 500
+    df = pd.DataFrame({
+        'data': pd.date_range('2020', periods=n),
+        'ouro': 100 * np.exp(rng.standard_normal(n).cumsum() * 0.01),
+        'prata': 20 * np.exp(rng.standard_normal(n).cumsum() * 0.02),
+        'dolar': 5 + rng.random(n),
+    })
+    df.loc[[10, 11, 200], 'ouro'] = np.nan
+
+    result = CryptoMetrics(1).calculate_volatility(df)
+
+    assert list(result.columns) == [
+        'data', 'ouro', 'prata', 'dolar',
+        'retorno_diario_ouro', 'volatilidade_ouro',
+        'retorno_diario_prata', 'volatilidade_prata',
+    ]
+    for asset in ('ouro', 'prata'):
+        returns = df[asset].pct_change(fill_method=None)
+        np.testing.assert_array_equal(result[f'retorno_diario_{asset}'], returns)
+        np.testing.assert_allclose(
+            result[f'volatilidade_{asset}'], returns.rolling(15).std() * 100,
+            rtol=1e-9
+        )